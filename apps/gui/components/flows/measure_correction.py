@@ -1,34 +1,32 @@
-import asyncio
 import json
-import shutil
-import tempfile
-import zipfile
+import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
 
 from nicegui import ui
 from openpyxl import load_workbook
 
+from apps.gui.components.widgets.jobStatus import JobStatus
 from apps.gui.components.widgets.metadataSettingsUi import MetadataSettingsUI
 from apps.gui.helpers.io import spooled_file_to_temp_file
 from imxInsights.file.singleFileImx.imxSituationEnum import ImxSituationEnum
-from src.imxTools.insights.diff_and_population import write_diff_output_files
-from src.imxTools.insights.measure_analyse import generate_measure_excel
-from src.imxTools.revision.process_revision import process_imx_revisions
-from src.imxTools.utils.helpers import load_imxinsights_container_or_file, create_timestamp
+from src.imxTools.cli import run_diff, run_measure_check, run_revise
+from src.imxTools.settings import config
+from src.imxTools.utils.helpers import create_timestamp
+from src.imxTools.utils.job_queue import estimate_memory, get_job_queue
 
 
 @dataclass
 class MeasureCorrectionState:
     imx_file_path: Path | None = None
-    loaded_imx_data: Any = None
     measure_excel_file: Path | None = None
     revision_log_zip: Path | None = None
     processed_imx: Path | None = None
     gr_json_file_path: Path | None = None
     revisions_excel_upload_widget: Path | None = None
     time_stamp: str | None = None
+    # projections of the first measure check, reused when checking the processed IMX
+    measure_cache: Path | None = None
 
 
 class MeasureCorrectionTool:
@@ -39,13 +37,9 @@ class MeasureCorrectionTool:
 
     def __init__(self, container):
         self.state = MeasureCorrectionState()
-        self._temp_dirs: list[str] = []
         with container:
             self._setup_widgets()
 
-    def __del__(self):
-        self._cleanup()
-
     def _setup_widgets(self):
         with ui.stepper().props("vertical").classes("w-full") as self.stepper:
             self._build_upload_step()
@@ -64,8 +58,7 @@ class MeasureCorrectionTool:
             with ui.stepper_navigation():
                 self.analyze_measures_button = ui.button("Analyse Measures", on_click=self.run_measure_check)
                 self.analyze_measures_button.disable()
-                self.upload_spinner = ui.spinner(size="lg")
-                self.upload_spinner.visible = False
+            self.upload_job_status = JobStatus()
 
     def _build_imx_upload_card(self):
         with ui.card().classes("w-full"):
@@ -76,6 +69,9 @@ class MeasureCorrectionTool:
             ui.label('If a single IMX project file is uploaded, only the "NewSituation" will be corrected.')\
                 .classes("text-sm italic text-gray-500")
             self.threshold_input_field = ui.number(label="Threshold (meters)", value=0.015).classes("w-full")
+            self.workers_input_field = ui.number(
+                label="Worker processes", value=1, min=1, max=os.cpu_count(), step=1
+            ).classes("w-full").tooltip("Rail connections are analysed in parallel")
 
     def _build_json_upload_card(self):
         with ui.card().classes("w-full"):
@@ -117,8 +113,7 @@ class MeasureCorrectionTool:
             with ui.stepper_navigation():
                 self.process_revisions_button = ui.button("Process Revisions", on_click=self.process_revisions)
                 self.process_revisions_back = ui.button("Back", on_click=self.stepper.previous).props("flat")
-                self.review_spinner = ui.spinner(size="lg")
-                self.review_spinner.visible = False
+            self.review_job_status = JobStatus()
 
     def _build_check_result_step(self):
         with ui.step(self.CHECK_RESULT_STEP).classes("font-bold"):
@@ -130,8 +125,13 @@ class MeasureCorrectionTool:
                 self.diff_button = ui.button(
                     "Create And Download Diff Report", icon="download", on_click=self._on_generate_diff
                 ).props("outline")
-                self.diff_spinner = ui.spinner(size="lg")
-                self.diff_spinner.visible = False
+            self.diff_job_status = JobStatus()
+
+            with ui.row():
+                self.recheck_button = ui.button(
+                    "Re-check And Download Measures", icon="download", on_click=self._on_recheck_measures
+                ).props("outline").tooltip("Only the changed objects and rail connections are projected again")
+            self.recheck_job_status = JobStatus()
 
             with ui.stepper_navigation():
                 ui.button("Finish", on_click=self._on_finish).props("flat")
@@ -168,61 +168,73 @@ class MeasureCorrectionTool:
 
     async def _on_generate_diff(self):
         self.diff_button.disable()
-        self.diff_spinner.visible = True
         try:
-            temp_dir = tempfile.mkdtemp()
-            self._temp_dirs.append(temp_dir)
-            output_path = Path(temp_dir) / "output"
-            output_path.mkdir(parents=True, exist_ok=True)
-
-            await asyncio.to_thread(
-                write_diff_output_files,
-                self.state.loaded_imx_data.path,
-                self.state.processed_imx,
-                output_path,
-                self.DEFAULT_SITUATION,
-                self.DEFAULT_SITUATION,
-                False,
-                False,
+            base_name = self.state.imx_file_path.stem
+            job = get_job_queue().submit(
+                "measure correction diff",
+                run_diff,
+                f"{base_name}-{self.state.time_stamp}-diff.zip",
+                estimate_memory(self.state.imx_file_path, self.state.processed_imx),
+                t1=self.state.imx_file_path,
+                t2=self.state.processed_imx,
+                t1_situation=self.DEFAULT_SITUATION,
+                t2_situation=self.DEFAULT_SITUATION,
             )
+            if await self.diff_job_status.run(job):
+                ui.download(job.result, filename=job.download_name)
+                self._notify("Diff report ready!", type_="positive")
+        finally:
+            self.diff_button.enable()
 
+    async def _on_recheck_measures(self):
+        self.recheck_button.disable()
+        try:
+            threshold = self.threshold_input_field.value
             base_name = self.state.imx_file_path.stem
-            zip_name = f"{base_name}-{self.state.time_stamp}-diff.zip"
-            zip_path = Path(tempfile.gettempdir()) / zip_name
-
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for file in output_path.rglob("*"):
-                    zipf.write(file, file.relative_to(output_path))
-
-            ui.download(zip_path, filename=zip_name)
-            self._notify("Diff report ready!", type_="positive")
-        except Exception as e:
-            self._notify(f"Error generating diff: {e}", type_="negative")
+            output_file = f"{base_name}-{self.state.time_stamp}-processed-revision.xlsx"
+            job = get_job_queue().submit(
+                "measure re-check",
+                run_measure_check,
+                output_file,
+                estimate_memory(self.state.processed_imx),
+                output_file=output_file,
+                imx=self.state.processed_imx,
+                situation=self.DEFAULT_SITUATION,
+                threshold=threshold if threshold else None,
+                workers=int(self.workers_input_field.value or 1),
+                cache=self.state.measure_cache,
+            )
+            if await self.recheck_job_status.run(job):
+                ui.download(job.result, filename=job.download_name)
+                self._notify("Measure check ready!", type_="positive")
         finally:
-            self.diff_spinner.visible = False
-            self.diff_button.enable()
+            self.recheck_button.enable()
 
     async def run_measure_check(self):
         self.state.time_stamp = create_timestamp()
-        self.upload_spinner.visible = True
         self.analyze_measures_button.disable()
         try:
             threshold = self.threshold_input_field.value
-            self.state.loaded_imx_data = await asyncio.to_thread(
-                load_imxinsights_container_or_file,
-                self.state.imx_file_path,
-                self.DEFAULT_SITUATION,
-            )
-            self.state.measure_excel_file = Path(tempfile.gettempdir()) / f"measure_output_{self.state.imx_file_path.stem}.xlsx"
-            if self.state.measure_excel_file.exists():
-                self.state.measure_excel_file.unlink()
-
-            await asyncio.to_thread(
-                generate_measure_excel,
-                self.state.loaded_imx_data,
-                self.state.measure_excel_file,
-                threshold if threshold else None,
+            workers = int(self.workers_input_field.value or 1)
+            base_name = self.state.imx_file_path.stem
+            output_file = f"{base_name}-{self.state.time_stamp}-revision.xlsx"
+            self._remove_measure_cache()
+            self.state.measure_cache = config.CACHE_PATH / "measure_checks" / f"{base_name}-{self.state.time_stamp}.pickle"
+            job = get_job_queue().submit(
+                "measure check",
+                run_measure_check,
+                output_file,
+                estimate_memory(self.state.imx_file_path),
+                output_file=output_file,
+                imx=self.state.imx_file_path,
+                situation=self.DEFAULT_SITUATION,
+                threshold=threshold if threshold else None,
+                workers=workers,
+                cache=self.state.measure_cache,
             )
+            if not await self.upload_job_status.run(job):
+                return
+            self.state.measure_excel_file = job.result
 
             if self.state.gr_json_file_path:
                 puics_false, puics_true = self._classify_puics(self.state.gr_json_file_path)
@@ -232,57 +244,44 @@ class MeasureCorrectionTool:
         except Exception as e:
             self._notify(f"Error during measure check: {e}", type_="negative")
         finally:
-            self.upload_spinner.visible = False
             self.analyze_measures_button.enable()
 
     async def process_revisions(self):
-        self.review_spinner.visible = True
         self.process_revisions_button.disable()
         self.process_revisions_back.disable()
         try:
-            tmpdir = tempfile.mkdtemp()
-            self._temp_dirs.append(tmpdir)
-            out_path = Path(tmpdir)
-
             settings = self.metadata_ui.get_metadata_settings()
-
-            await asyncio.to_thread(
-                process_imx_revisions,
-                self.state.loaded_imx_data.path,
-                self.state.revisions_excel_upload_widget,
-                out_path,
-                settings.set_metadata,
-                settings.add_metadata,
-                settings.source,
-                settings.origin,
-                settings.set_parents,
-                settings.registration_time,
-                True,
+            base_name = self.state.imx_file_path.stem
+            job = get_job_queue().submit(
+                "measure correction revisions",
+                run_revise,
+                f"{base_name}-{self.state.time_stamp}-processed.zip",
+                estimate_memory(self.state.imx_file_path),
+                imx=self.state.imx_file_path,
+                excel=self.state.revisions_excel_upload_widget,
+                replace_metadata=settings.set_metadata,
+                add_metadata=settings.add_metadata,
+                metadata_source=settings.source,
+                metadata_origin=settings.origin,
+                metadata_parents=settings.set_parents,
+                registration_time=settings.registration_time,
             )
+            if not await self.review_job_status.run(job):
+                return
 
-            path_to_get = self.state.imx_file_path
-            zip_path = out_path.with_suffix(".zip")
-            shutil.make_archive(zip_path.with_suffix(""), "zip", out_path)
-
-            with zipfile.ZipFile(zip_path) as zf:
-                p = Path(path_to_get.name)
-                internal_name = p.with_name(f"{p.stem}-processed{p.suffix}")
-
-                if internal_name.name in zf.namelist():
-                    temp_dir = tempfile.mkdtemp()
-                    self._temp_dirs.append(temp_dir)
-                    zf.extract(internal_name.name, path=temp_dir)
-                    self.state.processed_imx = Path(temp_dir) / internal_name
-                else:
-                    raise FileNotFoundError(f"{internal_name} not found in {zip_path}")
+            # the processed IMX is used from the job output folder, only the download is zipped
+            p = Path(self.state.imx_file_path.name)
+            processed_imx = job.output / f"{p.stem}-processed{p.suffix}"
+            if not processed_imx.exists():
+                raise FileNotFoundError(f"{processed_imx.name} not found in {job.output}")
 
+            self.state.processed_imx = processed_imx
+            self.state.revision_log_zip = job.result
             self._notify("Revisions applied successfully!", type_="positive")
-            self.state.revision_log_zip = zip_path
             self.stepper.next()
         except Exception as e:
             self._notify(f"Error processing revisions: {e}", type_="negative")
         finally:
-            self.review_spinner.visible = False
             self.process_revisions_button.enable()
             self.process_revisions_back.enable()
 
@@ -317,13 +316,6 @@ class MeasureCorrectionTool:
 
         wb.save(excel_path)
 
-    def _cleanup(self):
-        for dir_path in self._temp_dirs:
-            try:
-                shutil.rmtree(dir_path)
-            except Exception:
-                pass
-
     def _notify(self, message: str, type_: str = "info"):
         ui.notify(message, type=type_)
 
@@ -331,7 +323,12 @@ class MeasureCorrectionTool:
         self.end_and_reset_stepper()
         self._notify("Process has been reset.", type_="positive")
 
+    def _remove_measure_cache(self):
+        if self.state.measure_cache is not None:
+            self.state.measure_cache.unlink(missing_ok=True)
+
     def end_and_reset_stepper(self):
+        self._remove_measure_cache()
         self.stepper.set_value(self.UPLOAD_STEP)
         self.imx_upload_widget.reset()
         self.gr_json_upload_widget.reset()
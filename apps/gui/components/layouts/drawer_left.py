@@ -34,5 +34,6 @@ def build_drawer():
                 create_button("fa-solid fa-pen-to-square", "Revisions", "/revision")
                 create_button("fa-solid fa-wrench", "Measure Correction", "/measure-correction-flow")
                 create_button("fa-solid fa-location-crosshairs", "KM Lookup", "/km")
+                create_button("fa-solid fa-list-check", "Jobs", "/jobs")
 
     return menu
@@ -1,15 +1,12 @@
-import asyncio
 from pathlib import Path
-import tempfile
 
 from nicegui import ui
 from nicegui.element import Element
 
+from apps.gui.components.widgets.jobStatus import JobStatus
 from apps.gui.components.widgets.uploadFile import UploadFile
-from src.imxTools.comments.comments_extractor import extract_comments_to_new_sheet
-from src.imxTools.comments.comments_replacer import apply_comments_from_issue_list
-
-from apps.gui.helpers.io import delete_later
+from src.imxTools.cli import run_apply_comments, run_extract_comments
+from src.imxTools.utils.job_queue import estimate_memory, get_job_queue
 
 
 class CommentsTool:
@@ -47,6 +44,7 @@ class CommentsTool:
         )
 
         self.status_label_extract = ui.label().classes("text-sm italic mt-4")
+        self.job_status_extract = JobStatus()
 
         self.input_file = None
 
@@ -65,6 +63,7 @@ class CommentsTool:
         )
 
         self.status_label_reproject = ui.label().classes("text-sm italic mt-4")
+        self.job_status_reproject = JobStatus()
 
         self.new_diff_file = None
         self.comment_list_file = None
@@ -90,32 +89,23 @@ class CommentsTool:
             return
 
         self.status_label_extract.text = "Extracting comments..."
-        try:
-            temp_file = (
-                Path(tempfile.gettempdir())
-                / f"comments_extracted_{self.input_file.stem}.xlsx"
-            )
-            if temp_file.exists():
-                temp_file.unlink()
-
-            await asyncio.to_thread(
-                extract_comments_to_new_sheet,
-                self.input_file,
-                str(temp_file),
-                add_to_wb=self.add_to_wb_checkbox.value,
-                overwrite=self.overwrite_checkbox.value
-                if self.add_to_wb_checkbox.value
-                else False,
-            )
-
-            ui.download(temp_file, filename=temp_file.name)
+        add_to_wb = self.add_to_wb_checkbox.value
+        output_file = f"comments_extracted_{self.input_file.stem}.xlsx"
+        job = get_job_queue().submit(
+            "extract comments",
+            run_extract_comments,
+            output_file,
+            estimate_memory(self.input_file),
+            output_file=output_file,
+            diff=self.input_file,
+            add_to_wb=add_to_wb,
+            overwrite=self.overwrite_checkbox.value if add_to_wb else False,
+        )
+        if await self.job_status_extract.run(job):
+            ui.download(job.result, filename=job.download_name)
             ui.notify("Comments extracted successfully!", type="positive")
             self.status_label_extract.text = "✅ Comments extraction complete."
-
-            asyncio.create_task(delete_later(temp_file))
-
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        else:
             self.status_label_extract.text = "❌ Extraction failed."
 
     async def run_reproject(self):
@@ -127,27 +117,19 @@ class CommentsTool:
             return
 
         self.status_label_reproject.text = "Applying comments..."
-        try:
-            temp_file = (
-                Path(tempfile.gettempdir())
-                / f"comments_reprojected_{self.new_diff_file.stem}.xlsx"
-            )
-            if temp_file.exists():
-                temp_file.unlink()
-
-            await asyncio.to_thread(
-                apply_comments_from_issue_list,
-                issue_list_path=self.comment_list_file,
-                new_diff_path=self.new_diff_file,
-                output_path=str(temp_file),
-            )
-
-            ui.download(temp_file, filename=temp_file.name)
+        output_file = f"comments_reprojected_{self.new_diff_file.stem}.xlsx"
+        job = get_job_queue().submit(
+            "apply comments",
+            run_apply_comments,
+            output_file,
+            estimate_memory(self.new_diff_file, self.comment_list_file),
+            output_file=output_file,
+            issue_list=self.comment_list_file,
+            diff=self.new_diff_file,
+        )
+        if await self.job_status_reproject.run(job):
+            ui.download(job.result, filename=job.download_name)
             ui.notify("Comments applied successfully!", type="positive")
             self.status_label_reproject.text = "✅ Reprojection complete."
-
-            asyncio.create_task(delete_later(temp_file))
-
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        else:
             self.status_label_reproject.text = "❌ Reprojection failed."
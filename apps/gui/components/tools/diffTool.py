@@ -1,16 +1,13 @@
-import asyncio
-import tempfile
-import zipfile
 from pathlib import Path
 
+from apps.gui.components.widgets.jobStatus import JobStatus
 from apps.gui.components.widgets.uploadFile import UploadFile
 from apps.gui.components.widgets.uploadImxFile import ImxUpload
-from src.imxTools.insights.diff_and_population import write_diff_output_files
+from src.imxTools.cli import run_diff
 from src.imxTools.utils.helpers import create_timestamp
+from src.imxTools.utils.job_queue import estimate_memory, get_job_queue
 from nicegui import ui
 
-from apps.gui.helpers.io import delete_later
-
 
 class DiffTool:
     def __init__(self, container):
@@ -69,6 +66,7 @@ class DiffTool:
             ui.button("Run Comparison", on_click=self.run_diff).classes(
                 "mt-4 btn-primary"
             )
+            self.job_status = JobStatus()
 
 
     def _on_t1_upload_change(self, file_path: Path | None, situation):
@@ -153,37 +151,19 @@ class DiffTool:
             ui.notify("Select a situation for T2", type="negative")
             return
 
-        try:
-            geojson = self.geojson_toggle.value
-            to_wgs = self.wgs84_toggle.value
-
-            with tempfile.TemporaryDirectory() as temp_dir:
-                output_path = Path(temp_dir) / "output"
-                output_path.mkdir(parents=True, exist_ok=True)
-
-                await asyncio.to_thread(
-                    write_diff_output_files,
-                    t1_path,
-                    t2_path,
-                    output_path,
-                    t1_situation,
-                    t2_situation,
-                    geojson,
-                    to_wgs,
-                    False,
-                    spec_file,
-                )
-
-                zip_name = f"diff_{create_timestamp()}.zip"
-                zip_path = Path(tempfile.gettempdir()) / zip_name
-                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                    for file in output_path.rglob("*"):
-                        zipf.write(file, file.relative_to(output_path))
-
-                ui.download(zip_path, filename=zip_name)
-                ui.notify("Diff report ready!", type="positive")
-
-                asyncio.create_task(delete_later(zip_path))
-
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        job = get_job_queue().submit(
+            "diff",
+            run_diff,
+            f"diff_{create_timestamp()}.zip",
+            estimate_memory(t1_path, t2_path if t2_path != t1_path else None),
+            t1=t1_path,
+            t2=t2_path,
+            t1_situation=t1_situation,
+            t2_situation=t2_situation,
+            geojson=self.geojson_toggle.value,
+            wgs=self.wgs84_toggle.value,
+            spec=spec_file,
+        )
+        if await self.job_status.run(job):
+            ui.download(job.result, filename=job.download_name)
+            ui.notify("Diff report ready!", type="positive")
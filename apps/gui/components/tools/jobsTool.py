@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from nicegui import ui
+from nicegui.element import Element
+
+from src.imxTools.settings import config
+from src.imxTools.utils.job_queue import BackgroundJob, JobState, get_job_queue
+
+STATE_ICONS = {
+    JobState.queued: "⏳",
+    JobState.running: "⚙️",
+    JobState.done: "✅",
+    JobState.failed: "❌",
+    JobState.cancelled: "⛔",
+}
+
+
+class JobsTool:
+    """Lists the background jobs with their state, download and cancel buttons."""
+
+    def __init__(self, container: Element):
+        with container:
+            ttl = config.JOB_RESULT_TTL_DAYS
+            if ttl is not None:
+                ui.label(f"Results are kept for {ttl:g} days.").classes(
+                    "text-sm italic"
+                )
+            self.list = ui.column().classes("w-full gap-2")
+        self._shown: list[tuple] = []
+        ui.timer(1.0, self._refresh)
+        self._refresh()
+
+    def _refresh(self):
+        jobs = get_job_queue().jobs()
+        # rebuild only when something changed, keeps the buttons clickable
+        shown = [(job.id, job.state, job.stage) for job in jobs]
+        if shown == self._shown:
+            return
+        self._shown = shown
+
+        self.list.clear()
+        with self.list:
+            if not jobs:
+                ui.label("No jobs yet.").classes("italic")
+            for job in jobs:
+                self._job_row(job)
+
+    def _job_row(self, job: BackgroundJob):
+        with ui.card().classes("w-full"):
+            with ui.row().classes("w-full items-center gap-4"):
+                ui.label(STATE_ICONS[job.state])
+                ui.label(job.name).classes("font-bold")
+                ui.label(
+                    datetime.fromtimestamp(job.submitted).strftime("%Y-%m-%d %H:%M")
+                ).classes("text-sm")
+                detail = job.stage if job.state is JobState.running else job.error
+                ui.label(detail).classes("text-sm italic grow")
+
+                if job.state is JobState.done and job.result.exists():
+                    ui.button(
+                        job.download_name,
+                        icon="download",
+                        on_click=lambda j=job: ui.download(
+                            j.result, filename=j.download_name
+                        ),
+                    ).props("outline")
+                if not job.state.finished:
+                    ui.button(
+                        "Cancel",
+                        icon="close",
+                        on_click=lambda j=job: get_job_queue().cancel(j.id),
+                    ).props("flat")
+                else:
+                    ui.button(
+                        icon="delete",
+                        on_click=lambda j=job: get_job_queue().remove(j.id),
+                    ).props("flat").tooltip("Remove job and its result")
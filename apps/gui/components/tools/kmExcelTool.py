@@ -5,6 +5,7 @@ from pathlib import Path
 from nicegui import ui
 from nicegui.element import Element
 
+from apps.gui.components.widgets.progressDisplay import ProgressDisplay
 from apps.gui.components.widgets.uploadFile import UploadFile
 from imxTools.utils.km_service_manager import get_km_service
 from apps.gui.helpers.io import delete_later
@@ -24,6 +25,11 @@ class KmExcelTool:
                 "Use simple display value only", value=True
             ).classes("mt-2")
 
+            self.streaming_checkbox = ui.checkbox(
+                "Stream large workbooks (low memory, cell styles are not kept)",
+                value=False,
+            )
+
             with ui.row():
                 self.process_button = ui.button(
                     "Add KM", on_click=self.run_add_km
@@ -31,8 +37,17 @@ class KmExcelTool:
                 self.spinner = (
                     ui.spinner(size="lg").props("color=primary").classes("hidden mt-2")
                 )
+            self.progress_display = ProgressDisplay()
 
         self.input_file: Path | None = None
+        # set from the worker thread, rendered by the timer
+        self.progress = None
+        self.progress_timer = ui.timer(
+            0.5, lambda: self.progress_display.show(self.progress), active=False
+        )
+
+    def _on_progress(self, progress):
+        self.progress = progress
 
     def _on_input_upload(self, file_path: Path):
         self.input_file = file_path
@@ -45,6 +60,7 @@ class KmExcelTool:
 
         self.process_button.disable()
         self.spinner.classes(remove="hidden")
+        self.progress_timer.activate()
 
         try:
             temp_output = (
@@ -53,10 +69,14 @@ class KmExcelTool:
             if temp_output.exists():
                 temp_output.unlink()
 
-            processor = KmExcelProcessor(get_km_service(), use_simple=self.simple_checkbox.value)
+            processor = KmExcelProcessor(
+                get_km_service(),
+                use_simple=self.simple_checkbox.value,
+                streaming=self.streaming_checkbox.value,
+            )
 
             await asyncio.to_thread(
-                processor.process, self.input_file, temp_output
+                processor.process, self.input_file, temp_output, self._on_progress
             )
 
             ui.download(temp_output, filename=temp_output.name)
@@ -69,3 +89,6 @@ class KmExcelTool:
         finally:
             self.process_button.enable()
             self.spinner.classes(add="hidden")
+            self.progress_timer.deactivate()
+            self.progress = None
+            self.progress_display.show(None)
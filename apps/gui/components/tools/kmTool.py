@@ -9,6 +9,7 @@ from nicegui.element import Element
 from shapely.geometry import Point
 from pyproj import Transformer
 
+from imxTools.utils.km_resolver import KmResolver
 from imxTools.utils.km_service_manager import get_km_service
 
 # RD Amersfoort <-> WGS84 transformers
@@ -137,6 +138,8 @@ class KmTool:
         self.rd_point = Point(233592, 581094)
         self.result = None
         self.response_cards = []
+        # debounces and coalesces the lookups of this client off the event loop
+        self.km_resolver = KmResolver(get_km_service)
 
         with container:
             with ui.row().classes("w-full flex flex-nowrap"):
@@ -195,7 +198,7 @@ class KmTool:
         self.sync_all_fields(run_lookup=False)
 
     async def resolve_km_from_point(self, point: Point):
-        return get_km_service().get_km(point.x, point.y)
+        return await self.km_resolver.resolve_point(point.x, point.y)
 
     def parse_decimal(self, value: str) -> float:
         return float(value.strip().replace(",", "."))
@@ -278,19 +281,28 @@ class KmTool:
         if self.is_syncing:
             return
         try:
-            match = re.search(
+            matches = re.findall(
                 r"<gml:coordinates>(.*?)</gml:coordinates>", self.gml_input_rd.value
             )
-            if match:
-                coords = match.group(1).strip().split(",")
+            points = []
+            for match in matches:
+                coords = match.strip().split(",")
                 x = self.parse_decimal(coords[0])
                 y = self.parse_decimal(coords[1])
                 if self.use_wgs:
                     rd_x, rd_y = wgs2rd.transform(x, y)
                 else:
                     rd_x, rd_y = x, y
-                self.rd_point = Point(rd_x, rd_y)
+                points.append(Point(rd_x, rd_y))
+
+            if len(points) == 1:
+                self.rd_point = points[0]
                 self.sync_all_fields()
+            elif points:
+                # pasted several GML points, resolve them in one batch
+                self.rd_point = points[0]
+                self.sync_all_fields(run_lookup=False)
+                asyncio.create_task(self.run_km_lookup(points))
         except Exception as e:
             print(f"Error parsing GML input: {e}")
 
@@ -330,40 +342,51 @@ class KmTool:
         self.input_map_card.update_marker(lat, lon)
         self.sync_all_fields(run_lookup=False)
 
-    async def run_km_lookup(self):
+    async def run_km_lookup(self, points: list[Point] | None = None):
+        points = points or [self.rd_point]
         try:
-            self.result = await self.resolve_km_from_point(self.rd_point)
-            geojson = json.loads(self.result.geojson_string())
-            input_xy = self.format_point_xystring(self.rd_point)
+            results = await self.km_resolver.resolve([(p.x, p.y) for p in points])
+            if results is None:
+                # replaced by a newer lookup
+                return
+
+            for idx, (point, result) in enumerate(zip(points, results)):
+                self.add_response_card(point, result, update_input=idx == 0)
+
+        except Exception as e:
+            ui.notify(f"Error: {e}", type="negative")
+
+    def add_response_card(self, point: Point, result, update_input: bool = True):
+        geojson = json.loads(result.geojson_string())
+        input_xy = self.format_point_xystring(point)
 
+        if update_input:
+            self.result = result
             self.input_map_card.add_geojson(geojson)
 
             # ✅ Update live KM display
-            if self.result and self.result.km_measures:
-                self.km_label.text = f"KM: {self.result.km_measures[0].display}"
+            if result and result.km_measures:
+                self.km_label.text = f"KM: {result.km_measures[0].display}"
             else:
                 self.km_label.text = "KM: -"
 
-            def on_download():
-                asyncio.create_task(self.download_geojson())
-
-            card = KmResponseCard(
-                index=len(self.response_cards) + 1,
-                km_measures=self.result.km_measures,
-                geojson=geojson,
-                input_xy=input_xy,
-                on_download=on_download,
-                on_close=None,
-                on_go_to=None,
-            )
+        def on_download():
+            asyncio.create_task(self.download_geojson())
 
-            card.on_close = partial(self.close_card, card)
-            card.on_go_to = partial(self.go_to_result_point, self.rd_point)
+        card = KmResponseCard(
+            index=len(self.response_cards) + 1,
+            km_measures=result.km_measures,
+            geojson=geojson,
+            input_xy=input_xy,
+            on_download=on_download,
+            on_close=None,
+            on_go_to=None,
+        )
 
-            self.response_cards.append(card)
+        card.on_close = partial(self.close_card, card)
+        card.on_go_to = partial(self.go_to_result_point, point)
 
-            with self.result_area:
-                card.build()
+        self.response_cards.append(card)
 
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        with self.result_area:
+            card.build()
@@ -1,14 +1,12 @@
-import asyncio
-import tempfile
+import os
 from pathlib import Path
 from nicegui import ui
 from nicegui.element import Element
 
+from apps.gui.components.widgets.jobStatus import JobStatus
 from apps.gui.components.widgets.uploadImxFile import ImxUpload
-from src.imxTools.insights.measure_analyse import generate_measure_excel
-from src.imxTools.utils.helpers import load_imxinsights_container_or_file
-
-from apps.gui.helpers.io import delete_later
+from src.imxTools.cli import run_measure_check
+from src.imxTools.utils.job_queue import estimate_memory, get_job_queue
 
 
 class MeasureTool:
@@ -20,11 +18,15 @@ class MeasureTool:
             self.threshold_input = ui.number(label="Threshold", value=0.015).classes(
                 "w-64"
             )
+            self.workers_input = ui.number(
+                label="Worker processes", value=1, min=1, max=os.cpu_count(), step=1
+            ).classes("w-64").tooltip("Rail connections are analysed in parallel")
 
             self.status_label = ui.label().classes("text-sm italic")
             ui.button("Run Measure Check", on_click=self.run_measure_check).classes(
                 "btn-primary"
             )
+            self.job_status = JobStatus()
 
         self.file_path = None
         self.situation = None
@@ -41,31 +43,23 @@ class MeasureTool:
             ui.notify("Please upload an IMX file first", type="warning")
             return
 
-        try:
-            self.status_label.text = "Running measure check..."
-            threshold = self.threshold_input.value
-
-            imx = await asyncio.to_thread(
-                load_imxinsights_container_or_file, self.file_path, self.situation
-            )
-
-            temp_file = (
-                Path(tempfile.gettempdir())
-                / f"measure_output_{self.file_path.stem}.xlsx"
-            )
-            if temp_file.exists():
-                temp_file.unlink()
-
-            await asyncio.to_thread(
-                generate_measure_excel, imx, temp_file, threshold if threshold else None
-            )
-
-            ui.download(temp_file, filename=temp_file.name)
+        self.status_label.text = "Running measure check..."
+        threshold = self.threshold_input.value
+        output_file = f"measure_output_{self.file_path.stem}.xlsx"
+        job = get_job_queue().submit(
+            "measure check",
+            run_measure_check,
+            output_file,
+            estimate_memory(self.file_path),
+            output_file=output_file,
+            imx=self.file_path,
+            situation=self.situation,
+            threshold=threshold if threshold else None,
+            workers=int(self.workers_input.value or 1),
+        )
+        if await self.job_status.run(job):
+            ui.download(job.result, filename=job.download_name)
             ui.notify("Measure check complete!", type="positive")
             self.status_label.text = "✅ Excel report ready to download."
-
-            asyncio.create_task(delete_later(temp_file))
-
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        else:
             self.status_label.text = "❌ Failed"
@@ -1,17 +1,12 @@
-import asyncio
-import tempfile
-import zipfile
-from pathlib import Path
-
 from nicegui import ui
 from nicegui.element import Element
 
+from apps.gui.components.widgets.jobStatus import JobStatus
 from apps.gui.components.widgets.uploadFile import UploadFile
 from apps.gui.components.widgets.uploadImxFile import ImxUpload
-from src.imxTools.insights.diff_and_population import write_population_output_files
+from src.imxTools.cli import run_population
 from src.imxTools.utils.helpers import create_timestamp
-
-from apps.gui.helpers.io import delete_later
+from src.imxTools.utils.job_queue import estimate_memory, get_job_queue
 
 
 class PopulationTool:
@@ -52,6 +47,7 @@ class PopulationTool:
             ui.button("Run Population Report", on_click=self.run_population).classes(
                 "mt-4 btn-primary"
             )
+            self.job_status = JobStatus()
 
     @staticmethod
     def _on_imx_upload_change(file_path, situation):
@@ -73,37 +69,21 @@ class PopulationTool:
             ui.notify("Please upload an IMX file", type="negative")
             return
 
-        try:
-            geojson = self.geojson_toggle.value
-            to_wgs = self.wgs84_toggle.value
-            self.status_label.text = "Generating population report..."
-
-            with tempfile.TemporaryDirectory() as temp_dir:
-                output_path = Path(temp_dir) / "output"
-                output_path.mkdir(parents=True, exist_ok=True)
-
-                await asyncio.to_thread(
-                    write_population_output_files,
-                    imx_path,
-                    output_path,
-                    imx_situation,
-                    geojson,
-                    to_wgs,
-                    spec_file,  # ✅ now passed as optional
-                )
-
-                zip_name = f"population_{create_timestamp()}.zip"
-                zip_path = Path(tempfile.gettempdir()) / zip_name
-                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                    for file in output_path.rglob("*"):
-                        zipf.write(file, file.relative_to(output_path))
-
-                ui.download(zip_path, filename=zip_name)
-                ui.notify("Population report ready!", type="positive")
-                self.status_label.text = "✅ Report zipped and ready to download!"
-
-                asyncio.create_task(delete_later(zip_path))
-
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        self.status_label.text = "Generating population report..."
+        job = get_job_queue().submit(
+            "population",
+            run_population,
+            f"population_{create_timestamp()}.zip",
+            estimate_memory(imx_path),
+            imx=imx_path,
+            situation=imx_situation,
+            geojson=self.geojson_toggle.value,
+            wgs=self.wgs84_toggle.value,
+            spec=spec_file,  # ✅ now passed as optional
+        )
+        if await self.job_status.run(job):
+            ui.download(job.result, filename=job.download_name)
+            ui.notify("Population report ready!", type="positive")
+            self.status_label.text = "✅ Report zipped and ready to download!"
+        else:
             self.status_label.text = "❌ Failed"
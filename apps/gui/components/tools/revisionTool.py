@@ -1,12 +1,12 @@
 import asyncio
-import shutil
 import tempfile
 from pathlib import Path
 
+from apps.gui.components.widgets.jobStatus import JobStatus
 from apps.gui.components.widgets.metadataSettingsUi import MetadataSettingsUI
-from src.imxTools.revision.input_validation import validate_process_input
-from src.imxTools.revision.process_revision import process_imx_revisions
+from src.imxTools.cli import run_revise
 from src.imxTools.revision.revision_template import get_revision_template
+from src.imxTools.utils.job_queue import estimate_memory, get_job_queue
 from nicegui import ui
 from nicegui.element import Element
 
@@ -41,6 +41,7 @@ class RevisionTool:
                 ui.button("Apply Revisions", on_click=self.apply_revisions).classes(
                     "btn-primary mt-2"
                 )
+                self.job_status = JobStatus()
 
         self.imx_file = None
         self.excel_file = None
@@ -71,38 +72,27 @@ class RevisionTool:
             ui.notify("Please upload both IMX and Excel files", type="warning")
             return
 
-        try:
-            settings = self.metadata_ui.get_metadata_settings()
-
-            self.status_label.text = "Running revision process..."
-            with tempfile.TemporaryDirectory() as temp_dir:
-                out_path = Path(temp_dir)
-                await asyncio.to_thread(
-                    validate_process_input, self.imx_file, self.excel_file, out_path
-                )
-                await asyncio.to_thread(
-                    process_imx_revisions,
-                    self.imx_file,
-                    self.excel_file,
-                    out_path,
-                    settings.set_metadata,
-                    settings.add_metadata,
-                    settings.source,
-                    settings.origin,
-                    settings.set_parents,
-                    settings.registration_time,
-                    True,
-                )
-
-                zip_path = out_path.with_suffix(".zip")
-                shutil.make_archive(zip_path.with_suffix(""), "zip", out_path)
-
-                ui.download(zip_path, filename="revised_imx_package.zip")
-                ui.notify("Revisions applied successfully!", type="positive")
-                self.status_label.text = "✅ Modified IMX and report ready."
-
-                asyncio.create_task(delete_later(zip_path))
-
-        except Exception as e:
-            ui.notify(f"Error: {e}", type="negative")
+        settings = self.metadata_ui.get_metadata_settings()
+
+        self.status_label.text = "Running revision process..."
+        # the worker validates the input, errors show up as a failed job
+        job = get_job_queue().submit(
+            "revisions",
+            run_revise,
+            "revised_imx_package.zip",
+            estimate_memory(self.imx_file),
+            imx=self.imx_file,
+            excel=self.excel_file,
+            replace_metadata=settings.set_metadata,
+            add_metadata=settings.add_metadata,
+            metadata_source=settings.source,
+            metadata_origin=settings.origin,
+            metadata_parents=settings.set_parents,
+            registration_time=settings.registration_time,
+        )
+        if await self.job_status.run(job):
+            ui.download(job.result, filename=job.download_name)
+            ui.notify("Revisions applied successfully!", type="positive")
+            self.status_label.text = "✅ Modified IMX and report ready."
+        else:
             self.status_label.text = "❌ Failed"
@@ -0,0 +1,67 @@
+from nicegui import ui
+
+from apps.gui.components.widgets.progressDisplay import ProgressDisplay
+from src.imxTools.utils.job_queue import BackgroundJob, JobState, get_job_queue
+
+
+class JobStatus:
+    """Stage, progress and cancel button of the background job a tool submitted."""
+
+    def __init__(self):
+        with ui.column().classes("w-full gap-1") as self.row:
+            with ui.row().classes("items-center gap-4 w-full"):
+                self.spinner = ui.spinner(size="md")
+                self.message = ui.label().classes("text-sm italic")
+                self.cancel_button = ui.button(
+                    "Cancel", icon="close", on_click=self._cancel
+                ).props("flat")
+            self.progress = ProgressDisplay()
+        self.row.set_visibility(False)
+        self.job: BackgroundJob | None = None
+        self.timer = ui.timer(0.5, self._refresh, active=False)
+
+    async def run(self, job: BackgroundJob) -> bool:
+        """Follows the job until it finishes, returns True when its result is ready."""
+        self.job = job
+        self.row.set_visibility(True)
+        self.timer.activate()
+        self._refresh()
+        try:
+            await get_job_queue().wait(job)
+        finally:
+            self.timer.deactivate()
+            self._refresh()
+
+        if job.state is JobState.failed:
+            ui.notify(f"Error: {job.error}", type="negative")
+        elif job.state is JobState.cancelled:
+            ui.notify("Job cancelled", type="warning")
+        return job.state is JobState.done
+
+    def _cancel(self):
+        if self.job:
+            get_job_queue().cancel(self.job.id)
+
+    def _refresh(self):
+        job = self.job
+        if job is None:
+            return
+        running = not job.state.finished
+        self.spinner.set_visibility(running)
+        self.cancel_button.set_visibility(running)
+        self.progress.show(job.progress if job.state is JobState.running else None)
+
+        if job.state is JobState.queued:
+            waiting = get_job_queue().position(job)
+            self.message.text = f"⏳ Queued, {waiting or 0} job(s) before this one"
+        elif job.state is JobState.running:
+            stage = f": {job.stage}" if job.stage else ""
+            self.message.text = f"⚙️ Running{stage} ({job.seconds:.0f}s)"
+        elif job.state is JobState.done:
+            self.message.text = (
+                f"✅ Done in {job.seconds:.0f}s, download it again from Jobs"
+            )
+        elif job.state is JobState.failed:
+            self.message.text = "❌ Failed"
+        else:
+            self.message.text = "Cancelled"
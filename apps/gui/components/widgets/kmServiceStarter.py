@@ -0,0 +1,47 @@
+from nicegui import ui
+
+from imxTools.utils.km_service_manager import (
+    get_km_service_status,
+    start_km_service_in_background,
+)
+
+
+class KmServiceStarter:
+    """Start button and progress of the KM service, reloads the page once it is ready."""
+
+    def __init__(self):
+        self.status = get_km_service_status()
+
+        ui.label("❌ KM Service is not running. Please start the service.")
+        with ui.row().classes("items-center gap-4 w-full"):
+            self.start_button = ui.button("Start KM service", on_click=self._start)
+            self.progress = (
+                ui.linear_progress(value=0, show_value=False)
+                .props("color=primary")
+                .classes("w-64")
+            )
+            self.message = ui.label()
+
+        self.timer = ui.timer(0.5, self._refresh)
+        self._refresh()
+
+    def _start(self):
+        start_km_service_in_background()
+        self._refresh()
+
+    def _refresh(self):
+        # the build step of unknown length shows an indeterminate bar
+        if self.status.progress is None:
+            self.progress.props("indeterminate")
+        else:
+            self.progress.props(remove="indeterminate")
+            self.progress.value = self.status.progress
+        self.progress.set_visibility(self.status.is_starting)
+        self.message.text = self.status.message
+        self.start_button.set_enabled(not self.status.is_starting)
+
+        if self.status.state == "ready":
+            self.timer.cancel()
+            ui.navigate.reload()
+        elif self.status.state == "failed":
+            self.start_button.text = "Retry KM service"
@@ -0,0 +1,29 @@
+from nicegui import ui
+
+
+class ProgressDisplay:
+    """Bar and text of the latest progress a long running function reported."""
+
+    def __init__(self):
+        with ui.column().classes("w-full gap-1") as self.column:
+            self.bar = (
+                ui.linear_progress(value=0, show_value=False)
+                .props("color=primary")
+                .classes("w-96")
+            )
+            self.label = ui.label().classes("text-xs")
+        self.column.set_visibility(False)
+
+    def show(self, progress) -> None:
+        """Shows a `Progress`, None hides the display."""
+        self.column.set_visibility(progress is not None)
+        if progress is None:
+            return
+        fraction = progress.fraction
+        # a stage of unknown size shows an indeterminate bar
+        if fraction is None:
+            self.bar.props("indeterminate")
+        else:
+            self.bar.props(remove="indeterminate")
+            self.bar.value = fraction
+        self.label.text = str(progress)
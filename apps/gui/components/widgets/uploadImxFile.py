@@ -1,3 +1,5 @@
+import asyncio
+
 from nicegui import ui
 from imxInsights.file.singleFileImx.imxSituationEnum import ImxSituationEnum
 
@@ -48,7 +50,7 @@ class ImxUpload(UploadFile):
             self.situation_dropdown.disable()
             self.situation = None
         elif suffix == ".xml":
-            situations = get_situations(self.file_path)
+            situations = await asyncio.to_thread(get_situations, self.file_path)
             if situations:
                 self.situation_dropdown.options = [s.name for s in situations]
                 self.situation_dropdown.enable()
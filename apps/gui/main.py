@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from nicegui import ui, native, app
 
@@ -6,12 +7,30 @@ from apps.gui.components.widgets.version_check_dialog import version_stage_warni
 from apps.gui.pages.add_km_excel_page import AddKmExcelPage
 from apps.gui.pages.comment_page import CommentPage
 from apps.gui.pages.diff_page import DiffPage
+from apps.gui.pages.jobs_page import JobsPage
 from apps.gui.pages.km_page import KmPage
 from apps.gui.pages.measure_correction_flow_page import MeasureCorrectionFlowPage
 from apps.gui.pages.measure_page import MeasurePage
 from apps.gui.pages.population_page import PopulationPage
 from apps.gui.pages.revision_page import RevisionPage
 from src.imxTools import __version__ as build_version
+from imxTools.utils.km_service_manager import start_km_service_in_background
+from imxTools.utils.km_snapshot import km_snapshot_available
+from src.imxTools.utils.job_queue import get_job_queue
+
+
+def warm_up_km_service():
+    # with a snapshot from an earlier run the KM tools are ready within a second
+    if km_snapshot_available():
+        start_km_service_in_background()
+
+
+def stop_jobs():
+    get_job_queue().shutdown()
+
+
+app.on_startup(warm_up_km_service)
+app.on_shutdown(stop_jobs)
 
 
 @ui.page("/")
@@ -76,7 +95,15 @@ async def measure_correction_flow_page():
     MeasureCorrectionFlowPage()
 
 
+@ui.page("/jobs")
+async def jobs_page():
+    await create_layout()
+    JobsPage()
+
+
 if __name__ == "__main__":
+    # Needed for the job and measure analysis worker processes in the frozen app
+    multiprocessing.freeze_support()
     is_frozen = getattr(sys, "frozen", False)
     chosen_port = 8003 if is_frozen else native.find_open_port()
     ui.run(
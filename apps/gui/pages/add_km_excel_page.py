@@ -1,9 +1,10 @@
 from nicegui import ui
 from nicegui.element import Element
 
-from imxTools.utils.km_service_manager import is_km_service_running, start_km_service
+from imxTools.utils.km_service_manager import is_km_service_running
 
 from apps.gui.components.layouts.toolPanelWithHelp import ToolPanelWithHelp
+from apps.gui.components.widgets.kmServiceStarter import KmServiceStarter
 from apps.gui.components.tools.kmExcelTool import KmExcelTool
 from apps.gui.helpers.io import load_markdown
 
@@ -22,15 +23,4 @@ class AddKmExcelPage:
                 content_builder=build_content,
             )
         else:
-            ui.label("❌ KM Service is not running. Please start the service.")
-            with ui.row().classes("items-center gap-4"):
-                start_button = ui.button("Start KM service")
-                spinner = ui.spinner(size="lg").props("color=primary").classes("hidden")
-
-            async def handle_start():
-                start_button.disable()
-                spinner.classes(remove="hidden")
-
-                await start_km_service()
-
-            start_button.on("click", handle_start)
+            KmServiceStarter()
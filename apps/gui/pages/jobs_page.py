@@ -0,0 +1,19 @@
+from nicegui.element import Element
+
+from apps.gui.components.tools.jobsTool import JobsTool
+from apps.gui.components.layouts.toolPanelWithHelp import ToolPanelWithHelp
+from apps.gui.helpers.io import load_markdown
+
+
+class JobsPage:
+    def __init__(self):
+        help_text = load_markdown("../data/help_markdowns/jobs_help.md")
+
+        def build_content(container: Element):
+            JobsTool(container)
+
+        ToolPanelWithHelp(
+            title="Jobs",
+            help_text=help_text,
+            content_builder=build_content,
+        )
@@ -11,7 +11,8 @@ class MeasurePage:
 
         1. **Upload an IMX file** to check for measure consistency.
         2. **Adjust the threshold** if needed (default is 0.015).
-        3. Click **Run Measure Check** to generate the Excel report.
+        3. **Set the worker processes** to analyse rail connections in parallel (1 is serial).
+        4. Click **Run Measure Check** to generate the Excel report.
 
         Tip: This tool analyzes measure progression in topological order.
         """
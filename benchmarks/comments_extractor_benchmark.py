@@ -0,0 +1,110 @@
+"""
+Times comment extraction on a synthetic diff workbook with header comments,
+review colored cells and direct cell comments.
+
+    python -m benchmarks.comments_extractor_benchmark --rows 20000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from imxInsights.utils.report_helpers import REVIEW_STYLES
+from openpyxl import Workbook, load_workbook
+from openpyxl.comments import Comment
+from openpyxl.styles import PatternFill
+
+from src.imxTools.comments.comments_extractor import (
+    extract_comments_to_new_sheet,
+    extract_sheet_comments,
+)
+
+HEADERS = ["path", "@puic", "status", "geometry_status"]
+
+
+def make_workbook(
+    path: Path,
+    rows: int,
+    columns: int = 20,
+    header_comments: int = 4,
+    colored_ratio: float = 0.05,
+    comment_ratio: float = 0.002,
+    seed: int = 0,
+) -> Path:
+    rng = random.Random(seed)
+    colors = list(REVIEW_STYLES.values())
+    fills = {color: PatternFill("solid", start_color=color) for color in colors}
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "diff"
+
+    headers = HEADERS + [f"@attribute{i}" for i in range(columns - len(HEADERS))]
+    ws.append(headers)
+    for col in rng.sample(range(len(HEADERS) + 1, columns + 1), header_comments):
+        cell = ws.cell(row=1, column=col)
+        cell.comment = Comment(f"header remark {col}", "benchmark")
+        cell.fill = fills[rng.choice(colors)]
+
+    for row_idx in range(2, rows + 2):
+        ws.append(
+            [f"Situation.Signal.{row_idx}", f"puic-{row_idx}", "changed", "unchanged"]
+            + [f"value {row_idx}.{col}" for col in range(len(HEADERS), columns)]
+        )
+        for col in range(len(HEADERS) + 1, columns + 1):
+            draw = rng.random()
+            if draw < comment_ratio:
+                ws.cell(row_idx, col).comment = Comment("cell remark", "benchmark")
+            elif draw < comment_ratio + colored_ratio:
+                ws.cell(row_idx, col).fill = fills[rng.choice(colors)]
+
+    wb.save(path)
+    return path
+
+
+def run(rows: int, columns: int, seed: int = 0) -> dict:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        workbook = make_workbook(Path(temp_dir) / "diff.xlsx", rows, columns, seed=seed)
+
+        start = time.perf_counter()
+        wb = load_workbook(workbook, data_only=True)
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        comments = extract_sheet_comments(wb["diff"], "diff")
+        extract_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        extract_comments_to_new_sheet(workbook, str(Path(temp_dir) / "comments.xlsx"))
+        total_s = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "columns": columns,
+        "comments": len(comments),
+        "load_s": load_s,
+        "extract_s": extract_s,
+        "end_to_end_s": total_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--columns", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'comments':>9} {'load':>8} {'extract':>8} {'total':>8}")
+    for rows in args.rows:
+        result = run(rows, args.columns)
+        print(
+            f"{result['rows']:>8} {result['comments']:>9} "
+            f"{result['load_s']:>8.3f} {result['extract_s']:>8.3f} "
+            f"{result['end_to_end_s']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
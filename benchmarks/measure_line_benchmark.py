@@ -0,0 +1,81 @@
+"""
+Times MeasureLine projections with and without the segment index for a range of
+rail connection vertex counts.
+
+    python -m benchmarks.measure_line_benchmark
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.imxTools.utils.measure_line import MeasureLine
+
+
+def _random_walk_line(vertex_count: int, rng: np.random.Generator) -> np.ndarray:
+    xy = np.cumsum(rng.normal(scale=10.0, size=(vertex_count, 2)), axis=0)
+    z = rng.normal(scale=0.5, size=(vertex_count, 1))
+    return np.hstack((xy, z))
+
+
+def _random_points(line: np.ndarray, count: int, rng: np.random.Generator):
+    vertices = line[rng.integers(0, len(line), size=count), :2]
+    return vertices + rng.normal(scale=5.0, size=(count, 2))
+
+
+def _time_it(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(
+    vertex_counts: list[int], point_count: int, repeat: int, seed: int = 0
+) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    results = []
+    for vertex_count in vertex_counts:
+        line = _random_walk_line(vertex_count, rng)
+        points = _random_points(line, point_count, rng)
+
+        for use_index in (False, True):
+            measure_line = MeasureLine(line, use_spatial_index=use_index)
+            results.append(
+                {
+                    "vertices": vertex_count,
+                    "spatial_index": use_index,
+                    "project_many_s": _time_it(
+                        lambda: measure_line.project_many(points), repeat
+                    ),
+                    "project_s": _time_it(
+                        lambda: [measure_line.project(p) for p in points[:100]],
+                        repeat,
+                    ),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--vertices", type=int, nargs="+", default=[100, 1_000, 5_000, 20_000]
+    )
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'vertices':>9} {'index':>6} {'project_many':>13} {'100x project':>13}")
+    for row in run(args.vertices, args.points, args.repeat):
+        print(
+            f"{row['vertices']:>9} {str(row['spatial_index']):>6} "
+            f"{row['project_many_s']:>12.4f}s {row['project_s']:>12.4f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Times the main imxTools pipelines on synthetic inputs and records a baseline.
+
+Every stage runs in a fresh spawned process, so its peak RSS is its own and not the
+high water mark of the stages before it. Inputs are generated once up front; each
+stage loads what it needs before the clock starts, only the pipeline call is timed.
+
+    python -m benchmarks.pipelines_benchmark --objects 5000 --baseline baseline.json
+    python -m benchmarks.pipelines_benchmark --objects 5000 --compare baseline.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+from lxml import etree
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.comments_extractor_benchmark import make_workbook
+from benchmarks.synthetic_imx import IMX_VERSIONS, write_imx
+from src.imxTools.revision.revision_enums import RevisionColumns
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+BASELINE_FORMAT = 1
+GML_COLUMN = "Location.GeographicLocation.gml:Point.gml:coordinates"
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+class _StubKmService:
+    """Answers km lookups from the coordinates, like kmService without its data."""
+
+    def get_km(self, x: float, y: float):
+        lint = SimpleNamespace(name=f"L{int(y) % 7}")
+        measure = SimpleNamespace(
+            hm=round(x / 1000, 1),
+            distance=round(y % 100, 0),
+            km_lint=lint,
+            display=f"{x / 1000:.1f} +{y % 100:.0f} {lint.name}",
+        )
+        return SimpleNamespace(km_measures=[measure])
+
+
+def _load_imx(imx_path: Path):
+    from imxInsights import ImxContainer, ImxSingleFile
+
+    if imx_path.parent.name == "container":
+        return ImxContainer(imx_path.parent)
+    return ImxSingleFile(imx_path).situation
+
+
+def _read_lines_and_points(imx_path: Path) -> list[tuple[list, list]]:
+    """Returns the track geometry of every rail connection with its signal points."""
+    ns = {"imx": "http://www.prorail.nl/IMSpoor", "gml": "http://www.opengis.net/gml"}
+    tree = etree.parse(str(imx_path))
+
+    def coordinates(element) -> list[list[float]]:
+        text = element.findtext(".//gml:coordinates", namespaces=ns)
+        return [[float(v) for v in vertex.split(",")] for vertex in text.split()]
+
+    tracks = {e.get("puic"): coordinates(e) for e in tree.iterfind(".//imx:Track", ns)}
+    lines = {
+        e.get("puic"): (tracks[e.get("trackRef")], [])
+        for e in tree.iterfind(".//imx:RailConnection", ns)
+    }
+    for signal in tree.iterfind(".//imx:Signal", ns):
+        info = signal.find("imx:RailConnectionInfo", ns)
+        lines[info.get("railConnectionRef")][1].append(coordinates(signal)[0])
+    return list(lines.values())
+
+
+def _stage_parse(inputs: dict) -> Callable:
+    return lambda: _load_imx(inputs["imx"])
+
+
+def _stage_measure_analyse(inputs: dict) -> Callable:
+    from src.imxTools.insights.measure_analyse import generate_analyse_df
+
+    imx = _load_imx(inputs["imx"])
+    return lambda: generate_analyse_df(imx)
+
+
+def _stage_measure_line(inputs: dict) -> Callable:
+    from src.imxTools.utils.measure_line import MeasureLine
+
+    lines = _read_lines_and_points(inputs["imx"])
+
+    def project():
+        for line, points in lines:
+            measure_line = MeasureLine(line)
+            for point in points:
+                measure_line.project(point)
+
+    return project
+
+
+def _stage_revisions(inputs: dict) -> Callable:
+    from src.imxTools.revision.process_revision import process_imx_revisions
+
+    return lambda: process_imx_revisions(
+        inputs["imx"],
+        inputs["revisions"],
+        inputs["out"] / "revisions",
+        add_metadata=True,
+        verbose=False,
+    )
+
+
+def _stage_extract_comments(inputs: dict) -> Callable:
+    from src.imxTools.comments.comments_extractor import (
+        extract_comments_to_new_sheet,
+    )
+
+    return lambda: extract_comments_to_new_sheet(
+        inputs["diff"], str(inputs["out"] / "issue_list.xlsx")
+    )
+
+
+def _stage_apply_comments(inputs: dict) -> Callable:
+    from src.imxTools.comments.comments_extractor import (
+        extract_comments_to_new_sheet,
+    )
+    from src.imxTools.comments.comments_replacer import (
+        apply_comments_from_issue_list,
+    )
+
+    issue_list = inputs["out"] / "issues.xlsx"
+    extract_comments_to_new_sheet(inputs["diff"], str(issue_list))
+    return lambda: apply_comments_from_issue_list(
+        issue_list, inputs["diff"], inputs["out"] / "commented_diff.xlsx"
+    )
+
+
+def _stage_km_excel(inputs: dict) -> Callable:
+    from src.imxTools.utils.kmExcelProcessor import KmExcelProcessor
+
+    processor = KmExcelProcessor(_StubKmService())
+    return lambda: processor.process(inputs["km"], inputs["out"] / "km.xlsx")
+
+
+STAGES: dict[str, Callable[[dict], Callable]] = {
+    "parse": _stage_parse,
+    "measure_analyse": _stage_measure_analyse,
+    "measure_line": _stage_measure_line,
+    "revisions": _stage_revisions,
+    "extract_comments": _stage_extract_comments,
+    "apply_comments": _stage_apply_comments,
+    "km_excel": _stage_km_excel,
+}
+
+
+def _measure(stage: str, inputs: dict) -> dict:
+    # runs in the child process
+    work = STAGES[stage](inputs)
+    setup_rss_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    work()
+    return {
+        "seconds": time.perf_counter() - start,
+        "setup_rss_mb": setup_rss_mb,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _write_revisions(path: Path, imx) -> Path:
+    df = pd.DataFrame(
+        {
+            RevisionColumns.object_path.name: "Signal",
+            RevisionColumns.object_puic.name: imx.signals,
+            RevisionColumns.attribute_or_element.name: "RailConnectionInfo.@atMeasure",
+            RevisionColumns.operation.name: "UpdateAttribute",
+            RevisionColumns.value_old.name: imx.measures,
+            RevisionColumns.value_new.name: [
+                f"{float(measure) + 0.001:.3f}" for measure in imx.measures
+            ],
+            RevisionColumns.will_be_processed.name: "True",
+        }
+    )
+    for header in RevisionColumns.headers():
+        if header not in df:
+            df[header] = ""
+    df = df[RevisionColumns.headers()].rename(
+        columns=RevisionColumns.header_to_description()
+    )
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name="revisions", index=False)
+    return path
+
+
+def _write_km_workbook(path: Path, rows: int, seed: int) -> Path:
+    rng = random.Random(seed)
+    points = [
+        f"{rng.uniform(10_000, 280_000):.3f},{rng.uniform(300_000, 600_000):.3f}"
+        for _ in range(max(1, rows // 4))
+    ]
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Signal"
+    ws.append(["@puic", GML_COLUMN])
+    for row in range(rows):
+        a, b = rng.choice(points), rng.choice(points)
+        ws.append([f"puic-{row}", f"{a} -> {b}" if rng.random() < 0.3 else a])
+    wb.save(path)
+    return path
+
+
+def _prepare_inputs(
+    folder: Path,
+    imx_version: str,
+    rail_connections: int,
+    objects: int,
+    vertices: int,
+    rows: int,
+    seed: int,
+) -> dict:
+    # imxInsights reads 12.0.0 files as a container folder
+    imx_folder = folder / ("container" if imx_version != "1.2.4" else "single")
+    imx_folder.mkdir()
+    file_name = "SignalingDesign.xml" if imx_version != "1.2.4" else "imx.xml"
+    imx = write_imx(
+        imx_folder / file_name, imx_version, rail_connections, objects, vertices, seed
+    )
+
+    diff = make_workbook(folder / "diff.xlsx", rows, seed=seed)
+    wb = load_workbook(diff)
+    wb.create_sheet("info")
+    wb.save(diff)
+
+    out = folder / "out"
+    out.mkdir()
+    return {
+        "imx": imx.path,
+        "revisions": _write_revisions(folder / "revisions.xlsx", imx),
+        "diff": diff,
+        "km": _write_km_workbook(folder / "km.xlsx", rows, seed),
+        "out": out,
+    }
+
+
+def run(
+    imx_version: str = "1.2.4",
+    rail_connections: int = 10,
+    objects: int = 1000,
+    vertices: int = 100,
+    rows: int = 5000,
+    stages: list[str] | None = None,
+    seed: int = 0,
+) -> dict:
+    """Returns the baseline of the given (default all) stages with its parameters."""
+    parameters = {
+        "imx_version": imx_version,
+        "rail_connections": rail_connections,
+        "objects": objects,
+        "vertices": vertices,
+        "rows": rows,
+        "seed": seed,
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inputs = _prepare_inputs(
+            Path(temp_dir), imx_version, rail_connections, objects, vertices, rows, seed
+        )
+        context = multiprocessing.get_context("spawn")
+        for stage in stages or list(STAGES):
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                results[stage] = executor.submit(_measure, stage, inputs).result()
+
+    return {
+        "format": BASELINE_FORMAT,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "stages": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Returns the stages that got slower or bigger than baseline * (1 + tolerance)."""
+    if baseline["parameters"] != current["parameters"]:
+        raise ValueError(
+            f"Baseline was recorded with {baseline['parameters']}, "
+            f"not {current['parameters']}"
+        )
+
+    regressions = []
+    for stage, result in current["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before is None:
+            continue
+        for key in ("seconds", "peak_rss_mb"):
+            if (
+                before[key]
+                and result[key]
+                and result[key] > before[key] * (1 + tolerance)
+            ):
+                regressions.append(
+                    f"{stage} {key}: {before[key]:.3f} -> {result[key]:.3f}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--imx-version", choices=IMX_VERSIONS, default="1.2.4")
+    parser.add_argument("--rail-connections", type=int, default=10)
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--vertices", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=5000, help="excel rows")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, help="write the results as json")
+    parser.add_argument("--compare", type=Path, help="baseline json to compare to")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative regression"
+    )
+    args = parser.parse_args()
+
+    result = run(
+        args.imx_version,
+        args.rail_connections,
+        args.objects,
+        args.vertices,
+        args.rows,
+        args.stages,
+        args.seed,
+    )
+
+    print(f"{'stage':>17} {'seconds':>9} {'setup RSS':>10} {'peak RSS':>10}")
+    for stage, row in result["stages"].items():
+        rss = [
+            f"{row[key]:>8.0f}MB" if row[key] is not None else f"{'-':>10}"
+            for key in ("setup_rss_mb", "peak_rss_mb")
+        ]
+        print(f"{stage:>17} {row['seconds']:>8.3f}s {rss[0]} {rss[1]}")
+
+    if args.baseline:
+        args.baseline.write_text(json.dumps(result, indent=2))
+        print(f"wrote baseline {args.baseline}")
+
+    if args.compare:
+        regressions = compare(
+            json.loads(args.compare.read_text()), result, args.tolerance
+        )
+        for regression in regressions:
+            print(f"regression {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Writes synthetic IMSpoor 1.2.4 and 12.0.0 files of a configurable size.
+
+Rail connections are random walks laid out next to each other, signals are placed
+near them with a RailConnectionInfo whose atMeasure is off by a small random error,
+so the measure analysis has work to do. The files validate against the XSDs.
+
+    python -m benchmarks.synthetic_imx out.xml --rail-connections 50 --objects 5000
+"""
+
+import argparse
+import random
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+IMX_VERSIONS = ("1.2.4", "12.0.0")
+
+REFERENCE_DATE = "2025-01-01T00:00:00Z"
+METADATA = (
+    '<Metadata originType="Unknown" source="benchmark" lifeCycleStatus="Unknown" '
+    'isInService="True"/>'
+)
+
+
+def _unknown(*attributes: str) -> str:
+    return " ".join(f'{attribute}="Unknown"' for attribute in attributes)
+
+
+# required attributes, all "Unknown" since only the geometry and measures matter
+_COMMON_RAIL_CONNECTION = (
+    "voltageClass",
+    "isElectrified",
+    "hasInterlocking",
+    "isSafetyTrack",
+)
+_COMMON_SIGNAL = (
+    "signalType",
+    "signalPosition",
+    "hasShuntingIndicator",
+    "hasSpreaderLens",
+    "hasDangerSign",
+    "isOutOfService",
+    "hasArrowMarker",
+    "hasDirectionIndicator",
+    "isDimmable",
+    "hasHardwareInput",
+)
+RAIL_CONNECTION_ATTRIBUTES = {
+    "1.2.4": _unknown(*_COMMON_RAIL_CONNECTION, "trainType"),
+    "12.0.0": _unknown(*_COMMON_RAIL_CONNECTION, "transportType"),
+}
+SIGNAL_ATTRIBUTES = {
+    "1.2.4": _unknown(
+        *_COMMON_SIGNAL, "isMountedOnGantry", "hasWhiteLamp", "hasWhitebarETCSIndicator"
+    ),
+    "12.0.0": _unknown(*_COMMON_SIGNAL, "hasWhitebarEtcsIndicator"),
+}
+
+
+@dataclass
+class SyntheticImx:
+    path: Path
+    imx_version: str
+    rail_connections: list[str] = field(default_factory=list)
+    signals: list[str] = field(default_factory=list)
+    # atMeasure of every signal as written to the file
+    measures: list[str] = field(default_factory=list)
+
+
+def _puic(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _rail_connection_line(
+    index: int, vertices: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Random walk heading east, offset per rail connection so lines do not touch."""
+    steps = np.column_stack(
+        (rng.uniform(5, 15, vertices - 1), rng.normal(0, 2, vertices - 1))
+    )
+    xy = np.vstack(([0.0, 0.0], np.cumsum(steps, axis=0)))
+    xy += (150_000.0, 400_000.0 + 100.0 * index)
+    z = np.cumsum(rng.normal(0, 0.05, vertices))
+    return np.column_stack((xy, z))
+
+
+def _coordinates(coords: np.ndarray) -> str:
+    return " ".join(",".join(f"{value:.3f}" for value in vertex) for vertex in coords)
+
+
+def _point_on_line(coords: np.ndarray, measure: float) -> tuple[float, float]:
+    lengths = np.hypot(*np.diff(coords[:, :2], axis=0).T)
+    cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+    segment = min(
+        np.searchsorted(cumulative, measure, side="right") - 1, len(lengths) - 1
+    )
+    ratio = (measure - cumulative[segment]) / lengths[segment]
+    x, y = coords[segment, :2] + ratio * (coords[segment + 1, :2] - coords[segment, :2])
+    return float(x), float(y)
+
+
+def _layout(
+    rail_connections: int, objects: int, vertices: int, seed: int
+) -> tuple[list, list]:
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+
+    lines = []
+    for index in range(rail_connections):
+        coords = _rail_connection_line(index, vertices, np_rng)
+        length = float(np.hypot(*np.diff(coords[:, :2], axis=0).T).sum())
+        lines.append((_puic(rng), coords, length))
+
+    signals = []
+    for index in range(objects):
+        rail_puic, coords, length = lines[index % rail_connections]
+        measure = rng.uniform(0, length)
+        x, y = _point_on_line(coords, measure)
+        # most measures are close to the geometry, a few are clearly off
+        error = rng.gauss(0, 0.002) if rng.random() < 0.9 else rng.uniform(-5, 5)
+        signals.append(
+            (_puic(rng), f"S{index}", rail_puic, x, y + 3, max(0.0, measure + error))
+        )
+    return lines, signals
+
+
+def _write(f, imx_version, lines, signals, rng: random.Random) -> None:
+    """Writes the topology, tracks, rail connections and the signals on them."""
+    if imx_version == "1.2.4":
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<IMSpoor xmlns="http://www.prorail.nl/IMSpoor" '
+            'xmlns:gml="http://www.opengis.net/gml" imxVersion="1.2.4">'
+            f'<Situation referenceDate="{REFERENCE_DATE}">'
+        )
+        closing = "</Situation></IMSpoor>\n"
+    else:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<SignalingDesign xmlns="http://www.prorail.nl/IMSpoor" '
+            'xmlns:gml="http://www.opengis.net/gml" imxVersion="12.0.0" '
+            f'referenceDate="{REFERENCE_DATE}">'
+        )
+        closing = "</SignalingDesign>\n"
+
+    # every rail connection runs between two buffer stops, imxInsights needs the
+    # micro links to them to build the rail connection geometry
+    tracks = [_puic(rng) for _ in lines]
+    ends = [(_puic(rng), _puic(rng)) for _ in lines]
+    ref_attribute = (
+        "railConnectionRef" if imx_version == "1.2.4" else ("implementationObjectRef")
+    )
+    f.write("<RailInfrastructure><RailTopology><MicroNodes>")
+    for junctions in ends:
+        for junction_puic in junctions:
+            f.write(f'<MicroNode junctionRef="{junction_puic}"/>')
+    f.write("</MicroNodes><MicroLinks>")
+    for (puic, _, _), (from_puic, to_puic) in zip(lines, ends):
+        f.write(
+            f'<MicroLink {ref_attribute}="{puic}"><FromMicroNode nodeRef="{from_puic}" '
+            f'portIndex="0"/><ToMicroNode nodeRef="{to_puic}" portIndex="0"/>'
+            f"</MicroLink>"
+        )
+    f.write("</MicroLinks></RailTopology><RailImplementation><Junctions>")
+    for index, ((_, coords, _), junctions) in enumerate(zip(lines, ends)):
+        for end, junction_puic in zip((0, -1), junctions):
+            x, y = coords[end, :2]
+            f.write(
+                f'<BufferStop puic="{junction_puic}" name="B{index}.{end + 1}">'
+                f"{METADATA}<Location><GeographicLocation dataAcquisitionMethod="
+                f'"Unknown"><gml:Point><gml:coordinates>{x:.3f},{y:.3f}'
+                f"</gml:coordinates></gml:Point></GeographicLocation></Location>"
+                f"</BufferStop>"
+            )
+    f.write("</Junctions><Tracks>")
+    for index, ((_, coords, _), track_puic) in enumerate(zip(lines, tracks)):
+        f.write(
+            f'<Track puic="{track_puic}" name="T{index}">{METADATA}<Location>'
+            f'<GeographicLocation dataAcquisitionMethod="Unknown"><gml:LineString>'
+            f"<gml:coordinates>{_coordinates(coords)}</gml:coordinates>"
+            f"</gml:LineString></GeographicLocation></Location></Track>"
+        )
+    f.write("</Tracks><RailConnections>")
+    rail_connection_attributes = RAIL_CONNECTION_ATTRIBUTES[imx_version]
+    for index, ((puic, _, _), track_puic) in enumerate(zip(lines, tracks)):
+        f.write(
+            f'<RailConnection puic="{puic}" name="RC{index}" trackRef="{track_puic}" '
+            f"{rail_connection_attributes}>{METADATA}</RailConnection>"
+        )
+    f.write("</RailConnections></RailImplementation><TrackAssets><Signals>")
+    signal_attributes = SIGNAL_ATTRIBUTES[imx_version]
+    for puic, name, rail_puic, x, y, measure in signals:
+        f.write(
+            f'<Signal puic="{puic}" name="{name}" {signal_attributes}>{METADATA}'
+            f'<Location><GeographicLocation dataAcquisitionMethod="Unknown"><gml:Point>'
+            f"<gml:coordinates>"
+            f"{x:.3f},{y:.3f}</gml:coordinates></gml:Point></GeographicLocation>"
+            f'</Location><RailConnectionInfo railConnectionRef="{rail_puic}" '
+            f'atMeasure="{measure:.3f}" direction="Unknown"/></Signal>'
+        )
+    f.write(f"</Signals></TrackAssets></RailInfrastructure>{closing}")
+
+
+def write_imx(
+    path: Path,
+    imx_version: str = "1.2.4",
+    rail_connections: int = 10,
+    objects: int = 1000,
+    vertices: int = 100,
+    seed: int = 0,
+) -> SyntheticImx:
+    """
+    Writes a single IMX file with `rail_connections` rail connections of `vertices`
+    vertices and `objects` signals spread over them.
+    """
+    if imx_version not in IMX_VERSIONS:
+        raise NotImplementedError(f"IMX version {imx_version} not supported")
+
+    lines, signals = _layout(rail_connections, objects, vertices, seed)
+    path = Path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        _write(f, imx_version, lines, signals, random.Random(seed + 1))
+
+    return SyntheticImx(
+        path,
+        imx_version,
+        rail_connections=[line[0] for line in lines],
+        signals=[signal[0] for signal in signals],
+        measures=[f"{signal[-1]:.3f}" for signal in signals],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--imx-version", choices=IMX_VERSIONS, default="1.2.4")
+    parser.add_argument("--rail-connections", type=int, default=10)
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--vertices", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    imx = write_imx(
+        args.output,
+        args.imx_version,
+        args.rail_connections,
+        args.objects,
+        args.vertices,
+        args.seed,
+    )
+    print(f"wrote {imx.path} ({imx.path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,577 @@
+"""
+Command line interface of imxTools.
+
+Every operation of the GUI is a sub command, `batch` runs the jobs of a json
+manifest on a pool of worker processes. Each worker loads the XSD schemas and the
+KM service once and reuses them for all jobs it runs.
+
+    python -m src.imxTools.cli diff t1.zip t2.zip --out reports
+    python -m src.imxTools.cli population imx.xml --situation InitialSituation
+    python -m src.imxTools.cli --profile revise imx.xml revisions.xlsx --out revised
+    python -m src.imxTools.cli batch manifest.json --workers 4
+
+The package imports itself as `src.imxTools`, so run it from the repo root; there
+is no installed console script.
+
+A manifest holds defaults and jobs; job keys are the option names of the command
+with underscores, relative paths are relative to the manifest:
+
+    {
+      "defaults": {"situation": "InitialSituation", "out": "reports"},
+      "jobs": [
+        {"command": "population", "imx": "a.xml"},
+        {"command": "measure-check", "imx": "b.xml", "threshold": 0.01}
+      ]
+    }
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from imxInsights.file.singleFileImx.imxSituationEnum import ImxSituationEnum
+
+from src.imxTools.utils.custom_logger import logger
+from src.imxTools.utils.profiling import pipeline_span, span
+from src.imxTools.utils.progress import Progress, ProgressCallback, ProgressReporter
+
+
+def _situation(value: str | ImxSituationEnum | None) -> ImxSituationEnum | None:
+    if value is None or isinstance(value, ImxSituationEnum):
+        return value
+    try:
+        return ImxSituationEnum[value]
+    except KeyError:
+        options = ", ".join(situation.name for situation in ImxSituationEnum)
+        raise ValueError(f"Unknown situation {value}, use one of {options}")
+
+
+def _out_dir(out: str | Path | None) -> Path:
+    out = Path(out) if out else Path.cwd()
+    out.mkdir(parents=True, exist_ok=True)
+    return out
+
+
+def run_diff(
+    t1: Path,
+    t2: Path,
+    out: Path | None = None,
+    t1_situation: str | None = None,
+    t2_situation: str | None = None,
+    geojson: bool = False,
+    wgs: bool = False,
+    version_safe: bool = False,
+    spec: Path | None = None,
+    profile: bool = False,
+) -> None:
+    from src.imxTools.insights.diff_and_population import write_diff_output_files
+
+    write_diff_output_files(
+        Path(t1),
+        Path(t2),
+        _out_dir(out),
+        _situation(t1_situation),
+        _situation(t2_situation),
+        geojson,
+        wgs,
+        version_safe,
+        Path(spec) if spec else None,
+        profile=profile,
+    )
+
+
+def run_population(
+    imx: Path,
+    out: Path | None = None,
+    situation: str | None = None,
+    geojson: bool = False,
+    wgs: bool = False,
+    spec: Path | None = None,
+    profile: bool = False,
+) -> None:
+    from src.imxTools.insights.diff_and_population import (
+        write_population_output_files,
+    )
+
+    write_population_output_files(
+        Path(imx),
+        _out_dir(out),
+        _situation(situation),
+        geojson,
+        wgs,
+        Path(spec) if spec else None,
+        profile=profile,
+    )
+
+
+def run_revise(
+    imx: Path,
+    excel: Path,
+    out: Path | None = None,
+    replace_metadata: bool = False,
+    add_metadata: bool = False,
+    metadata_source: str = "DV",
+    metadata_origin: str = "Other",
+    metadata_parents: bool = False,
+    registration_time: str | None = None,
+    streaming: bool = False,
+    lxml_validation: bool = False,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+) -> None:
+    from src.imxTools.revision.process_revision import process_imx_revisions
+
+    process_imx_revisions(
+        imx,
+        excel,
+        _out_dir(out),
+        replace_metadata=replace_metadata,
+        add_metadata=add_metadata,
+        metadata_source=metadata_source,
+        metadata_origin=metadata_origin,
+        metadata_parents=metadata_parents,
+        registration_time=registration_time,
+        verbose=False,
+        streaming=streaming,
+        lxml_validation=lxml_validation,
+        profile=profile,
+        progress=progress,
+    )
+
+
+def run_measure_check(
+    imx: Path,
+    out: Path | None = None,
+    situation: str | None = None,
+    threshold: float = 0.015,
+    workers: int = 1,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+    cache: Path | None = None,
+) -> None:
+    from src.imxTools.insights.measure_analyse import generate_measure_excel
+    from src.imxTools.insights.measure_cache import MeasureProjectionCache
+    from src.imxTools.utils.helpers import load_imxinsights_container_or_file
+
+    out = Path(out) if out else Path.cwd()
+    # out is the output folder or the workbook to write
+    folder = _out_dir(out.parent if out.suffix == ".xlsx" else out)
+    # loading the IMX is part of the run here, unlike in generate_measure_excel
+    with pipeline_span("measure-check", folder, profile):
+        with span("load imx"), ProgressReporter(progress, "load imx"):
+            repo = load_imxinsights_container_or_file(Path(imx), _situation(situation))
+        # with a cache file only the points whose geometry changed are projected
+        projection_cache = MeasureProjectionCache.load(cache) if cache else None
+        generate_measure_excel(
+            repo, out, threshold, workers, progress=progress, cache=projection_cache
+        )
+        if projection_cache is not None:
+            projection_cache.save(cache)
+
+
+def run_extract_comments(
+    diff: Path,
+    out: Path | None = None,
+    add_to_wb: bool = False,
+    overwrite: bool = False,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+) -> None:
+    from src.imxTools.comments.comments_extractor import (
+        extract_comments_to_new_sheet,
+    )
+
+    extract_comments_to_new_sheet(
+        diff,
+        str(out) if out else None,
+        add_to_wb=add_to_wb,
+        overwrite=overwrite,
+        profile=profile,
+        progress=progress,
+    )
+
+
+def run_apply_comments(
+    issue_list: Path,
+    diff: Path,
+    out: Path,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+) -> None:
+    from src.imxTools.comments.comments_replacer import (
+        apply_comments_from_issue_list,
+    )
+
+    apply_comments_from_issue_list(
+        issue_list, diff, out, profile=profile, progress=progress
+    )
+
+
+def run_km(
+    excel: Path,
+    out: Path,
+    detailed: bool = False,
+    streaming: bool = False,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+) -> None:
+    from src.imxTools.utils.kmExcelProcessor import KmExcelProcessor
+    from src.imxTools.utils.km_service_manager import get_km_service
+
+    km_service = get_km_service()
+    if km_service is None:
+        raise RuntimeError("KM service is not available")
+
+    out = Path(out)
+    with pipeline_span("km", out.parent, profile):
+        processor = KmExcelProcessor(
+            km_service, use_simple=not detailed, streaming=streaming
+        )
+        processor.process(Path(excel), out, progress)
+
+
+def run_km_cache(files: list[Path], workers: int = 4, profile: bool = False) -> None:
+    from src.imxTools.utils.km_cache import CachedKmService, read_points
+    from src.imxTools.utils.km_service_manager import get_km_service
+
+    km_service = get_km_service()
+    if not isinstance(km_service, CachedKmService):
+        raise RuntimeError("KM cache is disabled (config.KM_CACHE_PATH is None)")
+
+    with pipeline_span("km-cache", Path.cwd(), profile):
+        points = [point for path in files for point in read_points(Path(path))]
+        km_service.warm_up(points, workers)
+    logger.info(f"{len(km_service.cache)} points cached, {km_service.cache.stats}")
+
+
+class ProgressBar:
+    """Renders the progress of a command on one line of stderr per stage."""
+
+    width = 30
+
+    def __init__(self):
+        self.stream = sys.stderr
+        self._stage: str | None = None
+
+    def __call__(self, progress: Progress) -> None:
+        if self._stage is not None and progress.stage != self._stage:
+            self.stream.write("\n")
+        self._stage = progress.stage
+
+        fraction = progress.fraction
+        if fraction is None:
+            bar = f"{progress.done:>{self.width + 7}}"
+        else:
+            filled = int(self.width * fraction)
+            bar = f"[{'#' * filled}{'-' * (self.width - filled)}] {fraction:>4.0%}"
+        self.stream.write(
+            f"\r{progress.stage[:24]:<24} {bar} {progress.rate:>10,.0f}/s"
+        )
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self._stage is not None:
+            self.stream.write("\n")
+            self._stage = None
+
+
+@dataclass(frozen=True)
+class Command:
+    run: Callable[..., None]
+    add_arguments: Callable[[argparse.ArgumentParser], None]
+    help: str
+    needs_km: bool = False
+    needs_schemas: bool = False
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--out", type=Path, help="output folder, default cwd")
+    parser.add_argument("--geojson", action="store_true", help="also write geojson")
+    parser.add_argument("--wgs", action="store_true", help="geojson in WGS84")
+    parser.add_argument("--spec", type=Path, help="header spec file")
+
+
+def _diff_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("t1", type=Path)
+    parser.add_argument("t2", type=Path)
+    parser.add_argument("--t1-situation")
+    parser.add_argument("--t2-situation")
+    parser.add_argument("--version-safe", action="store_true")
+    _add_output_arguments(parser)
+
+
+def _population_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("imx", type=Path)
+    parser.add_argument("--situation")
+    _add_output_arguments(parser)
+
+
+def _revise_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("imx", type=Path)
+    parser.add_argument("excel", type=Path, help="revision workbook")
+    parser.add_argument("--out", type=Path, help="output folder, default cwd")
+    parser.add_argument("--replace-metadata", action="store_true")
+    parser.add_argument("--add-metadata", action="store_true")
+    parser.add_argument("--metadata-source", default="DV")
+    parser.add_argument("--metadata-origin", default="Other")
+    parser.add_argument("--metadata-parents", action="store_true")
+    parser.add_argument("--registration-time")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--lxml-validation", action="store_true")
+
+
+def _measure_check_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("imx", type=Path)
+    parser.add_argument("--situation")
+    parser.add_argument(
+        "--out", type=Path, help="output folder or .xlsx file, default cwd"
+    )
+    parser.add_argument("--threshold", type=float, default=0.015)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        help="projection cache file, reused and updated by the next check",
+    )
+
+
+def _extract_comments_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("diff", type=Path, help="reviewed diff workbook")
+    parser.add_argument("--out", type=Path, help="issue list workbook")
+    parser.add_argument(
+        "--add-to-wb", action="store_true", help="add the issue list as a new sheet"
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="replace an existing sheet"
+    )
+
+
+def _apply_comments_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("issue_list", type=Path)
+    parser.add_argument("diff", type=Path, help="new diff workbook")
+    parser.add_argument("out", type=Path, help="commented diff workbook")
+
+
+def _km_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("excel", type=Path)
+    parser.add_argument("out", type=Path)
+    parser.add_argument(
+        "--detailed", action="store_true", help="hm, meters and lint columns"
+    )
+    parser.add_argument("--streaming", action="store_true")
+
+
+def _km_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "files",
+        type=Path,
+        nargs="+",
+        help="Excel files with *Point.gml:coordinates columns, or x,y text files",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="parallel lookups")
+
+
+COMMANDS: dict[str, Command] = {
+    "diff": Command(run_diff, _diff_arguments, "diff report of two IMX files"),
+    "population": Command(
+        run_population, _population_arguments, "population report of an IMX file"
+    ),
+    "revise": Command(
+        run_revise,
+        _revise_arguments,
+        "apply a revision workbook to an IMX file",
+        needs_schemas=True,
+    ),
+    "measure-check": Command(
+        run_measure_check, _measure_check_arguments, "measure check workbook"
+    ),
+    "extract-comments": Command(
+        run_extract_comments,
+        _extract_comments_arguments,
+        "issue list from the comments of a reviewed diff",
+    ),
+    "apply-comments": Command(
+        run_apply_comments,
+        _apply_comments_arguments,
+        "copy the comments of an issue list onto a new diff",
+    ),
+    "km": Command(run_km, _km_arguments, "add km values to a workbook", needs_km=True),
+    "km-cache": Command(
+        run_km_cache,
+        _km_cache_arguments,
+        "warm up the KM cache with the points of files",
+        needs_km=True,
+    ),
+}
+
+
+def _load_shared(needs_km: bool, needs_schemas: bool) -> None:
+    """Loads what the jobs share once per process, they find it in the caches."""
+    if needs_schemas:
+        from src.imxTools.revision.xsd_registry import IMX_XSD_PATHS, get_schema
+
+        for version in IMX_XSD_PATHS:
+            get_schema(version)
+
+    if needs_km:
+        from src.imxTools.utils.km_service_manager import (
+            get_km_service_status,
+            start_km_service,
+        )
+
+        asyncio.run(start_km_service())
+        status = get_km_service_status()
+        if status.error:
+            logger.error(status.message)
+
+
+@dataclass
+class Job:
+    command: str
+    kwargs: dict
+
+    @property
+    def label(self) -> str:
+        inputs = [
+            Path(value).name
+            for name, value in self.kwargs.items()
+            if isinstance(value, Path) and name != "out"
+        ]
+        return f"{self.command} {' '.join(inputs[:2])}".strip()
+
+
+def _run_job(job: Job) -> float:
+    start = time.perf_counter()
+    COMMANDS[job.command].run(**job.kwargs)
+    return time.perf_counter() - start
+
+
+def read_manifest(path: Path, profile: bool = False) -> list[Job]:
+    """Returns the jobs of a manifest, checked against the command signatures."""
+    path = Path(path)
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    defaults = manifest.get("defaults", {})
+
+    jobs = []
+    for idx, entry in enumerate(manifest.get("jobs", [])):
+        entry = dict(entry)
+        command_name = entry.pop("command", None)
+        if command_name not in COMMANDS:
+            raise ValueError(f"job {idx}: unknown command {command_name}")
+
+        signature = inspect.signature(COMMANDS[command_name].run)
+        kwargs = {k: v for k, v in defaults.items() if k in signature.parameters}
+        kwargs.setdefault("profile", profile)
+        kwargs.update(entry)
+        try:
+            signature.bind(**kwargs)
+        except TypeError as e:
+            raise ValueError(f"job {idx} ({command_name}): {e}")
+
+        for name, value in kwargs.items():
+            # paths in the manifest are relative to the manifest
+            annotation = str(signature.parameters[name].annotation)
+            if value is not None and "Path" in annotation:
+                if isinstance(value, list):
+                    kwargs[name] = [path.parent / item for item in value]
+                else:
+                    kwargs[name] = path.parent / value
+        jobs.append(Job(command_name, kwargs))
+    return jobs
+
+
+def run_batch(jobs: list[Job], workers: int = 1) -> list[tuple[Job, float | None, str]]:
+    """
+    Runs the jobs on `workers` processes, or in this process with one worker, and
+    returns (job, seconds or None on failure, message) per job in manifest order.
+    """
+    needs_km = any(COMMANDS[job.command].needs_km for job in jobs)
+    needs_schemas = any(COMMANDS[job.command].needs_schemas for job in jobs)
+
+    results = []
+    if workers <= 1:
+        _load_shared(needs_km, needs_schemas)
+        for job in jobs:
+            try:
+                results.append((job, _run_job(job), "ok"))
+            except Exception as e:
+                logger.error(f"{job.label} failed: {e}")
+                results.append((job, None, str(e)))
+        return results
+
+    with ProcessPoolExecutor(
+        workers, initializer=_load_shared, initargs=(needs_km, needs_schemas)
+    ) as executor:
+        futures = [executor.submit(_run_job, job) for job in jobs]
+        for job, future in zip(jobs, futures):
+            try:
+                results.append((job, future.result(), "ok"))
+            except Exception as e:
+                logger.error(f"{job.label} failed: {e}")
+                results.append((job, None, str(e)))
+    return results
+
+
+def _batch_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("manifest", type=Path, help="json manifest of jobs")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.imxTools.cli", description=__doc__.splitlines()[1]
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="write a timing json next to the outputs",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="no progress bar, it is only shown on a terminal anyway",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        command.add_arguments(commands.add_parser(name, help=command.help))
+    _batch_arguments(commands.add_parser("batch", help="run the jobs of a manifest"))
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = vars(build_parser().parse_args(argv))
+    command_name = args.pop("command")
+    show_progress = not args.pop("no_progress") and sys.stderr.isatty()
+
+    if command_name == "batch":
+        jobs = read_manifest(args["manifest"], args["profile"])
+        results = run_batch(jobs, args["workers"])
+        for job, seconds, message in results:
+            state = f"{seconds:8.2f}s" if seconds is not None else "  failed"
+            print(f"{state}  {job.label}  {message if seconds is None else ''}")
+        failed = sum(seconds is None for _, seconds, _ in results)
+        print(f"{len(results) - failed} of {len(results)} jobs done")
+        return 1 if failed else 0
+
+    command = COMMANDS[command_name]
+    _load_shared(command.needs_km, False)
+    if show_progress and "progress" in inspect.signature(command.run).parameters:
+        progress_bar = ProgressBar()
+        try:
+            command.run(**args, progress=progress_bar)
+        finally:
+            progress_bar.close()
+    else:
+        command.run(**args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,6 @@ from pathlib import Path
 from imxInsights.utils.report_helpers import REVIEW_STYLES, add_review_styles_to_excel
 from openpyxl import Workbook, load_workbook
 from openpyxl.cell import Cell, MergedCell
-from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.worksheet import Worksheet
 
 from src.imxTools.comments.comment_entry import CommentEntry
@@ -15,31 +14,34 @@ from src.imxTools.comments.openpyxl_helpers import (
     add_header_and_auto_filter,
     auto_size_columns,
     get_cell_background_color,
-    get_column_indices,
     move_sheet_after,
 )
 from src.imxTools.settings import config
+from src.imxTools.utils.profiling import pipeline_span, span
+from src.imxTools.utils.progress import ProgressCallback, ProgressReporter
 
 
-# todo: better naming: something like get diff context
-def get_cell_context(
-    ws: Worksheet, row_idx: int, columns: dict[str, int]
+CONTEXT_COLUMNS = {
+    CommentColumns.object_puic: "@puic",
+    CommentColumns.object_path: "path",
+    CommentColumns.change_status: "status",
+    CommentColumns.geometry_status: "geometry_status",
+}
+
+
+def get_row_context(
+    row: tuple[Cell | MergedCell, ...], columns: dict[str, int]
 ) -> dict[str, str]:
-    """Extracts contextual information for a row based on column indices."""
+    """Extracts the diff context (puic, path, status) from an already read row."""
 
     def get(col_key: str) -> str:
         col = columns.get(col_key)
-        if col is None:
+        if col is None or col > len(row):
             return ""
-        val = ws.cell(row=row_idx, column=col).value
+        val = row[col - 1].value
         return str(val) if val is not None else ""
 
-    return {
-        CommentColumns.object_puic: get("@puic"),
-        CommentColumns.object_path: get("path"),
-        CommentColumns.change_status: get("status"),
-        CommentColumns.geometry_status: get("geometry_status"),
-    }
+    return {key: get(col_key) for key, col_key in CONTEXT_COLUMNS.items()}
 
 
 def build_comment_entry(
@@ -67,70 +69,99 @@ def build_comment_entry(
     )
 
 
-def handle_header_comment(
-    cell: Cell | MergedCell,
-    ws: Worksheet,
-    header_value: str,
-    columns: dict[str, int],
-    sheet_name: str,
-    header_row: int,
-) -> tuple[list[CommentEntry], list[str]]:
+def collect_header_comments(
+    header: tuple[Cell | MergedCell, ...],
+) -> dict[int, Cell | MergedCell]:
     """
-    Handles comments placed in a header cell.
-    These comments are inherited by cells underneath that share the same color.
+    Collects the header cells whose comment is inherited by the cells underneath
+    that have a fill color, keyed by column index.
     # TODO: if header, its for all except those whit a comment it self.
     """
-    if get_cell_background_color(cell) == "FFFFFF":
-        return [], []  # Skip plain white background cells
+    return {
+        cell.column: cell
+        for cell in header
+        if cell.comment
+        and cell.column is not None
+        and get_cell_background_color(cell) != "FFFFFF"  # Skip plain white cells
+    }
 
-    comments = []
-    inherited_cells = []
 
-    for row_idx in range(header_row + 1, ws.max_row + 1):
-        if cell.column is None:
-            continue
-        target_cell = ws.cell(row=row_idx, column=cell.column)
-        if target_cell.comment or not target_cell.value:
+def extract_sheet_comments(
+    ws: Worksheet,
+    sheet_name: str,
+    header_row: int = 1,
+    reporter: ProgressReporter | None = None,
+) -> list[CommentEntry]:
+    """
+    Extracts the direct, header inherited and colored cell comments of a sheet.
+
+    The header row is read once, after that every row is walked exactly once. The
+    entries are ordered as: direct comments above the header, inherited header
+    comments per header column, then direct and colored cells row by row.
+    """
+    header = next(ws.iter_rows(min_row=header_row, max_row=header_row), ())
+    header_values = {cell.column: str(cell.value or "") for cell in header}
+    columns = {str(cell.value): cell.column for cell in header}
+    header_comments = collect_header_comments(header)
+    review_colors = set(REVIEW_STYLES.values())
+    fill_colors: dict[int, str | None] = {}  # fill id -> background color
+
+    above_header: list[CommentEntry] = []
+    inherited: dict[int, list[CommentEntry]] = {col: [] for col in header_comments}
+    below_header: list[CommentEntry] = []
+
+    for row in ws.iter_rows():
+        if reporter is not None:
+            reporter.advance()
+        if not row or row[0].row == header_row:
             continue
-        color = get_cell_background_color(target_cell)
-        if color and color != "000000":
-            context = get_cell_context(ws, row_idx, columns)
+        row_idx = row[0].row or 0
+        context: dict[str, str] | None = None
+
+        for cell in row:
+            if cell.column is None or (not cell.comment and not cell.value):
+                continue
+            if row_idx < header_row and not cell.comment:
+                continue
+
+            context = context or get_row_context(row, columns)
+            header_value = header_values.get(cell.column, "")
+
             if cell.comment:
                 entry = build_comment_entry(
-                    target_cell,
-                    header_value,
-                    sheet_name,
-                    cell.comment.text,
-                    header_row,
-                    context,
+                    cell, header_value, sheet_name, cell.comment.text, None, context
+                )
+                (above_header if row_idx < header_row else below_header).append(entry)
+                continue
+
+            fill_id = cell._style.fillId
+            if fill_id not in fill_colors:
+                fill_colors[fill_id] = get_cell_background_color(cell)
+            color = fill_colors[fill_id]
+            header_cell = header_comments.get(cell.column)
+            if header_cell is not None and color and color != "000000":
+                inherited[cell.column].append(
+                    build_comment_entry(
+                        cell,
+                        header_value,
+                        sheet_name,
+                        header_cell.comment.text if header_cell.comment else "",
+                        header_row,
+                        context,
+                    )
+                )
+            elif color in review_colors:
+                below_header.append(
+                    build_comment_entry(
+                        cell, header_value, sheet_name, "", None, context
+                    )
                 )
-                comments.append(entry)
-                inherited_cells.append(target_cell.coordinate)
-
-    return comments, inherited_cells
-
 
-def handle_data_comment(
-    cell: Cell | MergedCell,
-    ws: Worksheet,
-    header_value: str,
-    columns: dict[str, int],
-    sheet_name: str,
-) -> list[CommentEntry]:
-    """Processes a direct comment found in a cell (non-header)."""
-    if cell.row:
-        context = get_cell_context(ws, cell.row, columns)
-        return [
-            build_comment_entry(
-                cell,
-                header_value,
-                sheet_name,
-                cell.comment.text if cell.comment else "",
-                None,
-                context,
-            )
-        ]
-    return []
+    return (
+        above_header
+        + [entry for entries in inherited.values() for entry in entries]
+        + below_header
+    )
 
 
 def _build_comment_row(entry: CommentEntry, color_to_status: dict[str, str]) -> list:
@@ -193,14 +224,32 @@ def extract_comments_to_new_sheet(
     header_row: int = 1,
     add_to_wb: bool = False,
     overwrite: bool = False,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
 ) -> None:
     """
     Extracts all comments (direct and inherited) from a workbook and writes them to a new 'comments' sheet.
     Depending on the flags, either adds to the same workbook or a new one.
+    `progress` is called with the rows scanned so far.
     """
     if not output_path and not add_to_wb:
         raise ValueError("When adding to an existing workbook, provide an output path.")
 
+    out_dir = Path(output_path or file_path).parent
+    with pipeline_span("extract_comments", out_dir, profile):
+        _extract_comments_to_new_sheet(
+            file_path, output_path, header_row, add_to_wb, overwrite, progress
+        )
+
+
+def _extract_comments_to_new_sheet(
+    file_path: str | Path,
+    output_path: str | None,
+    header_row: int,
+    add_to_wb: bool,
+    overwrite: bool,
+    progress: ProgressCallback | None = None,
+) -> None:
     # Decide whether to write to a new file or modify in-place
     target_path = output_path if output_path and add_to_wb else file_path
     if output_path and add_to_wb:
@@ -210,53 +259,18 @@ def extract_comments_to_new_sheet(
             )
         shutil.copyfile(file_path, output_path)
 
-    wb = load_workbook(target_path, data_only=True)
-    all_comments = []
-    inherited_cells = set()
-
-    # Process each worksheet
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        columns = get_column_indices(
-            ws, header_row, ["@puic", "path", "status", "geometry_status"]
-        )
-
-        for row in ws.iter_rows():
-            for cell in row:
-                if cell.column is None or cell.row is None:
-                    continue
-
-                col_letter = get_column_letter(cell.column)
-                header_cell = ws[f"{col_letter}{header_row}"]
-                header_value = str(header_cell.value or "")
-
-                if cell.comment:
-                    if cell.row == header_row:  # Process header-level comments
-                        comments, inherited = handle_header_comment(
-                            cell, ws, header_value, columns, sheet_name, header_row
-                        )
-                        all_comments.extend(comments)
-                        inherited_cells.update(inherited)
-                    else:
-                        all_comments.extend(
-                            handle_data_comment(
-                                cell, ws, header_value, columns, sheet_name
-                            )
-                        )
-                else:
-                    # Process inherited comments (colored cells without comment)
-                    color = get_cell_background_color(cell)
-                    if (
-                        cell.row > header_row
-                        and color in REVIEW_STYLES.values()
-                        and cell.value
-                        and cell.coordinate not in inherited_cells
-                    ):
-                        context = get_cell_context(ws, cell.row, columns)
-                        entry = build_comment_entry(
-                            cell, header_value, sheet_name, "", None, context
-                        )
-                        all_comments.append(entry)
+    with span("load workbook"):
+        wb = load_workbook(target_path, data_only=True)
+    with span("extract"):
+        all_comments = []
+        rows = sum(ws.max_row for ws in wb.worksheets)
+        with ProgressReporter(progress, "extract comments", rows) as reporter:
+            for sheet_name in wb.sheetnames:
+                all_comments.extend(
+                    extract_sheet_comments(
+                        wb[sheet_name], sheet_name, header_row, reporter
+                    )
+                )
 
     # Write comments to workbook
     if add_to_wb:
@@ -264,17 +278,19 @@ def extract_comments_to_new_sheet(
             raise FileExistsError(
                 f"File '{file_path}' already exists. Set overwrite=True."
             )
-        write_comments_sheet(wb, all_comments, overwrite)
-        wb.save(target_path)
+        with span("save"):
+            write_comments_sheet(wb, all_comments, overwrite)
+            wb.save(target_path)
 
-        add_review_styles_to_excel(target_path)
+            add_review_styles_to_excel(target_path)
 
     else:
         output_path = output_path or str(file_path).replace(".xlsx", "_comments.xlsx")
         wb_new = Workbook()
         if wb_new.active:
             wb_new.remove(wb_new.active)
-        write_comments_sheet(wb_new, all_comments, overwrite)
-        wb_new.save(output_path)
+        with span("save"):
+            write_comments_sheet(wb_new, all_comments, overwrite)
+            wb_new.save(output_path)
 
-        add_review_styles_to_excel(output_path)
+            add_review_styles_to_excel(output_path)
@@ -10,6 +10,8 @@ from openpyxl.worksheet.worksheet import Worksheet
 from src.imxTools.comments.comments_enums import CommentColumns
 from src.imxTools.settings import config
 from src.imxTools.utils.helpers import ensure_paths
+from src.imxTools.utils.profiling import pipeline_span, span
+from src.imxTools.utils.progress import ProgressCallback, ProgressReporter
 
 
 def copy_full_sheet(source_ws: Worksheet, target_ws: Worksheet) -> None:
@@ -58,20 +60,54 @@ def get_sheet_headers(ws: Worksheet, header_row: int = 1) -> dict[str, int]:
     }
 
 
-def find_column_by_value(ws: Worksheet, target: str, header_row: int) -> int | None:
-    for col in range(1, ws.max_column + 1):
-        if ws.cell(row=header_row, column=col).value == target:
-            return col
-    return None
-
-
-def find_row_by_value(
-    ws: Worksheet, col: int, value: Any, start_row: int
-) -> int | None:
-    for row in range(start_row, ws.max_row + 1):
-        if str(ws.cell(row=row, column=col).value) == str(value):
-            return row
-    return None
+class DiffSheetIndex:
+    """
+    Header -> column and puic -> row lookups for a diff sheet, built on first use.
+
+    The first match wins: a header value that appears twice maps to its leftmost
+    column, a puic that appears twice to its topmost row below the header. Puics
+    are compared as strings, header values as they are.
+    """
+
+    def __init__(self, ws: Worksheet, header_row: int, puic_header: str = "@puic"):
+        self.ws = ws
+        self.header_row = header_row
+        self.puic_header = puic_header
+        self._columns: dict[Any, int] | None = None
+        self._puic_rows: dict[str, int] | None = None
+
+    def find_column(self, target: Any) -> int | None:
+        if self._columns is None:
+            self._columns = {}
+            header = next(
+                self.ws.iter_rows(
+                    min_row=self.header_row, max_row=self.header_row, values_only=True
+                ),
+                (),
+            )
+            for col, value in enumerate(header, start=1):
+                self._columns.setdefault(value, col)
+        return self._columns.get(target)
+
+    @property
+    def puic_column(self) -> int | None:
+        return self.find_column(self.puic_header)
+
+    def find_row(self, puic: Any) -> int | None:
+        if self._puic_rows is None:
+            self._puic_rows = {}
+            puic_col = self.puic_column
+            if puic_col is not None:
+                start_row = self.header_row + 1
+                values = self.ws.iter_rows(
+                    min_row=start_row,
+                    min_col=puic_col,
+                    max_col=puic_col,
+                    values_only=True,
+                )
+                for row_idx, (value,) in enumerate(values, start=start_row):
+                    self._puic_rows.setdefault(str(value), row_idx)
+        return self._puic_rows.get(str(puic))
 
 
 def create_summary_sheet(
@@ -115,7 +151,7 @@ def extract_display_text(formula: str) -> str:
 def apply_comment_to_cell(
     ws: Worksheet,
     header_col: int,
-    puic_col: int,
+    sheet_index: DiffSheetIndex,
     header_row: int,
     puic: Any,
     comment_text: str,
@@ -124,7 +160,7 @@ def apply_comment_to_cell(
     skipped: list[dict[str, Any]],
     not_found: list[dict[str, Any]],
 ) -> None:
-    target_row = find_row_by_value(ws, puic_col, puic, header_row + 1)
+    target_row = sheet_index.find_row(puic)
     if target_row is None:
         not_found.append({**data, "Reason": f"Puic '{puic}' not found"})
         return
@@ -196,48 +232,20 @@ def auto_resize_columns(ws: Worksheet) -> None:
         ws.column_dimensions[col_letter].width = max_length + 2
 
 
-def apply_comments_from_issue_list(
-    issue_list_path: str | Path,
-    new_diff_path: str | Path,
-    output_path: str | Path,
-    header_row: int = 1,
+def _place_comments(
+    all_rows: list[dict[str, Any]],
+    diff_wb: Workbook,
+    header_row: int,
+    processed: list[dict[str, Any]],
+    skipped: list[dict[str, Any]],
+    not_found: list[dict[str, Any]],
+    progress: ProgressCallback | None = None,
 ) -> None:
-    issue_list_path, new_diff_path, output_path = ensure_paths(
-        issue_list_path, new_diff_path, output_path
-    )
-
-    issue_wb = load_workbook(issue_list_path, data_only=False)
-    diff_wb = load_workbook(new_diff_path)
-
-    if config.ISSUE_LIST_SHEET_NAME not in issue_wb.sheetnames:
-        raise ValueError(
-            f"No '{config.ISSUE_LIST_SHEET_NAME}' sheet found in the issue list workbook."
-        )
-
-    issue_ws = issue_wb[config.ISSUE_LIST_SHEET_NAME]
-    headers = get_sheet_headers(issue_ws, header_row)
-
-    processed: list[dict[str, Any]] = []
-    skipped: list[dict[str, Any]] = []
-    not_found: list[dict[str, Any]] = []
-
-    all_rows: list[dict[str, Any]] = []
-    for row in issue_ws.iter_rows(min_row=header_row + 1, values_only=True):
-        data = {
-            str(key): row[idx - 1] if idx - 1 < len(row) else None
-            for key, idx in headers.items()
-        }
-        all_rows.append(data)
-
-    def safe_int(val: Any) -> int:
-        try:
-            return int(val)
-        except Exception:
-            return 1_000_000_000
-
-    all_rows.sort(key=lambda d: safe_int(d.get(CommentColumns.comment_row)))
+    sheet_indexes: dict[str, DiffSheetIndex] = {}
 
+    reporter = ProgressReporter(progress, "place comments", len(all_rows))
     for data in all_rows:
+        reporter.advance()
         try:
             sheetname = str(data.get(CommentColumns.comment_sheet_name.name))
             imx_path = str(data.get(CommentColumns.header_value.name))
@@ -258,23 +266,25 @@ def apply_comments_from_issue_list(
                 continue
 
             ws = diff_wb[sheetname]
+            if sheetname not in sheet_indexes:
+                sheet_indexes[sheetname] = DiffSheetIndex(ws, header_row)
+            sheet_index = sheet_indexes[sheetname]
 
-            header_col = find_column_by_value(ws, imx_path, header_row)
+            header_col = sheet_index.find_column(imx_path)
             if header_col is None:
                 not_found.append(
                     {**data, "Reason": f"ImxPath '{imx_path}' not found in header"}
                 )
                 continue
 
-            puic_col = find_column_by_value(ws, "@puic", header_row)
-            if puic_col is None:
+            if sheet_index.puic_column is None:
                 not_found.append({**data, "Reason": "@puic column not found"})
                 continue
 
             apply_comment_to_cell(
                 ws,
                 header_col,
-                puic_col,
+                sheet_index,
                 header_row,
                 puic,
                 comment_text,
@@ -286,6 +296,69 @@ def apply_comments_from_issue_list(
 
         except Exception as e:
             not_found.append({**data, "Reason": f"Unexpected error: {str(e)}"})
+    reporter.finish()
+
+
+def apply_comments_from_issue_list(
+    issue_list_path: str | Path,
+    new_diff_path: str | Path,
+    output_path: str | Path,
+    header_row: int = 1,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+) -> None:
+    issue_list_path, new_diff_path, output_path = ensure_paths(
+        issue_list_path, new_diff_path, output_path
+    )
+    with pipeline_span("apply_comments", output_path.parent, profile):
+        _apply_comments_from_issue_list(
+            issue_list_path, new_diff_path, output_path, header_row, progress
+        )
+
+
+def _apply_comments_from_issue_list(
+    issue_list_path: Path,
+    new_diff_path: Path,
+    output_path: Path,
+    header_row: int,
+    progress: ProgressCallback | None = None,
+) -> None:
+    with span("load workbooks"):
+        issue_wb = load_workbook(issue_list_path, data_only=False)
+        diff_wb = load_workbook(new_diff_path)
+
+    if config.ISSUE_LIST_SHEET_NAME not in issue_wb.sheetnames:
+        raise ValueError(
+            f"No '{config.ISSUE_LIST_SHEET_NAME}' sheet found in the issue list workbook."
+        )
+
+    issue_ws = issue_wb[config.ISSUE_LIST_SHEET_NAME]
+    headers = get_sheet_headers(issue_ws, header_row)
+
+    processed: list[dict[str, Any]] = []
+    skipped: list[dict[str, Any]] = []
+    not_found: list[dict[str, Any]] = []
+
+    all_rows: list[dict[str, Any]] = []
+    for row in issue_ws.iter_rows(min_row=header_row + 1, values_only=True):
+        data = {
+            str(key): row[idx - 1] if idx - 1 < len(row) else None
+            for key, idx in headers.items()
+        }
+        all_rows.append(data)
+
+    def safe_int(val: Any) -> int:
+        try:
+            return int(val)
+        except Exception:
+            return 1_000_000_000
+
+    all_rows.sort(key=lambda d: safe_int(d.get(CommentColumns.comment_row)))
+
+    with span("place comments"):
+        _place_comments(
+            all_rows, diff_wb, header_row, processed, skipped, not_found, progress
+        )
 
     issue_list_ws = diff_wb.create_sheet(config.ISSUE_LIST_SHEET_NAME)
     copy_full_sheet(issue_ws, issue_list_ws)
@@ -306,7 +379,8 @@ def apply_comments_from_issue_list(
 
     create_summary_sheet(diff_wb, processed, skipped, not_found)
 
-    diff_wb.save(output_path)
+    with span("save"):
+        diff_wb.save(output_path)
     print(f"✅ Comments copied and saved to '{output_path}'")
     print(
         f"Summary: {len(processed)} placed, {len(skipped)} skipped, {len(not_found)} failed."
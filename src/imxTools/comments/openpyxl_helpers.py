@@ -9,22 +9,13 @@ from openpyxl.worksheet.worksheet import Worksheet
 
 def get_cell_background_color(cell: Cell | MergedCell) -> str | None:
     """Extracts the background color (last 6 hex chars) of a cell, if RGB color is set."""
-    if cell.fill and cell.fill.fgColor and cell.fill.fgColor.type == "rgb":
-        return cell.fill.fgColor.rgb[-6:]
+    fill = cell.fill  # every access builds a new style proxy
+    fg_color = fill.fgColor if fill else None
+    if fg_color and fg_color.type == "rgb":
+        return fg_color.rgb[-6:]
     return None
 
 
-def get_column_indices(
-    ws: Worksheet, header_row: int, keys: list[str]
-) -> dict[str, int]:
-    """Maps the column names in the header row to their column index for the given keys."""
-    header_values = {
-        str(ws.cell(row=header_row, column=col).value): col
-        for col in range(1, ws.max_column + 1)
-    }
-    return {key: header_values[key] for key in keys if key in header_values}
-
-
 def _set_comment_fill(
     ws: Worksheet, row_idx: int, col: str | int, bg_color: str | None
 ) -> None:
@@ -1,11 +1,15 @@
 from datetime import datetime
 from pathlib import Path
 
-from imxInsights import ImxContainer, ImxMultiRepo
+from imxInsights import ImxMultiRepo
 from imxInsights.utils.headerAnnotator import HeaderSpec
 from imxInsights.file.singleFileImx.imxSituationEnum import ImxSituationEnum
 
-from src.imxTools.utils.helpers import load_imxinsights_container_or_file
+from src.imxTools.utils.helpers import (
+    load_imx_situations,
+    load_imxinsights_container_or_file,
+)
+from src.imxTools.utils.profiling import pipeline_span, span
 
 
 def write_diff_output_files(
@@ -18,37 +22,72 @@ def write_diff_output_files(
     to_wgs: bool,
     version_safe: bool = False,
     spec_file: Path | None = None,
+    profile: bool = False,
 ):
     out_path = Path(out_path) if out_path else Path.cwd()
+    with pipeline_span("diff", out_path, profile):
+        _write_diff_output_files(
+            t1_path,
+            t2_path,
+            out_path,
+            t1_situation,
+            t2_situation,
+            geojson,
+            to_wgs,
+            version_safe,
+            spec_file,
+        )
+
 
-    t1 = load_imxinsights_container_or_file(t1_path, t1_situation)
+def _write_diff_output_files(
+    t1_path: Path,
+    t2_path: Path,
+    out_path: Path,
+    t1_situation: ImxSituationEnum | None,
+    t2_situation: ImxSituationEnum | None,
+    geojson: bool,
+    to_wgs: bool,
+    version_safe: bool,
+    spec_file: Path | None,
+):
+    # both situations of one single file come from a single parse
+    t2_same_file = t1_path == t2_path and t1_path.suffix == ".xml"
+    with span("load t1"):
+        if t2_same_file:
+            t1, t2 = load_imx_situations(t1_path, [t1_situation, t2_situation])
+        else:
+            t1 = load_imxinsights_container_or_file(t1_path, t1_situation)
     if not t1:
         raise ValueError(
             "IMX T1 results in None. Is the situation present in the IMX file?"
         )
 
-    t2_same_file = t1_path == t2_path and not isinstance(t1, ImxContainer)
-    if t2_same_file:
-        t2 = load_imxinsights_container_or_file(t1_path, t2_situation)
-    else:
-        t2 = load_imxinsights_container_or_file(t2_path, t2_situation)
+    with span("load t2"):
+        if not t2_same_file:
+            t2 = load_imxinsights_container_or_file(t2_path, t2_situation)
+        if t2 is t1:
+            # same content on both sides, the compare needs two containers
+            t2 = load_imxinsights_container_or_file(t2_path, t2_situation, False)
 
     if not t2:
         raise ValueError(
             "IMX T2 results in None. Is the situation present in the IMX file?"
         )
 
-    multi_repo = ImxMultiRepo([t1, t2], version_safe=version_safe)  # type: ignore[abstract]
-    compare = multi_repo.compare(
-        container_id_1=t1.container_id,
-        container_id_2=t2.container_id,
-    )
+    with span("compare"):
+        multi_repo = ImxMultiRepo([t1, t2], version_safe=version_safe)  # type: ignore[abstract]
+        compare = multi_repo.compare(
+            container_id_1=t1.container_id,
+            container_id_2=t2.container_id,
+        )
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    compare.to_excel(out_path / f"{timestamp}-diff.xlsx", header_spec=HeaderSpec(f"{spec_file}") if spec_file else None)
+    with span("to_excel"):
+        compare.to_excel(out_path / f"{timestamp}-diff.xlsx", header_spec=HeaderSpec(f"{spec_file}") if spec_file else None)
 
     if geojson:
-        compare.create_geojson_files(out_path / f"{timestamp}-geojsons", to_wgs=to_wgs)
+        with span("geojson"):
+            compare.create_geojson_files(out_path / f"{timestamp}-geojsons", to_wgs=to_wgs)
 
 
 def write_population_output_files(
@@ -58,12 +97,17 @@ def write_population_output_files(
     geojson: bool,
     to_wgs: bool,
     spec_file: Path | None = None,
+    profile: bool = False,
 ):
     out_path = Path(out_path) if out_path else Path.cwd()
 
-    t1 = load_imxinsights_container_or_file(imx, imx_situation)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    t1.to_excel(out_path / f"{timestamp}-population.xlsx", header_spec=HeaderSpec(f"{spec_file}") if spec_file else None)
+    with pipeline_span("population", out_path, profile):
+        with span("load"):
+            t1 = load_imxinsights_container_or_file(imx, imx_situation)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with span("to_excel"):
+            t1.to_excel(out_path / f"{timestamp}-population.xlsx", header_spec=HeaderSpec(f"{spec_file}") if spec_file else None)
 
-    if geojson:
-        t1.create_geojson_files(out_path / f"{timestamp}-geojsons", to_wgs=to_wgs)
+        if geojson:
+            with span("geojson"):
+                t1.create_geojson_files(out_path / f"{timestamp}-geojsons", to_wgs=to_wgs)
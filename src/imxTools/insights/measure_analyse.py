@@ -1,24 +1,88 @@
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from imxInsights.repo.imxRepo import ImxRepo
+from numpy._typing import NDArray
 from shapely import LineString, Point
 
+from src.imxTools.insights.measure_cache import MeasureProjectionCache, geometry_hash
+from src.imxTools.insights.measure_table import MeasureAnalyseTable
 from src.imxTools.insights.mesaure_analyse_enums import MeasureAnalyseColumns
 from src.imxTools.revision.revision_enums import (
     RevisionColumns,
     RevisionOperationValues,
 )
-from src.imxTools.utils.measure_line import (
-    MeasureLine,
-    PointMeasureResult,
-)
+from src.imxTools.utils.measure_line import MeasureLine
 from src.imxTools.utils.helpers import create_timestamp
+from src.imxTools.utils.profiling import pipeline_span, span
+from src.imxTools.utils.progress import ProgressCallback, ProgressReporter
 
 
 from loguru import logger
 
 
+@dataclass
+class MeasureAnalyseStats:
+    """
+    Aggregated counters and timings of a measure analysis run.
+
+    Replaces per row logging in the hot loop, `summary` is logged once at the end.
+    The projection time of a rail connection is shared over the geometry types of
+    its points by point count.
+    """
+
+    objects_scanned: int = 0
+    refs_skipped: int = 0
+    rail_connections_missing: int = 0
+    projections: int = 0
+    projections_cached: int = 0
+    rail_connections: int = 0
+    objects_per_geometry: Counter = field(default_factory=Counter)
+    scan_seconds_per_geometry: dict[str, float] = field(
+        default_factory=lambda: defaultdict(float)
+    )
+    projection_seconds_per_geometry: dict[str, float] = field(
+        default_factory=lambda: defaultdict(float)
+    )
+    projection_seconds: float = 0.0
+    row_seconds: float = 0.0
+
+    def add_object(self, geometry_type: str, seconds: float) -> None:
+        self.objects_scanned += 1
+        self.objects_per_geometry[geometry_type] += 1
+        self.scan_seconds_per_geometry[geometry_type] += seconds
+
+    def add_projection(self, geometry_types: Counter, seconds: float) -> None:
+        """Shares the projection time of one rail connection over its points."""
+        points = sum(geometry_types.values())
+        for geometry_type, count in geometry_types.items():
+            self.projection_seconds_per_geometry[geometry_type] += (
+                seconds * count / points
+            )
+
+    def summary(self) -> str:
+        objects = ", ".join(
+            f"{count} {geometry_type} "
+            f"(scan {self.scan_seconds_per_geometry[geometry_type]:.3f}s, "
+            f"projection {self.projection_seconds_per_geometry[geometry_type]:.3f}s)"
+            for geometry_type, count in self.objects_per_geometry.most_common()
+        )
+        return (
+            f"measure analysis: {self.objects_scanned} objects scanned [{objects}], "
+            f"{self.refs_skipped} refs skipped, "
+            f"{self.rail_connections_missing} rail connections not found, "
+            f"{self.projections} projections on {self.rail_connections} rail "
+            f"connections in {self.projection_seconds:.3f}s, "
+            f"{self.projections_cached} projections reused, "
+            f"rows built in {self.row_seconds:.3f}s"
+        )
+
+
 def _is_valid_geometry(geometry) -> bool:
     return isinstance(geometry, Point | LineString)
 
@@ -27,12 +91,51 @@ def _is_rail_connection_ref(ref_field: str) -> bool:
     return ref_field.endswith("@railConnectionRef")
 
 
-def _get_or_create_measure_line(
-    puic: str, rail_con, cache: dict[str, MeasureLine]
-) -> MeasureLine:
-    if puic not in cache:
-        cache[puic] = MeasureLine(rail_con.geometry)
-    return cache[puic]
+def _project_rail_connection(
+    line_coords: NDArray[np.float64], points: list[tuple]
+) -> tuple[NDArray[np.float64], NDArray[np.float64], float]:
+    """
+    Projects all points of one rail connection, also used as process pool task.
+    Returns the 2D and 3D measures and the seconds the projection took.
+    """
+    start = time.perf_counter()
+    projection = MeasureLine(line_coords).project_many(points)
+    return projection.measure_2d, projection.measure_3d, time.perf_counter() - start
+
+
+def _project_rail_connections(
+    line_coords: dict[str, NDArray[np.float64]],
+    points_per_line: dict[str, list[tuple]],
+    workers: int = 1,
+    progress: ProgressCallback | None = None,
+) -> dict[str, tuple[NDArray[np.float64], NDArray[np.float64], float]]:
+    """
+    Projects the points of every rail connection, serially or on a process pool.
+
+    Workers only receive the rail connection coordinates and the points to project,
+    both paths run the same task so the results are identical.
+    """
+    puics = list(points_per_line)
+    coords = [line_coords[puic] for puic in puics]
+    points = [points_per_line[puic] for puic in puics]
+
+    reporter = ProgressReporter(progress, "project rail connections", len(puics))
+    results = []
+    if workers <= 1 or len(puics) < 2:
+        for result in map(_project_rail_connection, coords, points):
+            results.append(result)
+            reporter.advance()
+    else:
+        chunksize = max(1, len(puics) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(
+                _project_rail_connection, coords, points, chunksize=chunksize
+            ):
+                results.append(result)
+                reporter.advance()
+    reporter.finish()
+
+    return dict(zip(puics, results))
 
 
 def _extract_measure(
@@ -43,127 +146,174 @@ def _extract_measure(
     return float(measure) if measure else None
 
 
-def _calculate_row(
-    imx_object,
-    ref_field,
-    rail_con,
-    measure_type,
-    measure: float | None,
-    projection_result: PointMeasureResult,
-) -> dict:
-    puic = rail_con.puic
-
-    diff_3d = (
-        abs(measure - projection_result.measure_3d)
-        if measure is not None and projection_result.measure_3d is not None
-        else None
-    )
-
-    diff_2d = (
-        abs(measure - projection_result.measure_2d)
-        if measure is not None and projection_result.measure_2d is not None
-        else None
-    )
-
-    return {
-        MeasureAnalyseColumns.object_path.name: imx_object.path,
-        MeasureAnalyseColumns.object_puic.name: imx_object.puic,
-        MeasureAnalyseColumns.object_name.name: imx_object.name,
-        MeasureAnalyseColumns.ref_field.name: ref_field,
-        MeasureAnalyseColumns.ref_field_value.name: puic,
-        MeasureAnalyseColumns.ref_field_name.name: rail_con.name,
-        MeasureAnalyseColumns.measure_type.name: measure_type,
-        MeasureAnalyseColumns.imx_measure.name: measure,
-        MeasureAnalyseColumns.calculated_measure_3d.name: round(
-            projection_result.measure_3d, 3
-        )
-        if projection_result.measure_3d is not None
-        else None,
-        MeasureAnalyseColumns.abs_imx_vs_3d.name: diff_3d,
-        MeasureAnalyseColumns.calculated_measure_2d.name: projection_result.measure_2d,
-        MeasureAnalyseColumns.abs_imx_vs_2d.name: diff_2d,
-    }
-
-
-def calculate_measurements(imx: ImxRepo) -> list:
-    results = []
-    measure_lines: dict[str, MeasureLine] = {}
+def _measure_points(geometry: Point | LineString) -> list[tuple[str, tuple]]:
+    if isinstance(geometry, Point):
+        return [("atMeasure", geometry.coords[0])]
+    # todo: geometry should be first point from and the to end point
+    return [
+        ("fromMeasure", geometry.coords[0]),
+        ("toMeasure", geometry.coords[-1]),
+    ]
 
-    # todo: we should do this async so we gain some speed
 
+def calculate_measurements(
+    imx: ImxRepo,
+    workers: int = 1,
+    stats: MeasureAnalyseStats | None = None,
+    progress: ProgressCallback | None = None,
+    cache: MeasureProjectionCache | None = None,
+) -> MeasureAnalyseTable:
+    """
+    Returns a row per measured point in a `MeasureAnalyseTable`, missing measures
+    are NaN; `to_records()` gives the former list of dicts with None. With a cache,
+    points whose object and rail connection geometry did not change since they
+    were cached are not projected again, and the new projections are added to the
+    cache.
+    """
+    stats = stats if stats is not None else MeasureAnalyseStats()
+    line_coords: dict[str, NDArray[np.float64]] = {}
+    line_hashes: dict[str, bytes] = {}
+    points_per_line: dict[str, list[tuple]] = defaultdict(list)
+    geometry_types_per_line: dict[str, Counter] = defaultdict(Counter)
+    pending_rows: list[tuple] = []
+
+    # Collect all points per rail connection first, so each rail connection is
+    # projected in a single vectorized batch, optionally in parallel.
+    reporter = ProgressReporter(progress, "scan objects")
     for obj in imx.get_all():
-        if not _is_valid_geometry(obj.geometry):
+        reporter.advance()
+        start = time.perf_counter()
+        geometry = obj.geometry
+        if not _is_valid_geometry(geometry):
+            stats.add_object(geometry.geom_type, time.perf_counter() - start)
             continue
+        object_hash = geometry_hash(geometry.coords) if cache is not None else b""
 
         for ref in obj.refs:
             if not _is_rail_connection_ref(ref.field):
+                stats.refs_skipped += 1
                 continue
 
             rail_con = ref.imx_object
             if not rail_con:
+                stats.rail_connections_missing += 1
                 logger.warning(
-                    f"rail connection {ref.field_value} not found for {obj.puic}"
+                    "rail connection {} not found for {}", ref.field_value, obj.puic
                 )
                 continue
 
-            logger.info(f"calculating measure for {obj.puic} {ref.imx_object.puic}")
+            logger.trace("calculating measure for {} {}", obj.puic, rail_con.puic)
 
-            measure_line = _get_or_create_measure_line(
-                rail_con.puic, rail_con, measure_lines
-            )
-
-            if isinstance(obj.geometry, Point):
-                projection_result = measure_line.project(obj.geometry)
-                imx_measure = _extract_measure(ref.field, "@atMeasure", obj.properties)
-                results.append(
-                    _calculate_row(
-                        obj,
-                        ref.field,
-                        rail_con,
-                        "atMeasure",
-                        imx_measure,
-                        projection_result,
+            if rail_con.puic not in line_coords:
+                line_coords[rail_con.puic] = np.asarray(rail_con.geometry.coords)
+                if cache is not None:
+                    line_hashes[rail_con.puic] = geometry_hash(
+                        line_coords[rail_con.puic]
                     )
-                )
-            elif isinstance(obj.geometry, LineString):
-                projection__line_result = measure_line.project_line(obj.geometry)
-
-                # todo: geometry should be first point from and the to end point
 
-                # FromMeasure
+            for measure_type, coords in _measure_points(geometry):
                 imx_measure = _extract_measure(
-                    ref.field, "@fromMeasure", obj.properties
+                    ref.field, f"@{measure_type}", obj.properties
                 )
-                results.append(
-                    _calculate_row(
-                        obj,
-                        ref.field,
-                        rail_con,
-                        "fromMeasure",
-                        imx_measure,
-                        projection__line_result.from_result,
+                cached = (
+                    cache.get(
+                        (obj.puic, ref.field, measure_type),
+                        object_hash,
+                        line_hashes[rail_con.puic],
                     )
+                    if cache is not None
+                    else None
                 )
-
-                # ToMeasure
-                imx_measure = _extract_measure(ref.field, "@toMeasure", obj.properties)
-                results.append(
-                    _calculate_row(
+                idx = -1
+                if cached is None:
+                    line_points = points_per_line[rail_con.puic]
+                    idx = len(line_points)
+                    line_points.append(coords[:2])
+                    geometry_types_per_line[rail_con.puic][geometry.geom_type] += 1
+                pending_rows.append(
+                    (
                         obj,
                         ref.field,
                         rail_con,
-                        "toMeasure",
+                        measure_type,
                         imx_measure,
-                        projection__line_result.to_result,
+                        idx,
+                        object_hash,
+                        cached,
                     )
                 )
 
-    return results
+        stats.add_object(geometry.geom_type, time.perf_counter() - start)
+    reporter.finish()
 
+    start = time.perf_counter()
+    with span("project rail connections"):
+        projections = _project_rail_connections(
+            line_coords, points_per_line, workers, progress
+        )
+    stats.projection_seconds = time.perf_counter() - start
+    for puic, (_, _, seconds) in projections.items():
+        stats.add_projection(geometry_types_per_line[puic], seconds)
+    stats.projections = sum(len(points) for points in points_per_line.values())
+    stats.projections_cached = len(pending_rows) - stats.projections
+    stats.rail_connections = len(projections)
+
+    start = time.perf_counter()
+    table = MeasureAnalyseTable(capacity=len(pending_rows))
+    reporter = ProgressReporter(progress, "build rows", len(pending_rows))
+    for (
+        obj,
+        ref_field,
+        rail_con,
+        measure_type,
+        imx_measure,
+        idx,
+        object_hash,
+        cached,
+    ) in pending_rows:
+        reporter.advance()
+        if cached is not None:
+            measure_2d, measure_3d = cached
+        else:
+            measures_2d, measures_3d, _ = projections[rail_con.puic]
+            measure_2d, measure_3d = measures_2d[idx], measures_3d[idx]
+            if cache is not None:
+                cache.put(
+                    (obj.puic, ref_field, measure_type),
+                    object_hash,
+                    line_hashes[rail_con.puic],
+                    measure_2d,
+                    measure_3d,
+                )
+        table.append(
+            obj.path,
+            obj.puic,
+            obj.name,
+            ref_field,
+            rail_con.puic,
+            rail_con.name,
+            measure_type,
+            imx_measure,
+            measure_2d,
+            measure_3d,
+        )
+    stats.row_seconds = time.perf_counter() - start
+    reporter.finish()
+
+    logger.info(stats.summary())
+    return table
 
-def generate_analyse_df(imx: ImxRepo) -> pd.DataFrame:
-    results = calculate_measurements(imx)
-    df_analyse = pd.DataFrame(results)
+
+def generate_analyse_df(
+    imx: ImxRepo,
+    workers: int = 1,
+    progress: ProgressCallback | None = None,
+    cache: MeasureProjectionCache | None = None,
+) -> pd.DataFrame:
+    with span("calculate measurements"):
+        table = calculate_measurements(imx, workers, progress=progress, cache=cache)
+    with span("dataframe"):
+        df_analyse = table.to_dataframe()
     return df_analyse
 
 
@@ -234,16 +384,25 @@ def convert_analyse_to_issue_list(
 
 
 def generate_measure_excel(
-    imx: ImxRepo, output_path: str | Path, threshold: float = 0.015
+    imx: ImxRepo,
+    output_path: str | Path,
+    threshold: float = 0.015,
+    workers: int = 1,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
+    cache: MeasureProjectionCache | None = None,
 ):
     if isinstance(output_path, str):
         output_path = Path(output_path)
     if output_path.is_dir():
         output_path = output_path / f"measure_check-{create_timestamp()}.xlsx"
 
-    df_analyse = generate_analyse_df(imx)
-    df_issue_list = convert_analyse_to_issue_list(df_analyse, threshold)
+    with pipeline_span("measure_check", output_path.parent, profile):
+        df_analyse = generate_analyse_df(imx, workers, progress, cache)
+        with span("issue list"):
+            df_issue_list = convert_analyse_to_issue_list(df_analyse, threshold)
 
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        df_analyse.to_excel(writer, index=False, sheet_name="measure_check")
-        df_issue_list.to_excel(writer, index=False, sheet_name="revisions")
+        with span("write excel"):
+            with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+                df_analyse.to_excel(writer, index=False, sheet_name="measure_check")
+                df_issue_list.to_excel(writer, index=False, sheet_name="revisions")
@@ -0,0 +1,114 @@
+"""
+Projection results of earlier measure analyses, for incremental measure checks.
+
+The measure correction flow analyses an IMX file, applies revisions and checks the
+processed file again, while only a handful of objects or rail connections changed.
+Every measured point is stored under its object puic, ref field and measure type
+with a hash of the object geometry and one of the referenced rail connection
+geometry. A later analysis reuses the projection when both hashes match and only
+projects the points whose inputs changed.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from src.imxTools.utils.custom_logger import logger
+
+CACHE_FORMAT = 1
+
+# object puic, ref field, measure type
+PointKey = tuple[str, str, str]
+
+
+def geometry_hash(coords: ArrayLike) -> bytes:
+    """Hash of the coordinates of a geometry, 16 bytes."""
+    data = np.ascontiguousarray(coords, dtype=np.float64)
+    return hashlib.blake2b(data.tobytes(), digest_size=16).digest()
+
+
+class MeasureProjectionCache:
+    """
+    Projected 2D and 3D measures per measured point.
+
+    Entries are marked as used when they are read or written; `save` only keeps
+    the used ones, so the file follows the last analysed IMX instead of growing.
+    """
+
+    def __init__(self):
+        # key -> (object hash, rail connection hash, measure 2d, measure 3d)
+        self._entries: dict[PointKey, tuple[bytes, bytes, float, float]] = {}
+        self._used: set[PointKey] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, key: PointKey, object_hash: bytes, rail_connection_hash: bytes
+    ) -> tuple[float, float] | None:
+        """The cached (measure 2d, measure 3d), None when missing or outdated."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != object_hash or entry[1] != rail_connection_hash:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return entry[2], entry[3]
+
+    def put(
+        self,
+        key: PointKey,
+        object_hash: bytes,
+        rail_connection_hash: bytes,
+        measure_2d: float,
+        measure_3d: float,
+    ) -> None:
+        self._entries[key] = (
+            object_hash,
+            rail_connection_hash,
+            float(measure_2d),
+            float(measure_3d),
+        )
+        self._used.add(key)
+
+    @classmethod
+    def load(cls, path: Path) -> "MeasureProjectionCache":
+        """The cache stored at path, an empty one when missing or unreadable."""
+        cache = cls()
+        path = Path(path)
+        if not path.exists():
+            return cache
+
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable measure cache {path}: {e}")
+            return cache
+
+        if payload.get("format") != CACHE_FORMAT:
+            logger.info(f"Ignoring measure cache {path} of another format")
+            return cache
+
+        cache._entries = payload["entries"]
+        return cache
+
+    def save(self, path: Path) -> Path:
+        """Writes the entries used since loading, replacing the file atomically."""
+        path = Path(path)
+        payload = {
+            "format": CACHE_FORMAT,
+            "entries": {key: self._entries[key] for key in self._used},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
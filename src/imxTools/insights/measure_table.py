@@ -0,0 +1,135 @@
+"""
+Columnar result of a measure analysis.
+
+The analysis appends a row per measured point to a `MeasureAnalyseTable`, which
+writes the values into NumPy arrays per `MeasureAnalyseColumns` field instead of
+building a dict per row. The arrays are preallocated and doubled when full, the
+differences between the IMX and calculated measures are computed per column once
+all rows are in. `columns()` gives the arrays by column name without pandas,
+`to_dataframe()` builds the DataFrame from them in one go. Missing measures are
+NaN in the arrays; `to_records()` gives the rows as dicts with None instead, the
+list `calculate_measurements` returned before the table.
+
+    table = MeasureAnalyseTable(capacity=len(points))
+    for ...:
+        table.append(path, puic, name, ref_field, rc_puic, rc_name, "atMeasure",
+                     imx_measure, measure_2d, measure_3d)
+    df = table.to_dataframe()
+"""
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.imxTools.insights.mesaure_analyse_enums import MeasureAnalyseColumns
+
+# columns filled by append, in argument order; the others are derived from them
+TEXT_COLUMNS = (
+    MeasureAnalyseColumns.object_path.name,
+    MeasureAnalyseColumns.object_puic.name,
+    MeasureAnalyseColumns.object_name.name,
+    MeasureAnalyseColumns.ref_field.name,
+    MeasureAnalyseColumns.ref_field_value.name,
+    MeasureAnalyseColumns.ref_field_name.name,
+    MeasureAnalyseColumns.measure_type.name,
+)
+NUMBER_COLUMNS = (
+    MeasureAnalyseColumns.imx_measure.name,
+    MeasureAnalyseColumns.calculated_measure_2d.name,
+    MeasureAnalyseColumns.calculated_measure_3d.name,
+)
+
+
+class MeasureAnalyseTable:
+    """
+    Growable columns of the measure analysis, NaN marks a missing measure.
+
+    Args:
+        capacity: Number of rows to allocate up front.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._capacity = max(1, capacity)
+        self._text = [np.empty(self._capacity, dtype=object) for _ in TEXT_COLUMNS]
+        self._numbers = [
+            np.empty(self._capacity, dtype=np.float64) for _ in NUMBER_COLUMNS
+        ]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        self._text = [self._resized(column) for column in self._text]
+        self._numbers = [self._resized(column) for column in self._numbers]
+
+    def _resized(self, column: NDArray) -> NDArray:
+        resized = np.empty(self._capacity, dtype=column.dtype)
+        resized[: self._size] = column[: self._size]
+        return resized
+
+    def append(
+        self,
+        object_path: str,
+        object_puic: str,
+        object_name: str,
+        ref_field: str,
+        rail_connection_puic: str,
+        rail_connection_name: str,
+        measure_type: str,
+        imx_measure: float | None,
+        measure_2d: float,
+        measure_3d: float,
+    ) -> None:
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        path, puic, name, field, rc_puic, rc_name, kind = self._text
+        path[i] = object_path
+        puic[i] = object_puic
+        name[i] = object_name
+        field[i] = ref_field
+        rc_puic[i] = rail_connection_puic
+        rc_name[i] = rail_connection_name
+        kind[i] = measure_type
+        imx, calculated_2d, calculated_3d = self._numbers
+        imx[i] = np.nan if imx_measure is None else imx_measure
+        calculated_2d[i] = measure_2d
+        calculated_3d[i] = measure_3d
+        self._size += 1
+
+    def columns(self) -> dict[str, NDArray]:
+        """The columns in `MeasureAnalyseColumns` order, trimmed to the rows."""
+        values = {
+            name: column[: self._size]
+            for name, column in zip(
+                TEXT_COLUMNS + NUMBER_COLUMNS, self._text + self._numbers
+            )
+        }
+        imx = values[MeasureAnalyseColumns.imx_measure.name]
+        measure_2d = values[MeasureAnalyseColumns.calculated_measure_2d.name]
+        measure_3d = values[MeasureAnalyseColumns.calculated_measure_3d.name]
+        values[MeasureAnalyseColumns.abs_imx_vs_3d.name] = np.abs(imx - measure_3d)
+        values[MeasureAnalyseColumns.abs_imx_vs_2d.name] = np.abs(imx - measure_2d)
+        values[MeasureAnalyseColumns.calculated_measure_3d.name] = np.round(
+            measure_3d, 3
+        )
+        return {column.name: values[column.name] for column in MeasureAnalyseColumns}
+
+    def to_records(self) -> list[dict]:
+        """A dict per row, missing measures are None instead of NaN."""
+        columns = self.columns()
+        for name, values in columns.items():
+            if values.dtype == np.float64:
+                missing = np.isnan(values)
+                values = values.astype(object)
+                values[missing] = None
+                columns[name] = values
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+    def to_dataframe(self):
+        """The columns as a pandas DataFrame, without copying them again."""
+        import pandas as pd
+
+        return pd.DataFrame(self.columns(), copy=False)
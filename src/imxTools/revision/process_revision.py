@@ -1,11 +1,13 @@
 import os
+import re
 import sys
+from collections import defaultdict
 from collections.abc import Hashable
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 import pandas as pd
-import xmlschema
 from lxml import etree
 from lxml.etree import _Element
 
@@ -25,29 +27,20 @@ from src.imxTools.revision.revision_enums import (
     RevisionColumns,
     RevisionOperationValues,
 )
-from src.imxTools.settings import config
+from src.imxTools.revision.xsd_registry import XsdSchema, get_schema
 from src.imxTools.utils.custom_logger import logger
 from src.imxTools.utils.exceptions import ErrorList
+from src.imxTools.utils.profiling import pipeline_span, span
+from src.imxTools.utils.progress import ProgressCallback, ProgressReporter
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-IMX_XSD_PATHS = {
-    "1.2.4": "data/xsd-1.2.4/IMSpoor-1.2.4-Communication.xsd",
-    "12.0.0": "data/xsd-12.0.0/IMSpoor-SignalingDesign.xsd",
-}
 XML_NS = "{http://www.prorail.nl/IMSpoor}"
 PuicIndex = dict[str | None, _Element]
 
-
-def _load_xsd(version: str) -> xmlschema.XMLSchema:
-    try:
-        xsd_file = config.ROOT_PATH / IMX_XSD_PATHS[version]
-    except KeyError:
-        raise NotImplementedError(f"IMX version {version} not supported")
-
-    schema = xmlschema.XMLSchema(xsd_file)
-    logger.success(f"Loaded XSD for IMX {version}")
-    return schema
+INDENT = b"  "
+_START_TAG_NAME = re.compile(rb"<([^\s/>]+)")
+_START_TAG_ATTRIBUTE = re.compile(rb'\s+([^\s=/>]+)="([^"]*)"')
 
 
 def normalize_tag(tag: str | bytes | etree.QName) -> str:
@@ -65,15 +58,44 @@ def validate_tag(expected_type: str, element: _Element) -> None:
         raise ValueError(f"Tag mismatch: expected {expected}, got {actual}")
 
 
-def xsd_validate(schema: xmlschema.XMLSchema, element: _Element, change: dict) -> None:
+def xsd_errors(schema: XsdSchema, element: _Element) -> list[str]:
+    if isinstance(schema, etree.XMLSchema):
+        if schema.validate(element):
+            return []
+        return [entry.message for entry in schema.error_log]
+
     xml = etree.tostring(element)
-    errors = list(schema.iter_errors(xml))
+    return [err.reason or "" for err in schema.iter_errors(xml)]
+
+
+def _set_xsd_status(change: dict, errors: list[str]) -> None:
     if errors:
         change["status"] = change.get("status", "processed") + " – XSD invalid"
-        change["xsd_errors"] = "; ".join(err.reason or "" for err in errors)
+        change["xsd_errors"] = "; ".join(errors)
+
+
+def xsd_validate(schema: XsdSchema, element: _Element, change: dict) -> None:
+    errors = xsd_errors(schema, element)
+    _set_xsd_status(change, errors)
+    if errors:
         logger.error(change["xsd_errors"])
 
 
+def _validate_dirty_elements(
+    schema: XsdSchema, dirty: dict[_Element, list[dict[Hashable, Any]]]
+) -> None:
+    """
+    Validates every changed element once, after all its changes are applied, and
+    marks each change row that touched the element with the resulting errors.
+    """
+    for element, element_changes in dirty.items():
+        errors = xsd_errors(schema, element)
+        if errors:
+            logger.error(f"{element.get('puic')}: {'; '.join(errors)}")
+        for change in element_changes:
+            _set_xsd_status(change, errors)
+
+
 def apply_change(
     change: dict[Hashable, Any], element: _Element, puic_index: PuicIndex
 ) -> None:
@@ -172,15 +194,19 @@ def _handle_delete_element(change: dict, element: _Element, _: PuicIndex) -> Non
 def _process_changes(
     changes: list[dict[Hashable, Any]],
     puic_index: PuicIndex,
-    schema: xmlschema.XMLSchema,
+    schema: XsdSchema,
     replace_metadata: bool,
     add_metadata: bool,
     metadata_source: str,
     metadata_origin: str,
     metadata_parents: bool,
     registration_time: str | None,
+    reporter: ProgressReporter | None = None,
 ) -> None:
+    dirty: dict[_Element, list[dict[Hashable, Any]]] = {}
     for change in changes:
+        if reporter is not None:
+            reporter.advance()
         if not change.get(RevisionColumns.will_be_processed.name):
             continue
 
@@ -207,10 +233,205 @@ def _process_changes(
             logger.error(e)
             change["status"] = f"Error: {e}"
         finally:
-            xsd_validate(schema, element, change)
+            dirty.setdefault(element, []).append(change)
 
         logger.success(f"Processed change for PUIC {puic}")
 
+    with span("xsd validation"):
+        _validate_dirty_elements(schema, dirty)
+
+
+@dataclass
+class _StreamContainer:
+    """A puic-less structural element whose start tag is written on first child."""
+
+    element: _Element
+    depth: int
+    qname: bytes = b""
+    opened: bool = False
+
+
+def _strip_inherited_namespaces(xml: bytes, parent: _Element | None) -> bytes:
+    """
+    Removes the namespace declarations lxml repeats on a serialized subtree when
+    they are already in scope from the parent written before.
+    """
+    if parent is None:
+        return xml
+
+    tag_end = xml.index(b">")
+    head, tail = xml[:tag_end], xml[tag_end:]
+    self_closing = head.endswith(b"/")
+    if self_closing:
+        head = head[:-1]
+
+    name = _START_TAG_NAME.match(head)
+    if name is None:
+        return xml
+
+    kept = []
+    for attribute in _START_TAG_ATTRIBUTE.finditer(head, name.end()):
+        key, value = attribute.groups()
+        if key == b"xmlns" or key.startswith(b"xmlns:"):
+            prefix = key[6:].decode() or None
+            if parent.nsmap.get(prefix) == value.decode():
+                continue
+        kept.append(attribute.group(0))
+
+    return head[: name.end()] + b"".join(kept) + (b"/" if self_closing else b"") + tail
+
+
+def _write_node(out: BinaryIO, node: _Element, depth: int) -> None:
+    is_element = isinstance(node.tag, str)
+    if is_element:
+        etree.indent(node, space=INDENT.decode(), level=depth)
+    xml = etree.tostring(node, encoding="UTF-8", with_tail=False)
+    if is_element:
+        xml = _strip_inherited_namespaces(xml, node.getparent())
+    out.write(INDENT * depth + xml)
+    out.write(b"\n")
+
+
+def _flush_detached_siblings(out: BinaryIO, element: _Element, depth: int) -> None:
+    """Writes comments and processing instructions left in front of an element."""
+    parent = element.getparent()
+    if parent is None:
+        return
+    for sibling in list(parent):
+        if sibling is element:
+            break
+        _write_node(out, sibling, depth)
+        parent.remove(sibling)
+
+
+def _open_container(out: BinaryIO, container: _StreamContainer) -> None:
+    if container.opened:
+        return
+
+    element = container.element
+    _flush_detached_siblings(out, element, container.depth)
+
+    shallow = etree.Element(element.tag, dict(element.attrib), nsmap=element.nsmap)
+    start_tag = _strip_inherited_namespaces(
+        etree.tostring(shallow, encoding="UTF-8"), element.getparent()
+    )
+    name = _START_TAG_NAME.match(start_tag)
+    container.qname = name.group(1) if name else b""
+    out.write(INDENT * container.depth + start_tag[:-2] + b">\n")
+    container.opened = True
+
+
+def _close_container(out: BinaryIO, container: _StreamContainer) -> None:
+    element = container.element
+    if not container.opened:
+        _flush_detached_siblings(out, element, container.depth)
+        _write_node(out, element, container.depth)
+        return
+
+    # Comments after the last child are still attached to the container
+    for child in list(element):
+        _write_node(out, child, container.depth + 1)
+        element.remove(child)
+    out.write(INDENT * container.depth + b"</" + container.qname + b">\n")
+
+
+def _process_stream_object(
+    element: _Element,
+    changes: list[dict[Hashable, Any]],
+    change_index: dict[str, list[int]],
+    schema: XsdSchema,
+    reporter: ProgressReporter | None = None,
+    **finalize_kwargs: Any,
+) -> None:
+    """Applies the changes for every targeted puic inside one streamed object."""
+    puic_index: PuicIndex = {
+        el.get("puic"): el
+        for el in element.iter(tag=etree.Element)
+        if el.get("puic") in change_index
+    }
+    if not puic_index:
+        return
+
+    indices = sorted(idx for puic in puic_index for idx in change_index.pop(puic))
+    _process_changes(
+        [changes[idx] for idx in indices],
+        puic_index,
+        schema,
+        reporter=reporter,
+        **finalize_kwargs,
+    )
+
+
+def _stream_process_imx(
+    input_imx: Path,
+    output_imx: Path,
+    changes: list[dict[Hashable, Any]],
+    lxml_validation: bool = False,
+    reporter: ProgressReporter | None = None,
+    **finalize_kwargs: Any,
+) -> None:
+    """
+    Applies the changes while streaming the IMX from input to output.
+
+    Puic-less structural elements (Situation, RailInfrastructure, ...) are written
+    as open and close tags, every puic object under them is kept in memory just
+    until its end tag is parsed, modified if it holds a targeted puic and then
+    written out and dropped. Memory scales with the largest object, not the file.
+    """
+    change_index: dict[str, list[int]] = defaultdict(list)
+    for idx, change in enumerate(changes):
+        if change.get(RevisionColumns.will_be_processed.name):
+            change_index[change.get(RevisionColumns.object_puic.name)].append(idx)
+
+    schema: XsdSchema | None = None
+    containers: list[_StreamContainer] = []
+
+    with open(output_imx, "wb") as out:
+        for event, element in etree.iterparse(
+            str(input_imx), events=("start", "end"), remove_blank_text=True
+        ):
+            parent = element.getparent()
+            is_child_of_container = (
+                bool(containers) and containers[-1].element is parent
+            )
+
+            if event == "start":
+                if parent is None:
+                    schema = get_schema(element.get("imxVersion", ""), lxml_validation)
+                    containers.append(_StreamContainer(element, depth=0))
+                elif is_child_of_container:
+                    _open_container(out, containers[-1])
+                    if element.get("puic") is None:
+                        containers.append(
+                            _StreamContainer(element, depth=len(containers))
+                        )
+                continue
+
+            if containers and containers[-1].element is element:
+                _close_container(out, containers.pop())
+            elif is_child_of_container and schema is not None:
+                _process_stream_object(
+                    element,
+                    changes,
+                    change_index,
+                    schema,
+                    reporter=reporter,
+                    **finalize_kwargs,
+                )
+                if element.getparent() is None:
+                    continue  # deleted by a DeleteObject change
+                _flush_detached_siblings(out, element, len(containers))
+                _write_node(out, element, len(containers))
+            else:
+                continue
+
+            if parent is not None:
+                parent.remove(element)
+
+    for puic, indices in change_index.items():
+        for idx in indices:
+            changes[idx]["status"] = f"object not present: {puic}"
+
 
 def process_imx_revisions(
     input_imx: str | Path,
@@ -223,6 +444,10 @@ def process_imx_revisions(
     metadata_parents: bool = False,
     registration_time: str | None = None,
     verbose: bool = True,
+    streaming: bool = False,
+    lxml_validation: bool = False,
+    profile: bool = False,
+    progress: ProgressCallback | None = None,
 ) -> pd.DataFrame:
     input_imx, input_excel, out_path = _prepare_paths(input_imx, input_excel, out_path)
 
@@ -235,22 +460,7 @@ def process_imx_revisions(
     if verbose:
         print(f"✔ Created output dir: {out_path}")
 
-    parser = etree.XMLParser(remove_blank_text=True)
-    tree = etree.parse(input_imx, parser)
-    root = tree.getroot()
-
-    schema = _load_xsd(root.attrib.get("imxVersion", ""))
-    puic_index = {
-        el.get("puic"): el for el in tree.findall(".//*[@puic]") if el.get("puic")
-    }
-
-    df = _prepare_dataframe(input_excel)
-    changes = df.to_dict(orient="records")
-
-    _process_changes(
-        changes,
-        puic_index,
-        schema,
+    finalize_kwargs: dict[str, Any] = dict(
         replace_metadata=replace_metadata,
         add_metadata=add_metadata,
         metadata_source=metadata_source,
@@ -259,10 +469,72 @@ def process_imx_revisions(
         registration_time=registration_time,
     )
 
-    tree.write(imx_file, encoding="UTF-8", pretty_print=True)
+    with pipeline_span("revisions", out_path, profile):
+        return _process_imx_revisions(
+            input_imx,
+            input_excel,
+            imx_file,
+            log_file,
+            streaming,
+            lxml_validation,
+            progress,
+            **finalize_kwargs,
+        )
+
+
+def _process_imx_revisions(
+    input_imx: Path,
+    input_excel: Path,
+    imx_file: Path,
+    log_file: Path,
+    streaming: bool,
+    lxml_validation: bool,
+    progress: ProgressCallback | None,
+    **finalize_kwargs: Any,
+) -> pd.DataFrame:
+    with span("read excel"):
+        df = _prepare_dataframe(input_excel)
+    changes = df.to_dict(orient="records")
+
+    if streaming:
+        with (
+            span("stream imx"),
+            ProgressReporter(progress, "stream imx", len(changes)) as reporter,
+        ):
+            _stream_process_imx(
+                input_imx,
+                imx_file,
+                changes,
+                lxml_validation,
+                reporter=reporter,
+                **finalize_kwargs,
+            )
+    else:
+        with span("parse imx"):
+            parser = etree.XMLParser(remove_blank_text=True)
+            tree = etree.parse(input_imx, parser)
+            root = tree.getroot()
+
+        with span("load xsd"):
+            schema = get_schema(root.attrib.get("imxVersion", ""), lxml_validation)
+        puic_index = {
+            el.get("puic"): el for el in tree.findall(".//*[@puic]") if el.get("puic")
+        }
+
+        with (
+            span("apply changes"),
+            ProgressReporter(progress, "apply changes", len(changes)) as reporter,
+        ):
+            _process_changes(
+                changes, puic_index, schema, reporter=reporter, **finalize_kwargs
+            )
+
+        with span("write imx"):
+            tree.write(imx_file, encoding="UTF-8", pretty_print=True)
 
     out_df = pd.DataFrame(changes)
-    _save_results(out_df, log_file)
+    with span("write log"):
+        _save_results(out_df, log_file)
     return out_df
 
 
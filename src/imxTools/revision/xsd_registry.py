@@ -0,0 +1,128 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+
+import xmlschema
+from lxml import etree
+
+from src.imxTools.settings import config
+from src.imxTools.utils.custom_logger import logger
+
+IMX_XSD_PATHS = {
+    "1.2.4": "data/xsd-1.2.4/IMSpoor-1.2.4-Communication.xsd",
+    "12.0.0": "data/xsd-12.0.0/IMSpoor-SignalingDesign.xsd",
+}
+XsdSchema = xmlschema.XMLSchema | etree.XMLSchema
+
+_SCHEMAS: dict[str, xmlschema.XMLSchema] = {}
+_SCHEMAS_LOCK = threading.Lock()
+
+# lxml validators keep their error log on the instance, so each thread gets its own
+_LXML_SCHEMAS = threading.local()
+
+
+def xsd_file(version: str) -> Path:
+    try:
+        return config.ROOT_PATH / IMX_XSD_PATHS[version]
+    except KeyError:
+        raise NotImplementedError(f"IMX version {version} not supported")
+
+
+def xsd_hash(version: str) -> str:
+    """
+    Hashes every XSD of the version's schema set, the xmlschema version and the
+    python version, so a pickled schema is only reused when all of them match.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{xmlschema.__version__}|{sys.version_info[:2]}".encode())
+
+    xsd_dir = xsd_file(version).parent
+    for path in sorted(xsd_dir.rglob("*.xsd")):
+        digest.update(path.relative_to(xsd_dir).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _cache_file(version: str) -> Path | None:
+    if config.XSD_CACHE_PATH is None:
+        return None
+    return (
+        Path(config.XSD_CACHE_PATH) / f"imx-{version}-{xsd_hash(version)[:16]}.pickle"
+    )
+
+
+def _read_cached_xsd(cache_file: Path) -> xmlschema.XMLSchema | None:
+    try:
+        with open(cache_file, "rb") as f:
+            schema = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable XSD cache {cache_file}: {e}")
+        return None
+    return schema if isinstance(schema, xmlschema.XMLSchema) else None
+
+
+def _write_cached_xsd(cache_file: Path, schema: xmlschema.XMLSchema) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        for stale in cache_file.parent.glob(f"{cache_file.name.rsplit('-', 1)[0]}-*"):
+            stale.unlink(missing_ok=True)
+
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(schema, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        logger.warning(f"Could not write XSD cache {cache_file}: {e}")
+
+
+def _build_xsd(version: str) -> xmlschema.XMLSchema:
+    cache_file = _cache_file(version)
+    if cache_file is not None:
+        schema = _read_cached_xsd(cache_file)
+        if schema is not None:
+            logger.success(f"Loaded cached XSD for IMX {version}")
+            return schema
+
+    schema = xmlschema.XMLSchema(xsd_file(version))
+    logger.success(f"Loaded XSD for IMX {version}")
+
+    if cache_file is not None:
+        _write_cached_xsd(cache_file, schema)
+    return schema
+
+
+def get_xsd(version: str) -> xmlschema.XMLSchema:
+    """Returns the xmlschema schema for an imxVersion, compiled once per process."""
+    with _SCHEMAS_LOCK:
+        if version not in _SCHEMAS:
+            _SCHEMAS[version] = _build_xsd(version)
+        return _SCHEMAS[version]
+
+
+def get_lxml_xsd(version: str) -> etree.XMLSchema:
+    """Returns the lxml schema for an imxVersion, compiled once per thread."""
+    schemas: dict[str, etree.XMLSchema] = _LXML_SCHEMAS.__dict__
+    if version not in schemas:
+        schemas[version] = etree.XMLSchema(etree.parse(str(xsd_file(version))))
+        logger.success(f"Loaded precompiled lxml XSD for IMX {version}")
+    return schemas[version]
+
+
+def get_schema(version: str, lxml_validation: bool = False) -> XsdSchema:
+    return get_lxml_xsd(version) if lxml_validation else get_xsd(version)
+
+
+def clear_xsd_cache(disk: bool = False) -> None:
+    """Forgets the compiled schemas, and with disk=True also the pickled ones."""
+    with _SCHEMAS_LOCK:
+        _SCHEMAS.clear()
+    _LXML_SCHEMAS.__dict__.clear()
+
+    if disk and config.XSD_CACHE_PATH is not None:
+        for cache_file in Path(config.XSD_CACHE_PATH).glob("imx-*.pickle"):
+            cache_file.unlink(missing_ok=True)
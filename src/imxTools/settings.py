@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from imxInsights.utils.singleton import SingletonMeta
@@ -12,6 +13,34 @@ class Config(metaclass=SingletonMeta):
         self.ROOT_PATH = Path(__file__).resolve().parent.parent
         self.ISSUE_LIST_SHEET_NAME = issue_list_sheet_name
         self.ADD_COMMENTS = add_comments
+        self.CACHE_PATH = (
+            Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "imxTools"
+        )
+        # set to None to compile the XSD schemas on every start
+        self.XSD_CACHE_PATH: Path | None = self.CACHE_PATH / "xsd"
+        # set KM_CACHE_PATH to None to always ask the km service
+        self.KM_CACHE_PATH: Path | None = self.CACHE_PATH / "km_cache.sqlite"
+        self.KM_CACHE_PRECISION = 3
+        self.KM_CACHE_TTL_DAYS: float | None = 30
+        # set KM_SNAPSHOT_PATH to None to rebuild the km data on every start
+        self.KM_SNAPSHOT_PATH: Path | None = self.CACHE_PATH / "km_snapshot.pickle"
+        self.KM_SNAPSHOT_MAX_AGE_DAYS: float | None = 7
+        # estimated memory of parsed IMX files kept in memory, None disables
+        self.IMX_CACHE_MAX_BYTES: int | None = 2 * 1024**3
+        # set to a directory, e.g. CACHE_PATH / "imx", to keep parsed IMX files on disk
+        self.IMX_CACHE_PATH: Path | None = None
+        self.IMX_CACHE_DISK_ENTRIES = 5
+        # write a timing json next to the outputs of every run, see utils/profiling
+        self.PROFILE = os.environ.get("IMXTOOLS_PROFILE", "0") not in ("", "0")
+        # also capture a full profile when profiling: "cprofile" or "pyinstrument"
+        self.PROFILER: str | None = None
+        # background jobs of the GUI, see utils/job_queue
+        self.JOB_RESULTS_PATH: Path = self.CACHE_PATH / "jobs"
+        self.JOB_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+        # estimated memory of all running jobs together, None disables the limit
+        self.JOB_MEMORY_LIMIT_BYTES: int | None = 4 * 1024**3
+        # set to None to keep job results until they are removed
+        self.JOB_RESULT_TTL_DAYS: float | None = 7
 
     def reset(self):
         self.__init__()  # Reset to default values
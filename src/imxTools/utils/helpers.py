@@ -1,11 +1,13 @@
-import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
 
-from imxInsights import ImxContainer, ImxSingleFile
+from imxInsights import ImxSingleFile
 from imxInsights.file.singleFileImx.imxSituationEnum import ImxSituationEnum
 from lxml import etree
 
+from src.imxTools.utils.imx_cache import load_imx
+from src.imxTools.utils.output_bundle import OutputBundle
+
 
 def clear_directory(directory: Path) -> None:
     if directory.exists() and directory.is_dir():
@@ -17,26 +19,39 @@ def clear_directory(directory: Path) -> None:
                 item.rmdir()
 
 
-def load_imxinsights_container_or_file(path: Path, situation: ImxSituationEnum | None):
-    if path.suffix == ".zip":
-        return ImxContainer(path)
-    elif path.suffix == ".xml":
-        if not situation:
-            raise ValueError(f"Situation must be specified for single IMX file: {path}")
-        imx = ImxSingleFile(path)
-        return {
-            ImxSituationEnum.InitialSituation: imx.initial_situation,
-            ImxSituationEnum.NewSituation: imx.new_situation,
-            ImxSituationEnum.Situation: imx.situation,
-        }.get(situation)
-    else:
+def select_situation(imx, situation: ImxSituationEnum | None):
+    """Returns the situation of a parsed ImxSingleFile, a container is returned as is."""
+    if not isinstance(imx, ImxSingleFile):
+        return imx
+    return {
+        ImxSituationEnum.InitialSituation: imx.initial_situation,
+        ImxSituationEnum.NewSituation: imx.new_situation,
+        ImxSituationEnum.Situation: imx.situation,
+    }.get(situation)
+
+
+def load_imx_situations(
+    path: Path, situations: list[ImxSituationEnum | None], use_cache: bool = True
+) -> list:
+    """Parses the IMX once and returns the repo of every requested situation."""
+    if path.suffix not in (".zip", ".xml"):
         raise ValueError(f"Unsupported file type: {path.suffix}")
+    if path.suffix == ".xml" and not all(situations):
+        raise ValueError(f"Situation must be specified for single IMX file: {path}")
+
+    imx = load_imx(path, use_cache)
+    return [select_situation(imx, situation) for situation in situations]
 
 
-def zip_folder(folder: Path, output_zip: Path) -> None:
-    with zipfile.ZipFile(output_zip, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in folder.rglob("*"):
-            zipf.write(file_path, file_path.relative_to(folder))
+def load_imxinsights_container_or_file(
+    path: Path, situation: ImxSituationEnum | None, use_cache: bool = True
+):
+    return load_imx_situations(path, [situation], use_cache)[0]
+
+
+def zip_folder(folder: Path, output_zip: Path, compresslevel: int | None = 6) -> None:
+    with OutputBundle(output_zip, compresslevel) as bundle:
+        bundle.add_folder(folder)
 
 
 def create_timestamp() -> str:
@@ -47,22 +62,62 @@ def ensure_paths(*args):
     return [Path(a) if isinstance(a, str) else a for a in args]
 
 
-def get_situations(xml_path: Path) -> list[ImxSituationEnum]:
-    tree = etree.parse(xml_path)
-    root = tree.getroot()
-    ns = {"ims": "http://www.prorail.nl/IMSpoor"}
-    tag_enum_map = {
-        "Situation": ImxSituationEnum.Situation,
-        "InitialSituation": ImxSituationEnum.InitialSituation,
-        "NewSituation": ImxSituationEnum.NewSituation,
-    }
-
-    found_situations = []
-    for local_tag, enum_value in tag_enum_map.items():
-        found = root.findall(f".//ims:{local_tag}", namespaces=ns)
-        if len(found) == 1:
-            found_situations.append(enum_value)
-        elif len(found) > 1:
-            raise ValueError(f"Found multiple <{local_tag}> tags in a single IMX file.")
+IMSPOOR_NS = "http://www.prorail.nl/IMSpoor"
+SITUATION_TAGS = {
+    f"{{{IMSPOOR_NS}}}Situation": ImxSituationEnum.Situation,
+    f"{{{IMSPOOR_NS}}}InitialSituation": ImxSituationEnum.InitialSituation,
+    f"{{{IMSPOOR_NS}}}NewSituation": ImxSituationEnum.NewSituation,
+}
+
+_SITUATIONS: dict[tuple[str, int, int], list[ImxSituationEnum]] = {}
+_SITUATIONS_MAX_ENTRIES = 1024
+
+
+def _scan_situations(xml_path: Path) -> list[ImxSituationEnum]:
+    # A file holds a Situation, or an InitialSituation optionally followed by a
+    # NewSituation, so the scan stops at the first element that settles which one.
+    found_situations: list[ImxSituationEnum] = []
+    situation_depth = None
+    depth = 0
+
+    with open(xml_path, "rb") as f:
+        for event, element in etree.iterparse(
+            f, events=("start", "end"), huge_tree=True
+        ):
+            if event == "end":
+                depth -= 1
+                element.clear(keep_tail=True)
+                continue
+
+            depth += 1
+            situation = SITUATION_TAGS.get(element.tag)
+            if situation is not None:
+                if situation in found_situations:
+                    raise ValueError(
+                        f"Found multiple <{etree.QName(element).localname}> tags "
+                        f"in a single IMX file."
+                    )
+                found_situations.append(situation)
+                situation_depth = depth
+                if situation != ImxSituationEnum.InitialSituation:
+                    break
+            elif depth == situation_depth:
+                # the sibling after the InitialSituation, there is no NewSituation
+                break
 
     return found_situations
+
+
+def get_situations(xml_path: Path) -> list[ImxSituationEnum]:
+    """
+    Lists the situations of a single IMX file. The result is remembered per path,
+    size and modification time, the scan itself is cheap enough to repeat for a
+    copy of the same file.
+    """
+    stat = xml_path.stat()
+    key = (str(xml_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _SITUATIONS:
+        if len(_SITUATIONS) >= _SITUATIONS_MAX_ENTRIES:
+            del _SITUATIONS[next(iter(_SITUATIONS))]
+        _SITUATIONS[key] = _scan_situations(xml_path)
+    return list(_SITUATIONS[key])
@@ -0,0 +1,209 @@
+"""
+Cache of parsed IMX files.
+
+Parsing a large IMX file with imxInsights takes minutes, while the GUI tools and the
+measure correction flow load the same file again and again. Parsed files are kept in
+memory keyed on the sha256 of their content, evicted least recently used once their
+estimated size exceeds the budget. Single IMX files can also be pickled to disk so a
+later run skips building the objects.
+"""
+
+import functools
+import hashlib
+import io
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import imxInsights
+from imxInsights import ImxContainer, ImxSingleFile
+from lxml import etree
+
+from src.imxTools.settings import config
+from src.imxTools.utils.custom_logger import logger
+
+# rough size of a parsed imxInsights repo relative to the size of its xml
+PARSED_SIZE_FACTOR = 20
+DISK_FORMAT = 1
+
+ParsedImx = ImxSingleFile | ImxContainer
+
+_CACHE: OrderedDict[str, tuple[ParsedImx, int]] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_KEY_LOCKS: dict[str, threading.Lock] = {}
+
+
+@functools.lru_cache(maxsize=64)
+def _file_hash(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    """sha256 of the file content, only recomputed when the file changes."""
+    stat = os.stat(path)
+    return _file_hash(str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+class _ImxPickler(pickle.Pickler):
+    """Stores every lxml tree once as xml and its elements as document order index."""
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._trees: dict[int, tuple[int, etree._Element, dict]] = {}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, etree._ElementTree):
+            kind, root = "tree", obj.getroot()
+        elif isinstance(obj, etree._Element):
+            kind, root = "element", obj.getroottree().getroot()
+        else:
+            return None
+
+        source = None
+        if id(root) not in self._trees:
+            tree = root.getroottree()
+            source = (
+                etree.tostring(tree, xml_declaration=True, encoding="UTF-8"),
+                tree.docinfo.URL,
+            )
+            index = {element: i for i, element in enumerate(root.iter())}
+            self._trees[id(root)] = (len(self._trees), root, index)
+
+        tree_idx, _, index = self._trees[id(root)]
+        return kind, tree_idx, index[obj] if kind == "element" else None, source
+
+
+class _ImxUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self._trees: list[tuple[etree._ElementTree, list]] = []
+
+    def persistent_load(self, pid):
+        kind, tree_idx, element_idx, source = pid
+        if source is not None:
+            xml, url = source
+            parser = etree.XMLParser(huge_tree=True)
+            tree = etree.parse(io.BytesIO(xml), parser, base_url=url)
+            self._trees.append((tree, list(tree.getroot().iter())))
+
+        tree, elements = self._trees[tree_idx]
+        return tree if kind == "tree" else elements[element_idx]
+
+
+def _disk_file(key: str) -> Path | None:
+    if config.IMX_CACHE_PATH is None:
+        return None
+    return (
+        Path(config.IMX_CACHE_PATH)
+        / f"{key[:32]}-{DISK_FORMAT}-{imxInsights.__version__}.pickle"
+    )
+
+
+def _read_disk(key: str) -> ParsedImx | None:
+    disk_file = _disk_file(key)
+    if disk_file is None or not disk_file.exists():
+        return None
+    try:
+        with open(disk_file, "rb") as f:
+            imx = _ImxUnpickler(f).load()
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable IMX cache {disk_file}: {e}")
+        return None
+    os.utime(disk_file)
+    logger.success(f"Loaded cached IMX {disk_file.name}")
+    return imx
+
+
+def _write_disk(key: str, imx: ParsedImx) -> None:
+    disk_file = _disk_file(key)
+    if disk_file is None:
+        return
+    tmp_file = disk_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        disk_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, "wb") as f:
+            _ImxPickler(f).dump(imx)
+        os.replace(tmp_file, disk_file)
+    except Exception as e:
+        logger.warning(f"Could not write IMX cache {disk_file}: {e}")
+        tmp_file.unlink(missing_ok=True)
+        return
+
+    cached = sorted(
+        disk_file.parent.glob("*.pickle"), key=lambda p: p.stat().st_mtime, reverse=True
+    )
+    for stale in cached[config.IMX_CACHE_DISK_ENTRIES :]:
+        stale.unlink(missing_ok=True)
+
+
+def _remember(key: str, imx: ParsedImx, size: int) -> None:
+    max_bytes = config.IMX_CACHE_MAX_BYTES
+    if not max_bytes or size > max_bytes:
+        return
+
+    with _CACHE_LOCK:
+        _CACHE[key] = (imx, size)
+        _CACHE.move_to_end(key)
+        while sum(size for _, size in _CACHE.values()) > max_bytes:
+            evicted, _ = _CACHE.popitem(last=False)
+            logger.info(f"Evicted parsed IMX {evicted[:12]} from cache")
+
+
+def _parse(path: Path) -> ParsedImx:
+    if path.suffix == ".zip":
+        return ImxContainer(path)
+    return ImxSingleFile(path)
+
+
+def load_imx(path: Path, use_cache: bool = True) -> ParsedImx:
+    """
+    Returns the parsed ImxContainer (.zip) or ImxSingleFile (.xml) of the path, from
+    cache when the same content was parsed before. Cached objects are shared between
+    callers; pass use_cache=False for a private copy to modify.
+    """
+    path = Path(path)
+    if not use_cache:
+        return _parse(path)
+
+    key = f"{file_hash(path)}{path.suffix.lower()}"
+    with _CACHE_LOCK:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            logger.info(f"Using cached parse of {path.name}")
+            return _CACHE[key][0]
+        key_lock = _KEY_LOCKS.setdefault(key, threading.Lock())
+
+    # one thread parses, others loading the same content wait for its result
+    with key_lock:
+        with _CACHE_LOCK:
+            if key in _CACHE:
+                return _CACHE[key][0]
+
+        # containers keep the path of their extracted zip, only files go to disk
+        imx = _read_disk(key) if path.suffix == ".xml" else None
+        if imx is None:
+            imx = _parse(path)
+            if path.suffix == ".xml":
+                _write_disk(key, imx)
+
+        _remember(key, imx, path.stat().st_size * PARSED_SIZE_FACTOR)
+
+    with _CACHE_LOCK:
+        _KEY_LOCKS.pop(key, None)
+    return imx
+
+
+def clear_imx_cache(disk: bool = False) -> None:
+    """Forgets the parsed IMX files, and with disk=True also the pickled ones."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+    if disk and config.IMX_CACHE_PATH is not None:
+        for cache_file in Path(config.IMX_CACHE_PATH).glob("*.pickle"):
+            cache_file.unlink(missing_ok=True)
@@ -0,0 +1,418 @@
+"""
+Background jobs of the GUI.
+
+Heavy work runs in worker processes instead of threads of the web server, at most
+`config.JOB_WORKERS` at a time. A job is admitted when its estimated memory fits
+next to the running jobs within `config.JOB_MEMORY_LIMIT_BYTES`, the others wait in
+submit order. Every job owns a folder below `config.JOB_RESULTS_PATH` with its
+outputs, the result to download and a job.json, so a result can be downloaded
+again after the page, or the app, was closed.
+
+    queue = get_job_queue()
+    job = queue.submit("diff", run_diff, "diff.zip", estimate_memory(t1, t2),
+                       t1=t1, t2=t2)
+    await queue.wait(job)
+"""
+
+import asyncio
+import inspect
+import json
+import multiprocessing
+import queue
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+
+from src.imxTools.settings import config
+from src.imxTools.utils.custom_logger import logger
+from src.imxTools.utils.output_bundle import OutputBundle
+from src.imxTools.utils.profiling import profile_run
+from src.imxTools.utils.progress import Progress
+
+# in memory size of parsed inputs relative to their (uncompressed) size on disk
+MEMORY_PER_INPUT_BYTE = 20
+
+
+class JobState(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+    cancelled = "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobState.done, JobState.failed, JobState.cancelled)
+
+
+def estimate_memory(*paths: Path | None) -> int:
+    """Estimated peak memory in bytes of a job reading the given input files."""
+    size = 0
+    for path in paths:
+        if path is None or not Path(path).is_file():
+            continue
+        path = Path(path)
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                size += sum(info.file_size for info in zf.infolist())
+        else:
+            size += path.stat().st_size
+    return size * MEMORY_PER_INPUT_BYTE
+
+
+@dataclass
+class BackgroundJob:
+    id: str
+    name: str
+    folder: Path
+    download_name: str
+    # the zip of the output folder or the single output file
+    result: Path
+    estimated_bytes: int = 0
+    state: JobState = JobState.queued
+    stage: str = ""
+    error: str = ""
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    # latest progress reported by the worker, not persisted
+    progress: Progress | None = None
+
+    @property
+    def output(self) -> Path:
+        return self.folder / "output"
+
+    @property
+    def seconds(self) -> float | None:
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "download_name": self.download_name,
+            "result": self.result.relative_to(self.folder).as_posix(),
+            "estimated_bytes": self.estimated_bytes,
+            "state": self.state.value,
+            "stage": self.stage,
+            "error": self.error,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+    @classmethod
+    def from_dict(cls, folder: Path, data: dict) -> "BackgroundJob":
+        data = dict(data)
+        data["result"] = folder / data["result"]
+        data["state"] = JobState(data["state"])
+        return cls(folder=folder, **data)
+
+
+def _run(
+    job_id: str,
+    name: str,
+    fn: Callable[..., None],
+    kwargs: dict,
+    bundle: Path | None,
+    events: multiprocessing.Queue,
+) -> None:
+    # runs in the worker process, reports back through the events queue
+    out = Path(kwargs["out"])
+    profile_dir = out.parent if bundle is None else out
+    if "progress" in inspect.signature(fn).parameters:
+        # throttled by the reporters already, every call is worth sending
+        kwargs["progress"] = lambda progress: events.put((job_id, "progress", progress))
+    try:
+        with profile_run(
+            name,
+            profile_dir if config.PROFILE else None,
+            config.PROFILER if config.PROFILE else None,
+            on_span=lambda stage: events.put((job_id, "stage", stage)),
+        ):
+            fn(**kwargs)
+        if bundle is not None:
+            events.put((job_id, "stage", "bundle"))
+            with OutputBundle(bundle) as output_bundle:
+                output_bundle.add_folder(out)
+        events.put((job_id, "done", ""))
+    except Exception as e:
+        events.put((job_id, "failed", str(e) or type(e).__name__))
+
+
+class JobQueue:
+    """
+    Runs submitted jobs in spawned worker processes.
+
+    Args:
+        folder: Folder for the job folders, default config.JOB_RESULTS_PATH.
+        workers: Maximum number of jobs running at once, default config.JOB_WORKERS.
+
+    A job estimated above config.JOB_MEMORY_LIMIT_BYTES on its own still runs, but
+    only when no other job runs.
+    """
+
+    def __init__(self, folder: Path | None = None, workers: int | None = None):
+        self.folder = Path(folder or config.JOB_RESULTS_PATH)
+        self.workers = max(1, workers or config.JOB_WORKERS)
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        self._lock = threading.Lock()
+        self._jobs: dict[str, BackgroundJob] = {}
+        # job id, function, kwargs and bundle path of the jobs not started yet
+        self._pending: list[tuple[str, Callable[..., None], dict, Path | None]] = []
+        # the running processes with the estimated bytes they were admitted with
+        self._processes: dict[str, tuple[multiprocessing.Process, int]] = {}
+        # folders of removed jobs, deleted once their process is joined
+        self._removed: dict[str, Path] = {}
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._load()
+
+    def _load(self) -> None:
+        """Picks up the jobs of earlier runs and removes the expired ones."""
+        if not self.folder.exists():
+            return
+        max_age = (
+            config.JOB_RESULT_TTL_DAYS * 86400
+            if config.JOB_RESULT_TTL_DAYS is not None
+            else None
+        )
+        for job_file in self.folder.glob("*/job.json"):
+            try:
+                job = BackgroundJob.from_dict(
+                    job_file.parent, json.loads(job_file.read_text(encoding="utf-8"))
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping job {job_file.parent.name}: {e}")
+                continue
+            if max_age is not None and time.time() - job.submitted > max_age:
+                shutil.rmtree(job.folder, ignore_errors=True)
+                continue
+            if not job.state.finished:
+                job.state = JobState.failed
+                job.error = "interrupted, the app stopped while the job ran"
+                self._save(job)
+            self._jobs[job.id] = job
+
+    @staticmethod
+    def _save(job: BackgroundJob) -> None:
+        (job.folder / "job.json").write_text(
+            json.dumps(job.to_dict(), indent=2), encoding="utf-8"
+        )
+
+    def submit(
+        self,
+        name: str,
+        fn: Callable[..., None],
+        download_name: str,
+        estimated_bytes: int = 0,
+        output_file: str | None = None,
+        **kwargs,
+    ) -> BackgroundJob:
+        """
+        Queues `fn(out=..., **kwargs)`, fn must be importable by the worker process.
+
+        Without output_file, fn gets the output folder as `out` and the folder is
+        zipped to download_name when fn is done. With output_file, fn gets that file
+        in the output folder and the file is the result.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        folder = self.folder / job_id
+        if output_file:
+            result = folder / "output" / output_file
+            bundle = None
+        else:
+            result = bundle = folder / download_name
+        job = BackgroundJob(
+            job_id, name, folder, download_name, result, estimated_bytes
+        )
+        job.output.mkdir(parents=True)
+        kwargs["out"] = result if output_file else job.output
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job queue is shut down")
+            self._jobs[job.id] = job
+            self._pending.append((job.id, fn, kwargs, bundle))
+            self._save(job)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="imxtools-jobs", daemon=True
+                )
+                self._thread.start()
+        return job
+
+    def get(self, job_id: str) -> BackgroundJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[BackgroundJob]:
+        """All known jobs, the most recent first."""
+        return sorted(self._jobs.values(), key=lambda job: job.submitted, reverse=True)
+
+    def position(self, job: BackgroundJob) -> int | None:
+        """Number of jobs waiting before a queued job, None when not queued."""
+        with self._lock:
+            for idx, entry in enumerate(self._pending):
+                if entry[0] == job.id:
+                    return idx
+        return None
+
+    async def wait(self, job: BackgroundJob, interval: float = 0.25) -> BackgroundJob:
+        while not job.state.finished:
+            await asyncio.sleep(interval)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job, returns False when it already finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state.finished:
+                return False
+            self._pending = [entry for entry in self._pending if entry[0] != job_id]
+            if job_id in self._processes:
+                # _reap joins it once it stopped, the caller does not wait for it
+                self._processes[job_id][0].terminate()
+            self._finish(job, JobState.cancelled)
+        return True
+
+    def remove(self, job_id: str) -> None:
+        """
+        Cancels the job if needed and deletes its folder. The folder of a job whose
+        process still stops is deleted by `_reap` once the process is joined.
+        """
+        self.cancel(job_id)
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None and job_id in self._processes:
+                self._removed[job_id] = job.folder
+                return
+        if job is not None:
+            shutil.rmtree(job.folder, ignore_errors=True)
+
+    def shutdown(self) -> None:
+        """Stops the running jobs, queued jobs are marked failed on the next start."""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            processes = [process for process, _ in self._processes.values()]
+            self._processes.clear()
+            for process in processes:
+                process.terminate()
+        for process in processes:
+            process.join(5)
+
+    def _finish(self, job: BackgroundJob, state: JobState, error: str = "") -> None:
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        self._save(job)
+
+    def _drain(self, timeout: float) -> list[tuple]:
+        """The events sent so far, waits up to timeout for the first one."""
+        events = []
+        try:
+            events.append(self._events.get(timeout=timeout))
+            while True:
+                events.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def _loop(self) -> None:
+        while True:
+            events = self._drain(0.2)
+            with self._lock:
+                if self._closed:
+                    return
+                try:
+                    for event in events:
+                        self._apply(*event)
+                    self._reap()
+                    self._start_admitted()
+                except Exception:
+                    # one bad event or job must not stop the scheduling of the others
+                    logger.exception("Job queue step failed")
+
+    def _apply(self, job_id: str, kind: str, value: str | Progress) -> None:
+        job = self._jobs.get(job_id)
+        # late events of cancelled or removed jobs
+        if job is None or job.state.finished:
+            return
+        if kind == "stage":
+            job.stage = value
+        elif kind == "progress":
+            job.progress = value
+        elif kind == "done":
+            self._finish(job, JobState.done)
+        else:
+            self._finish(job, JobState.failed, value)
+
+    def _reap(self) -> None:
+        for job_id, (process, _) in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self._processes[job_id]
+            if job_id in self._removed:
+                shutil.rmtree(self._removed.pop(job_id), ignore_errors=True)
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            if not job.state.finished:
+                # the worker may have sent its last event after the events were
+                # read, a process that stopped flushed its events already
+                for event in self._drain(0.5):
+                    self._apply(*event)
+            if not job.state.finished:
+                # killed without reporting, e.g. by the OOM killer
+                self._finish(
+                    job,
+                    JobState.failed,
+                    f"worker stopped with exit code {process.exitcode}",
+                )
+
+    def _start_admitted(self) -> None:
+        limit = config.JOB_MEMORY_LIMIT_BYTES
+        used = sum(estimated for _, estimated in self._processes.values())
+        while self._pending and len(self._processes) < self.workers:
+            job_id, fn, kwargs, bundle = self._pending[0]
+            job = self._jobs[job_id]
+            if (
+                self._processes
+                and limit is not None
+                and used + job.estimated_bytes > limit
+            ):
+                # keep the submit order, a big job is not overtaken by small ones
+                return
+            self._pending.pop(0)
+            process = self._context.Process(
+                target=_run,
+                args=(job_id, job.name, fn, kwargs, bundle, self._events),
+                name=f"imxtools-job-{job.name}",
+            )
+            process.start()
+            self._processes[job_id] = (process, job.estimated_bytes)
+            used += job.estimated_bytes
+            job.state = JobState.running
+            job.started = time.time()
+            self._save(job)
+
+
+JOB_QUEUE: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """The job queue of the app, created on first use."""
+    global JOB_QUEUE
+    if JOB_QUEUE is None:
+        JOB_QUEUE = JobQueue()
+    return JOB_QUEUE
@@ -1,10 +1,15 @@
 import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import xlsxwriter
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 from shapely import Point
 
+from src.imxTools.utils.progress import ProgressCallback, ProgressReporter
+
 
 class KmExcelProcessor:
     """
@@ -22,49 +27,260 @@ class KmExcelProcessor:
     - Transition format: `"x1,y1 -> x2,y2"`
     - Added/removed point formats: `"++x,y"` or `"--x,y"`
 
+    In two-phase mode (the default) all unique points of all sheets are collected
+    first and resolved once through a thread pool, after that the rows are written
+    from those results. Points are keyed on coordinates rounded to `precision`
+    decimals, so rows sharing a point (like unchanged `"x -> x"` rows) cost nothing
+    extra. Resolved points are kept in a bounded LRU for the processor's lifetime.
+
+    In streaming mode the input is read with openpyxl `read_only` and the output is
+    written row by row with xlsxwriter `constant_memory`, so memory stays flat with
+    the row count. Cell values (and formulas) are copied, cell styles are not.
+
     Args:
         km_service: An object with a `get_km(x, y)` method that returns km measure data for given coordinates.
         use_simple: If True, writes one column per km value using its display string.
                     If False, writes three columns per km value (hm, meters, name).
+        two_phase: If False, calls `get_km` per coordinate per row while writing.
+        max_workers: Number of threads resolving the unique points.
+        cache_size: Maximum number of resolved points kept in the LRU.
+        precision: Number of decimals the RD coordinates are rounded to.
+        streaming: If True, streams the workbook instead of editing it in memory.
+                   Always resolves in two phases.
     """
 
-    def __init__(self, km_service, use_simple: bool = True):
+    def __init__(
+        self,
+        km_service,
+        use_simple: bool = True,
+        two_phase: bool = True,
+        max_workers: int = 4,
+        cache_size: int = 100_000,
+        precision: int = 3,
+        streaming: bool = False,
+    ):
         self.km_service = km_service
         self.use_simple = use_simple
+        self.two_phase = two_phase
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.precision = precision
+        self.streaming = streaming
+        self._km_cache: OrderedDict[tuple[float, float], object] = OrderedDict()
+
+    def process(
+        self,
+        input_path: Path,
+        output_path: Path,
+        progress: ProgressCallback | None = None,
+    ):
+        """`progress` is called with the km lookups and the rows written so far."""
+        if self.streaming:
+            self._process_streaming(input_path, output_path, progress)
+            return
 
-    def process(self, input_path: Path, output_path: Path):
         wb = load_workbook(filename=input_path)
 
+        sheets = []
         for sheet in wb.worksheets:
             gml_columns = self._detect_gml_columns(sheet)
-            if not gml_columns:
-                continue
+            if gml_columns:
+                sheets.append((sheet, gml_columns))
+
+        resolved = None
+        if self.two_phase:
+            resolved = self.resolve_points(
+                self._collect_unique_points(sheets), progress
+            )
 
+        rows = sum(sheet.max_row - 1 for sheet, _ in sheets)
+        reporter = ProgressReporter(progress, "write rows", rows)
+        for sheet, gml_columns in sheets:
             column_map = {}
             next_col = sheet.max_column + 1
 
             for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-                km_data = self._collect_km_measures_for_row(row, gml_columns)
+                reporter.advance()
+                km_data = self._collect_km_measures_for_row(row, gml_columns, resolved)
 
                 next_col = self._write_km_measures_to_row(
                     sheet, row[0].row, km_data, column_map, next_col
                 )
+        reporter.finish()
 
         self._autosize_autofilter_columns(wb)
         wb.save(output_path)
 
     def _detect_gml_columns(self, sheet):
         gml_cols = {}
-        for col in sheet.iter_cols(1, sheet.max_column):
-            header = str(col[0].value)
+        header_row = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        for col_idx, value in enumerate(header_row, start=1):
+            header = str(value)
             if header and header.endswith("Point.gml:coordinates"):
-                gml_cols[header] = col[0].column
+                gml_cols[header] = col_idx
         return gml_cols
 
-    def _collect_km_measures_for_row(self, row, gml_columns):
+    def _process_streaming(
+        self,
+        input_path: Path,
+        output_path: Path,
+        progress: ProgressCallback | None = None,
+    ):
+        """
+        Three read-only passes per workbook: collect and resolve the unique points,
+        count the km columns every sheet needs, then write every row exactly once
+        with the km columns appended, tracking the column widths along the way.
+        """
+        wb_in = load_workbook(filename=input_path, read_only=True)
+        wb_out = xlsxwriter.Workbook(
+            str(output_path),
+            {
+                "constant_memory": True,
+                "strings_to_urls": False,
+                "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            },
+        )
+        try:
+            sheets = [(sheet, self._detect_gml_columns(sheet)) for sheet in wb_in]
+            resolved = self.resolve_points(
+                self._collect_unique_points([s for s in sheets if s[1]]), progress
+            )
+
+            for sheet, gml_columns in sheets:
+                self._stream_sheet(sheet, gml_columns, resolved, wb_out, progress)
+        finally:
+            wb_out.close()
+            wb_in.close()
+
+    def _stream_sheet(self, sheet, gml_columns, resolved, wb_out, progress=None):
+        lint_count = 0
+        if gml_columns:
+            for row in sheet.iter_rows(min_row=2):
+                km_data = self._collect_km_measures_for_row(row, gml_columns, resolved)
+                lint_count = max(lint_count, len(km_data["old"]), len(km_data["new"]))
+
+        keys = [(i, version) for i in range(lint_count) for version in ("old", "new")]
+        km_headers = []
+        for lint_index, version in keys:
+            name = f"km_{lint_index + 1}_{version}"
+            km_headers.extend(
+                [name]
+                if self.use_simple
+                else [f"{name}_hm", f"{name}_m", f"{name}_name"]
+            )
+
+        ws_out = wb_out.add_worksheet(sheet.title)
+        sheet.calculate_dimension(force=True)  # scans only if the file has no size
+        column_count = sheet.max_column or 0
+        widths: list[int] = []
+        row_idx = -1
+
+        reporter = ProgressReporter(progress, f"write {sheet.title}", sheet.max_row)
+        for row_idx, row in enumerate(sheet.iter_rows()):
+            reporter.advance()
+            values = [cell.value for cell in row[:column_count]]
+            values.extend([None] * (column_count - len(values)))
+
+            if row_idx == 0:
+                values.extend(km_headers)
+            elif gml_columns:
+                km_data = self._collect_km_measures_for_row(row, gml_columns, resolved)
+                values.extend(self._km_row_values(km_data, keys))
+
+            for col_idx, value in enumerate(values):
+                if col_idx >= len(widths):
+                    widths.append(0)
+                if value is None or value == "":
+                    continue
+                ws_out.write(row_idx, col_idx, value)
+                if value:
+                    widths[col_idx] = max(widths[col_idx], len(str(value)))
+
+        reporter.finish()
+
+        for col_idx, width in enumerate(widths):
+            ws_out.set_column(col_idx, col_idx, width + 2)
+        if widths:
+            ws_out.autofilter(0, 0, max(row_idx, 0), len(widths) - 1)
+
+    def _km_row_values(self, km_data, keys):
+        """Flattens a row's km measures in column order, leaving unused lints empty."""
+        max_lints = max(len(km_data["old"]), len(km_data["new"]))
+        values = []
+        for lint_index, version in keys:
+            if lint_index >= max_lints:
+                values.extend([None] if self.use_simple else [None, None, None])
+                continue
+            measures = km_data[version]
+            km_measure = measures[lint_index] if lint_index < len(measures) else None
+            if self.use_simple:
+                values.append(self._format_simple(km_measure))
+            else:
+                values.extend(self._format_detailed(km_measure))
+        return values
+
+    def _point_key(self, point: Point) -> tuple[float, float]:
+        return round(point.x, self.precision), round(point.y, self.precision)
+
+    def _collect_unique_points(self, sheets) -> list[tuple[float, float]]:
+        """Phase one: the rounded keys of every parsable point in every sheet."""
+        keys: dict[tuple[float, float], None] = {}
+        for sheet, gml_columns in sheets:
+            for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
+                for col_idx in gml_columns.values():
+                    if col_idx > len(row):
+                        continue
+                    gml_value = row[col_idx - 1].value
+                    if not gml_value:
+                        continue
+                    for point in self._parse_gml_coordinates(str(gml_value)):
+                        if point:
+                            keys[self._point_key(point)] = None
+        return list(keys)
+
+    def _lookup_km(self, key: tuple[float, float]):
+        try:
+            return self.km_service.get_km(*key)
+        except Exception as e:
+            return e
+
+    def resolve_points(
+        self,
+        keys: list[tuple[float, float]],
+        progress: ProgressCallback | None = None,
+    ) -> dict:
+        """
+        Resolves rounded RD coordinates to km results, reusing the LRU and looking
+        up the missing ones concurrently. Failed lookups map to their exception.
+        """
+        resolved = {}
+        missing = []
+        for key in keys:
+            if key in self._km_cache:
+                self._km_cache.move_to_end(key)
+                resolved[key] = self._km_cache[key]
+            else:
+                missing.append(key)
+
+        if missing:
+            reporter = ProgressReporter(progress, "km lookups", len(missing))
+            with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+                for key, result in zip(missing, executor.map(self._lookup_km, missing)):
+                    reporter.advance()
+                    resolved[key] = result
+                    self._km_cache[key] = result
+                    if len(self._km_cache) > self.cache_size:
+                        self._km_cache.popitem(last=False)
+            reporter.finish()
+
+        return resolved
+
+    def _collect_km_measures_for_row(self, row, gml_columns, resolved=None):
         results = {"old": [], "new": []}
 
         for _, col_idx in gml_columns.items():
+            if col_idx > len(row):
+                continue
             gml_value = row[col_idx - 1].value
             if not gml_value:
                 continue
@@ -75,7 +291,12 @@ class KmExcelProcessor:
                 if not point:
                     continue
                 try:
-                    km_result = self.km_service.get_km(point.x, point.y)
+                    if resolved is None:
+                        km_result = self.km_service.get_km(point.x, point.y)
+                    else:
+                        km_result = resolved[self._point_key(point)]
+                        if isinstance(km_result, Exception):
+                            raise km_result
                     if km_result and km_result.km_measures:
                         results[version].extend(km_result.km_measures)
                     else:
@@ -0,0 +1,293 @@
+"""
+Persistent KM lookup cache.
+
+Resolved KM responses are stored in SQLite, keyed on the RD coordinate rounded to a
+configurable precision and on a fingerprint of the loaded km dataset, so results
+survive GUI sessions and are dropped as soon as the km data changes. The km lint of
+every measure is stored once in its own table instead of once per point.
+"""
+
+import dataclasses
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from src.imxTools.settings import config
+from src.imxTools.utils.custom_logger import logger
+
+SCHEMA_VERSION = 1
+
+
+def km_data_version(km_service) -> str:
+    """Fingerprints the kmService version and the km lints the service has loaded."""
+    import kmService
+
+    digest = hashlib.sha256(f"{SCHEMA_VERSION}|{kmService.__version__}".encode())
+    value_objects = getattr(km_service, "_value_objects_dict", {}) or {}
+    for key in sorted(value_objects):
+        value_object = value_objects[key]
+        km_lint = value_object.km_lint
+        digest.update(
+            f"{key}|{km_lint.puic}|{km_lint.km_from}|{km_lint.km_to}|"
+            f"{len(value_object.km_raaien)}|{value_object.geometry.bounds}".encode()
+        )
+    return digest.hexdigest()[:16]
+
+
+@dataclasses.dataclass
+class KmCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stored: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class KmCache:
+    """
+    SQLite store for KM responses of one km data version.
+
+    Args:
+        path: The SQLite file, created when missing.
+        data_version: Fingerprint of the km dataset, see `km_data_version`.
+        precision: Number of decimals the RD coordinates are rounded to.
+        ttl_days: Entries older than this are treated as missing, None keeps them.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        data_version: str,
+        precision: int = 3,
+        ttl_days: float | None = 30,
+    ):
+        self.path = Path(path)
+        self.data_version = data_version
+        self.precision = precision
+        self.ttl_seconds = ttl_days * 86400 if ttl_days is not None else None
+        self.stats = KmCacheStats()
+        self._lints: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS points (version TEXT, precision INTEGER, "
+                "x INTEGER, y INTEGER, created REAL, data BLOB, "
+                "PRIMARY KEY (version, precision, x, y))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS lints (version TEXT, puic TEXT, data BLOB, "
+                "PRIMARY KEY (version, puic))"
+            )
+            # drop everything resolved with another km dataset
+            connection.execute("DELETE FROM points WHERE version != ?", (data_version,))
+            connection.execute("DELETE FROM lints WHERE version != ?", (data_version,))
+
+    def key(self, x: float, y: float) -> tuple[int, int]:
+        scale = 10**self.precision
+        return round(x * scale), round(y * scale)
+
+    def get(self, x: float, y: float):
+        """Returns the cached KmResponse for the point, or None on a miss."""
+        key_x, key_y = self.key(x, y)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT created, data FROM points "
+                "WHERE version = ? AND precision = ? AND x = ? AND y = ?",
+                (self.data_version, self.precision, key_x, key_y),
+            ).fetchone()
+
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            created, data = row
+            if (
+                self.ttl_seconds is not None
+                and time.time() - created > self.ttl_seconds
+            ):
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+
+            response = pickle.loads(data)
+            for measure in response.km_measures:
+                km_lint = self._load_lint(measure.km_lint.puic)
+                if km_lint is None:
+                    # lint row missing, e.g. an interrupted warm-up
+                    self.stats.misses += 1
+                    return None
+                measure.km_lint = km_lint
+            self.stats.hits += 1
+            return response
+
+    def contains(self, x: float, y: float) -> bool:
+        """
+        Whether an unexpired entry is stored for the point. Only checks the key, the
+        response is not loaded and the stats are not counted.
+        """
+        key_x, key_y = self.key(x, y)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT created FROM points "
+                "WHERE version = ? AND precision = ? AND x = ? AND y = ?",
+                (self.data_version, self.precision, key_x, key_y),
+            ).fetchone()
+        return row is not None and (
+            self.ttl_seconds is None or time.time() - row[0] <= self.ttl_seconds
+        )
+
+    def put(self, x: float, y: float, response) -> None:
+        key_x, key_y = self.key(x, y)
+        stripped = dataclasses.replace(response, km_measures=[])
+        lints = {}
+        for measure in response.km_measures:
+            lints[measure.km_lint.puic] = measure.km_lint
+            stripped.km_measures.append(
+                dataclasses.replace(
+                    measure,
+                    km_lint=type(measure.km_lint)(puic=measure.km_lint.puic),
+                )
+            )
+
+        with self._lock, self._connection as connection:
+            for puic, km_lint in lints.items():
+                if puic not in self._lints:
+                    connection.execute(
+                        "INSERT OR IGNORE INTO lints VALUES (?, ?, ?)",
+                        (self.data_version, puic, pickle.dumps(km_lint)),
+                    )
+                    self._lints[puic] = km_lint
+            connection.execute(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.data_version,
+                    self.precision,
+                    key_x,
+                    key_y,
+                    time.time(),
+                    pickle.dumps(stripped),
+                ),
+            )
+            self.stats.stored += 1
+
+    def _load_lint(self, puic: str):
+        """The stored km lint, None when it is not in the cache."""
+        if puic not in self._lints:
+            row = self._connection.execute(
+                "SELECT data FROM lints WHERE version = ? AND puic = ?",
+                (self.data_version, puic),
+            ).fetchone()
+            if row is None:
+                return None
+            self._lints[puic] = pickle.loads(row[0])
+        return self._lints[puic]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM points WHERE version = ?", (self.data_version,)
+            ).fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._connection as connection:
+            connection.execute("DELETE FROM points")
+            connection.execute("DELETE FROM lints")
+            self._lints.clear()
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class CachedKmService:
+    """
+    Wraps a KmService so `get_km` and `get_km_batch` are answered from the
+    persistent cache when possible. Everything else is passed to the service.
+    """
+
+    def __init__(self, km_service, cache: KmCache):
+        self._service = km_service
+        self.cache = cache
+
+    def __getattr__(self, name: str):
+        return getattr(self._service, name)
+
+    def get_km(self, x: float, y: float):
+        # the rounded point is only the cache key, the service gets the exact point
+        response = self.cache.get(x, y)
+        if response is None:
+            response = self._service.get_km(x, y)
+            self.cache.put(x, y, response)
+        return response
+
+    def get_km_batch(self, point_list: list[list[int | float]]) -> list:
+        return [self.get_km(point[0], point[1]) for point in point_list]
+
+    def warm_up(
+        self, points: Iterable[tuple[float, float]], max_workers: int = 4
+    ) -> int:
+        """Resolves and stores every point that is not cached yet, returns how many."""
+        unique: dict[tuple[int, int], tuple[float, float]] = {}
+        for x, y in points:
+            unique.setdefault(self.cache.key(x, y), (x, y))
+        missing = [
+            point for point in unique.values() if not self.cache.contains(*point)
+        ]
+
+        def resolve(point: tuple[float, float]) -> None:
+            self.cache.put(*point, self._service.get_km(*point))
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            list(executor.map(resolve, missing))
+        logger.info(f"KM cache warm-up stored {len(missing)} points")
+        return len(missing)
+
+
+def open_km_cache(km_service) -> KmCache | None:
+    """Opens the configured KM cache for the service's data, None when disabled."""
+    if config.KM_CACHE_PATH is None:
+        return None
+    try:
+        return KmCache(
+            config.KM_CACHE_PATH,
+            km_data_version(km_service),
+            precision=config.KM_CACHE_PRECISION,
+            ttl_days=config.KM_CACHE_TTL_DAYS,
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"KM cache disabled, could not open {config.KM_CACHE_PATH}: {e}")
+        return None
+
+
+def read_points(path: Path) -> list[tuple[float, float]]:
+    """The RD points of an Excel file with gml columns or an x,y text file."""
+    if path.suffix.lower() == ".xlsx":
+        from openpyxl import load_workbook
+
+        from src.imxTools.utils.kmExcelProcessor import KmExcelProcessor
+
+        processor = KmExcelProcessor(None)
+        wb = load_workbook(path, read_only=True)
+        sheets = [(sheet, processor._detect_gml_columns(sheet)) for sheet in wb]
+        return processor._collect_unique_points([s for s in sheets if s[1]])
+
+    points = []
+    for line in path.read_text().splitlines():
+        parts = line.replace(";", ",").split(",")
+        try:
+            points.append((float(parts[0]), float(parts[1])))
+        except (ValueError, IndexError):
+            continue
+    return points
@@ -0,0 +1,67 @@
+import asyncio
+from collections.abc import Callable, Iterable
+
+Points = tuple[tuple[float, float], ...]
+
+
+class KmResolver:
+    """
+    Resolves KM values for one UI client without blocking the event loop.
+
+    Lookups run in a worker thread. A new request waits `debounce` seconds and
+    cancels the request before it, so only the last of a burst of map clicks or
+    keystrokes is resolved. A request for the points that are already being
+    resolved joins that lookup instead of starting another one.
+
+    Args:
+        get_service: Returns the running KmService, or None when it is not started.
+        debounce: Seconds a request waits for a newer one before it is resolved.
+    """
+
+    def __init__(self, get_service: Callable, debounce: float = 0.25):
+        self._get_service = get_service
+        self.debounce = debounce
+        self._pending: asyncio.Task | None = None
+        self._pending_points: Points | None = None
+
+    async def resolve(self, points: Iterable[tuple[float, float]]) -> list | None:
+        """Returns a KmResponse per point, or None when a newer request replaced it."""
+        points = tuple((float(x), float(y)) for x, y in points)
+
+        if (
+            self._pending is None
+            or self._pending.done()
+            or points != self._pending_points
+        ):
+            self.cancel()
+            self._pending_points = points
+            self._pending = asyncio.create_task(self._lookup(points))
+
+        task = self._pending
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return None
+            raise
+
+    async def resolve_point(self, x: float, y: float):
+        responses = await self.resolve([(x, y)])
+        return None if responses is None else responses[0]
+
+    def cancel(self) -> None:
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+
+    async def _lookup(self, points: Points) -> list:
+        await asyncio.sleep(self.debounce)
+
+        km_service = self._get_service()
+        if km_service is None:
+            raise RuntimeError("KM service is not running")
+
+        if len(points) == 1:
+            return [await asyncio.to_thread(km_service.get_km, *points[0])]
+        return await asyncio.to_thread(
+            km_service.get_km_batch, [list(point) for point in points]
+        )
@@ -1,15 +1,86 @@
+import asyncio
+from dataclasses import dataclass
+
+from src.imxTools.utils.custom_logger import logger
+from src.imxTools.utils.km_cache import CachedKmService, open_km_cache
+from src.imxTools.utils.km_snapshot import load_km_snapshot, save_km_snapshot
+
 KM_SERVICE_INSTANCE = None
+CACHED_KM_SERVICE_INSTANCE = None
+KM_SERVICE_TASK: asyncio.Task | None = None
 
 
-async def start_km_service():
-    global KM_SERVICE_INSTANCE, km_service_starting
+@dataclass
+class KmServiceStatus:
+    state: str = "stopped"  # stopped, loading, building, ready or failed
+    message: str = ""
+    progress: float | None = 0.0  # None while the size of the step is unknown
+    error: str | None = None
+
+    @property
+    def is_starting(self) -> bool:
+        return self.state in ("loading", "building")
+
+    def update(self, state: str, message: str, progress: float | None) -> None:
+        self.state, self.message, self.progress = state, message, progress
+
+
+KM_SERVICE_STATUS = KmServiceStatus()
+
+
+async def _start_km_service() -> None:
+    global KM_SERVICE_INSTANCE
+
+    KM_SERVICE_STATUS.update("loading", "loading km snapshot", 0.05)
+    km_service = await asyncio.to_thread(load_km_snapshot)
+
+    if km_service is None:
+        from kmService import KmService
+
+        # kmService reports no progress while it downloads and matches the layers
+        KM_SERVICE_STATUS.update("building", "downloading and matching km data", None)
+        km_service = await KmService.factory()
 
+        KM_SERVICE_STATUS.update("building", "saving km snapshot", 0.9)
+        await asyncio.to_thread(save_km_snapshot, km_service)
+
+    KM_SERVICE_INSTANCE = km_service
+    KM_SERVICE_STATUS.update("ready", "KM service ready", 1.0)
+
+
+async def _run_start_task() -> None:
+    try:
+        await _start_km_service()
+    except Exception as e:
+        logger.error(f"KM service failed to start: {e}")
+        KM_SERVICE_STATUS.update("failed", f"KM service failed to start: {e}", 0.0)
+        KM_SERVICE_STATUS.error = str(e)
+
+
+def start_km_service_in_background() -> asyncio.Task:
+    """
+    Starts the KM service without blocking the caller, from the snapshot when one is
+    available. Follow it with `get_km_service_status()`; calling it again while
+    starting returns the running task.
+    """
+    global KM_SERVICE_TASK
+
+    if KM_SERVICE_TASK is None or (
+        KM_SERVICE_TASK.done() and KM_SERVICE_INSTANCE is None
+    ):
+        KM_SERVICE_STATUS.error = None
+        KM_SERVICE_TASK = asyncio.get_running_loop().create_task(_run_start_task())
+    return KM_SERVICE_TASK
+
+
+async def start_km_service():
     if KM_SERVICE_INSTANCE is not None:
         return
-    else:
-        from kmService import KmService
+    await start_km_service_in_background()
 
-        KM_SERVICE_INSTANCE = await KmService.factory()
+
+def get_km_service_status() -> KmServiceStatus:
+    return KM_SERVICE_STATUS
 
 
 def is_km_service_running():
@@ -18,5 +89,14 @@ def is_km_service_running():
 
 
 def get_km_service():
-    global KM_SERVICE_INSTANCE
-    return KM_SERVICE_INSTANCE
+    """Returns the running KmService, wrapped in the persistent KM cache if enabled."""
+    global KM_SERVICE_INSTANCE, CACHED_KM_SERVICE_INSTANCE
+    if KM_SERVICE_INSTANCE is None:
+        return None
+
+    if CACHED_KM_SERVICE_INSTANCE is None:
+        cache = open_km_cache(KM_SERVICE_INSTANCE)
+        if cache is None:
+            return KM_SERVICE_INSTANCE
+        CACHED_KM_SERVICE_INSTANCE = CachedKmService(KM_SERVICE_INSTANCE, cache)
+    return CACHED_KM_SERVICE_INSTANCE
@@ -0,0 +1,96 @@
+"""
+Snapshot of the built km dataset.
+
+Building a KmService downloads and matches every km lint, raai and hectometer point,
+which takes minutes. The resulting value objects are pickled once and, on later
+starts, unpickled straight from a memory mapped file instead of rebuilt.
+"""
+
+import mmap
+import os
+import pickle
+import time
+from pathlib import Path
+
+from src.imxTools.settings import config
+from src.imxTools.utils.custom_logger import logger
+
+SNAPSHOT_FORMAT = 1
+
+
+def _kmservice_version() -> str:
+    import kmService
+
+    return kmService.__version__
+
+
+def save_km_snapshot(km_service, path: Path | None = None) -> Path | None:
+    """Pickles the value objects of a built KmService, returns the snapshot path."""
+    path = path or config.KM_SNAPSHOT_PATH
+    if path is None:
+        return None
+
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "kmService": _kmservice_version(),
+        "created": time.time(),
+        "value_objects": km_service._value_objects_dict,
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not write KM snapshot {path}: {e}")
+        return None
+
+    logger.success(f"Saved KM snapshot {path}")
+    return path
+
+
+def load_km_snapshot(path: Path | None = None, max_age_days: float | None = None):
+    """
+    Returns a KmService restored from the snapshot, or None when there is no usable
+    snapshot: missing, unreadable, built by another kmService version or too old.
+    """
+    path = path or config.KM_SNAPSHOT_PATH
+    if max_age_days is None:
+        max_age_days = config.KM_SNAPSHOT_MAX_AGE_DAYS
+    if path is None or not path.exists():
+        return None
+
+    try:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            payload = pickle.loads(mapped)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable KM snapshot {path}: {e}")
+        return None
+
+    if (
+        payload.get("format") != SNAPSHOT_FORMAT
+        or payload.get("kmService") != _kmservice_version()
+    ):
+        logger.info("KM snapshot was built by another kmService version")
+        return None
+
+    age_days = (time.time() - payload.get("created", 0)) / 86400
+    if max_age_days is not None and age_days > max_age_days:
+        logger.info(f"KM snapshot is {age_days:.0f} days old, rebuilding")
+        return None
+
+    from kmService import KmService
+
+    km_service = KmService()
+    km_service._value_objects_dict = payload["value_objects"]
+    logger.success(f"Loaded KM snapshot {path} ({age_days:.1f} days old)")
+    return km_service
+
+
+def km_snapshot_available() -> bool:
+    path = config.KM_SNAPSHOT_PATH
+    return path is not None and path.exists()
@@ -2,9 +2,10 @@ from dataclasses import dataclass
 from enum import Enum
 
 import numpy as np
+import shapely
 from imxInsights.utils.shapely.shapely_geojson import ShapelyGeoJsonFeature
 from numpy._typing import NDArray
-from shapely import LineString, Point
+from shapely import LineString, Point, STRtree
 
 # TODO: this should be part of imxInsights
 
@@ -123,9 +124,70 @@ class LineMeasureResult:
         return features
 
 
+@dataclass
+class BatchMeasureResult:
+    """
+    Columnar projection results for many points on the same MeasureLine.
+
+    Row `i` of every array belongs to input point `i`. Missing 3D measures are
+    stored as NaN, side and status arrays hold the enum members.
+    """
+
+    projection_line: LineString
+    points: NDArray[np.float64]
+    projected_points: NDArray[np.float64]
+    measure_2d: NDArray[np.float64]
+    measure_3d: NDArray[np.float64]
+    side: NDArray[np.object_]
+    overshoot_undershoot: NDArray[np.object_]
+
+    def __len__(self) -> int:
+        return int(self.measure_2d.shape[0])
+
+    def get_measure_3d(self, index: int) -> float | None:
+        measure_3d = self.measure_3d[index]
+        return None if np.isnan(measure_3d) else float(measure_3d)
+
+    def to_point_result(self, index: int) -> PointMeasureResult:
+        return PointMeasureResult(
+            point_to_project=Point(self.points[index]),
+            projection_line=self.projection_line,
+            projected_point=Point(self.projected_points[index]),
+            measure_2d=float(self.measure_2d[index]),
+            measure_3d=self.get_measure_3d(index),
+            side=self.side[index],
+            overshoot_undershoot=self.overshoot_undershoot[index],
+        )
+
+
+# Below this many segments a linear scan is cheaper than querying an STRtree
+SPATIAL_INDEX_MIN_SEGMENTS = 64
+
+_SIDE_LOOKUP = np.array(
+    [
+        ProjectionPointPosition.LEFT,
+        ProjectionPointPosition.RIGHT,
+        ProjectionPointPosition.ON_LINE,
+        ProjectionPointPosition.UNDEFINED,
+    ],
+    dtype=object,
+)
+_STATUS_LOOKUP = np.array(
+    [
+        ProjectionsStatus.PERPENDICULAR,
+        ProjectionsStatus.UNDERSHOOT,
+        ProjectionsStatus.OVERSHOOT,
+        ProjectionsStatus.ANGLE,
+    ],
+    dtype=object,
+)
+
+
 class MeasureLine:
     def __init__(
-        self, line: list[list[float]] | NDArray[np.float64] | LineString
+        self,
+        line: list[list[float]] | NDArray[np.float64] | LineString,
+        use_spatial_index: bool = True,
     ) -> None:
         shapely_input_line, line_array, is_3d = self._process_input(line)
 
@@ -138,6 +200,10 @@ class MeasureLine:
         self._cum_lengths_2d: NDArray[np.float64] = cum_lengths_2d
         self._cum_lengths_3d: NDArray[np.float64] | None = cum_lengths_3d
 
+        self._segment_index: STRtree | None = None
+        if use_spatial_index and len(line_array) - 1 >= SPATIAL_INDEX_MIN_SEGMENTS:
+            self._segment_index = self._build_segment_index()
+
     @staticmethod
     def _process_input(line) -> tuple[LineString, NDArray[np.float64], bool]:
         if isinstance(line, LineString):
@@ -189,58 +255,150 @@ class MeasureLine:
 
         return cum_lengths_2d, cum_lengths_3d
 
+    def _build_segment_index(self) -> STRtree:
+        """Build an STRtree over the 2D segments, tree index i is segment i."""
+        coords_2d = self._line_array[:, :2]
+        segments = shapely.linestrings(
+            np.stack((coords_2d[:-1], coords_2d[1:]), axis=1)
+        )
+        return STRtree(segments)
+
     def project(
         self, point: list[float] | NDArray[np.float64] | Point
     ) -> PointMeasureResult:
         point = self._validate_and_process_point(point)
+        return self.project_many(point[np.newaxis, :]).to_point_result(0)
 
-        # Use shapely project as it haz tested perpendicular projection and interpolated z
-        input_point_shapely_2d, proj_measure_shapely, proj_point_shapely = (
-            self._shapely_projection(point)
-        )
+    def project_many(
+        self, points: list[list[float]] | NDArray[np.float64], tol: float = 1e-7
+    ) -> BatchMeasureResult:
+        """
+        Projects an (N, 2) or (N, 3) array of points onto the MeasureLine at once.
 
-        seg_index, prev_point_3d, next_point_3d = self._get_segment_data(
-            proj_measure_shapely
-        )
+        All per point work is done with NumPy on the precomputed cumulative lengths
+        instead of a Python loop per point. The nearest segment is found with the
+        segment index when the line has one, else with shapely's line_locate_point.
+        """
+        points_3d = self._validate_and_process_points(points)
+        point_count = points_3d.shape[0]
+        last_segment = len(self._cum_lengths_2d) - 2
+
+        measure_2d, projected_points = self._locate(points_3d)
 
-        proj_point_3d = np.array(
-            [proj_point_shapely.x, proj_point_shapely.y, proj_point_shapely.z]
+        # Segment the measure falls on, used for the 3D measure and the side
+        seg_index = np.clip(
+            np.searchsorted(self._cum_lengths_2d, measure_2d, side="right") - 1,
+            0,
+            last_segment,
         )
-        measure_3d = self._get_3d_measure(proj_point_3d, prev_point_3d, seg_index)
+        prev_points_3d = self._line_array[seg_index]
+        next_points_3d = self._line_array[seg_index + 1]
 
-        is_perpendicular = self._is_perpendicular_projection(input_point_shapely_2d)
-        side_of_line = ProjectionPointPosition.UNDEFINED
-        if is_perpendicular:
-            side_of_line = self._determine_side(
-                Point(point), Point(prev_point_3d[:2]), Point(next_point_3d[:2])
-            )
-            projection_angle = ProjectionsStatus.PERPENDICULAR
-        elif proj_measure_shapely == 0:
-            # if not perpendicular and 0 length we assume its undershooting the line
-            projection_angle = ProjectionsStatus.UNDERSHOOT
-        elif proj_measure_shapely == self.shapely_line.length:
-            # if not perpendicular and length max we assume its overshooting the line
-            projection_angle = ProjectionsStatus.OVERSHOOT
-        else:
-            # we cant reverse point by projecting on measure and offset!
-            # TODO: calculate angle so we can use it to recreate input point
-            side_of_line = self._determine_side(
-                Point(point), Point(prev_point_3d[:2]), Point(next_point_3d[:2])
+        measure_3d = np.full(point_count, np.nan)
+        if self.is_3d and self._cum_lengths_3d is not None:
+            measure_3d = self._cum_lengths_3d[seg_index] + np.linalg.norm(
+                projected_points - prev_points_3d, axis=1
             )
-            projection_angle = ProjectionsStatus.ANGLE
 
-        shapely_projection = Point(proj_point_3d)
+        is_perpendicular = self._is_perpendicular_projection(
+            points_3d, projected_points, measure_2d, tol
+        )
 
-        # TODO: add distance to line in 2d and 3d
-        return PointMeasureResult(
-            point_to_project=Point(point),
+        # Cross product of segment direction and point offset gives the side
+        delta = next_points_3d[:, :2] - prev_points_3d[:, :2]
+        offset = points_3d[:, :2] - prev_points_3d[:, :2]
+        cross = delta[:, 0] * offset[:, 1] - delta[:, 1] * offset[:, 0]
+
+        # Measures from the index add up segment lengths like _cum_lengths_2d,
+        # shapely measures add up to its own line length.
+        line_length = (
+            self._cum_lengths_2d[-1]
+            if self._segment_index is not None
+            else self.shapely_line.length
+        )
+        status_codes = np.select(
+            [is_perpendicular, measure_2d == 0, measure_2d == line_length],
+            [0, 1, 2],
+            default=3,
+        )
+        side_codes = np.select([cross > 0, cross < 0], [0, 1], default=2)
+        side_codes[(status_codes == 1) | (status_codes == 2)] = 3
+
+        return BatchMeasureResult(
             projection_line=self.shapely_line,
-            projected_point=shapely_projection,
-            measure_2d=proj_measure_shapely,
+            points=points_3d,
+            projected_points=projected_points,
+            measure_2d=measure_2d,
             measure_3d=measure_3d,
-            side=side_of_line,
-            overshoot_undershoot=projection_angle,
+            side=_SIDE_LOOKUP[side_codes],
+            overshoot_undershoot=_STATUS_LOOKUP[status_codes],
+        )
+
+    def _locate(
+        self, points_3d: NDArray[np.float64]
+    ) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """Returns the 2D measure and the projected 3D point for each point."""
+        point_count = points_3d.shape[0]
+        input_points = shapely.points(points_3d[:, :2])
+
+        if self._segment_index is None:
+            # Use shapely project as it haz tested perpendicular projection
+            measure_2d = shapely.line_locate_point(
+                self.shapely_line, input_points
+            ).astype(float)
+            projected_points = shapely.get_coordinates(
+                shapely.line_interpolate_point(self.shapely_line, measure_2d),
+                include_z=True,
+            ).reshape(point_count, 3)
+            if not self.is_3d:
+                projected_points[:, 2] = 0.0
+            return measure_2d, projected_points
+
+        # Equidistant segments (e.g. at a shared vertex) resolve to the first
+        # one, same as shapely's project walking the line from the start.
+        input_index, tree_index = self._segment_index.query_nearest(
+            input_points, all_matches=True
         )
+        seg_index = np.full(point_count, len(self._cum_lengths_2d), dtype=np.intp)
+        np.minimum.at(seg_index, input_index, tree_index)
+
+        seg_start = self._line_array[seg_index]
+        seg_vec = self._line_array[seg_index + 1] - seg_start
+        seg_vec_2d = seg_vec[:, :2]
+        seg_length_2d = np.linalg.norm(seg_vec_2d, axis=1)
+        seg_length_sq = np.einsum("ij,ij->i", seg_vec_2d, seg_vec_2d)
+
+        # Projection factor along the segment, clamped to the segment itself
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = (
+                np.einsum("ij,ij->i", points_3d[:, :2] - seg_start[:, :2], seg_vec_2d)
+                / seg_length_sq
+            )
+        factor = np.clip(np.nan_to_num(factor, nan=0.0), 0.0, 1.0)
+
+        measure_2d = self._cum_lengths_2d[seg_index] + factor * seg_length_2d
+        projected_points = seg_start + factor[:, np.newaxis] * seg_vec
+        return measure_2d, projected_points
+
+    @staticmethod
+    def _validate_and_process_points(
+        points: list[list[float]] | NDArray[np.float64],
+    ) -> NDArray[np.float64]:
+        points_array = np.asarray(points, dtype=float)
+        if points_array.size == 0:
+            return np.empty((0, 3), dtype=float)
+
+        if points_array.ndim != 2 or points_array.shape[1] not in (2, 3):
+            raise ValueError(
+                "Input points must be a 2D array with shape (N, 2) or (N, 3)."
+            )
+
+        # If the points are 2D, convert them to 3D by adding z=0
+        if points_array.shape[1] == 2:
+            points_array = np.column_stack(
+                (points_array, np.zeros(points_array.shape[0]))
+            )
+        return points_array
 
     @staticmethod
     def _validate_and_process_point(
@@ -260,114 +418,36 @@ class MeasureLine:
             raise ValueError("Input point must have 2 or 3 coordinates (x, y, [z]).")
         return point
 
-    def _shapely_projection(self, point: np.ndarray) -> tuple[Point, float, Point]:
-        input_point_shapely_2d = Point(float(point[0]), float(point[1]))
-        proj_measure_shapely = self.shapely_line.project(input_point_shapely_2d)
-        proj_point_shapely = self.shapely_line.interpolate(proj_measure_shapely)
-        return input_point_shapely_2d, proj_measure_shapely, proj_point_shapely
-
-    def _get_segment_data(self, proj_measure_shapely: float):
-        seg_index = (
-            np.searchsorted(self._cum_lengths_2d, proj_measure_shapely, side="right")
-            - 1
-        )
-        seg_index = min(max(seg_index, 0), len(self._cum_lengths_2d) - 2)  # type: ignore
-        prev_point_3d = self._line_array[seg_index]
-        next_point_3d = self._line_array[seg_index + 1]
-        return seg_index, prev_point_3d, next_point_3d
-
-    def _get_projected_z(
-        self, seg_index, proj_measure_shapely, prev_point_3d, next_point_3d
-    ):
-        seg_length = (
-            self._cum_lengths_2d[seg_index + 1] - self._cum_lengths_2d[seg_index]
-        )
-        interpolation_factor_t = (
-            0.0
-            if seg_length == 0
-            else (proj_measure_shapely - self._cum_lengths_2d[seg_index]) / seg_length
+    def _is_perpendicular_projection(
+        self,
+        points_3d: NDArray[np.float64],
+        projected_points: NDArray[np.float64],
+        measure_2d: NDArray[np.float64],
+        tol: float = 1e-7,
+    ) -> NDArray[np.bool_]:
+        # First segment whose [start, end] range contains the measure, a binary
+        # search over the cumulative lengths instead of walking every segment.
+        seg_index = np.clip(
+            np.searchsorted(self._cum_lengths_2d, measure_2d, side="left") - 1,
+            0,
+            len(self._cum_lengths_2d) - 2,
         )
-        proj_z = prev_point_3d[2] + interpolation_factor_t * (
-            next_point_3d[2] - prev_point_3d[2]
+        seg_vec_2d = (
+            self._line_array[seg_index + 1, :2] - self._line_array[seg_index, :2]
         )
-        return proj_z
+        norm_seg = np.linalg.norm(seg_vec_2d, axis=1)
 
-    def _get_3d_measure(self, proj_point_3d, prev_point_3d, seg_index):
-        measure_3d = None
-        if self.is_3d:
-            # Calculate 3D distance along the segment
-            d_segment = np.linalg.norm(proj_point_3d - prev_point_3d)
-            # Total 3D distance
-            if self._cum_lengths_3d is not None:
-                measure_3d = self._cum_lengths_3d[seg_index] + d_segment
-        return measure_3d
-
-    @staticmethod
-    def _determine_side(
-        point: Point, segment_start: Point, segment_end: Point
-    ) -> ProjectionPointPosition:
-        delta_x = segment_end.x - segment_start.x
-        delta_y = segment_end.y - segment_start.y
-
-        # Compute the cross product (2D determinant)
-        cross = delta_x * (point.y - segment_start.y) - delta_y * (
-            point.x - segment_start.x
-        )
-
-        if cross > 0:
-            return ProjectionPointPosition.LEFT
-        elif cross < 0:
-            return ProjectionPointPosition.RIGHT
-        else:
-            return ProjectionPointPosition.ON_LINE
-
-    def _is_perpendicular_projection(self, point: Point, tol: float = 1e-7) -> bool:
-        # Project the point onto the line.
-        proj_distance = self.shapely_line.project(point)
-        proj_point = self.shapely_line.interpolate(proj_distance)
-
-        # Identify the segment containing the projection.
-        coords = list(self.shapely_line.coords)
-        cum_distance = 0.0
-        segment = None
-
-        for i in range(len(coords) - 1):
-            seg_start = coords[i]
-            seg_end = coords[i + 1]
-            seg_line = LineString([seg_start, seg_end])
-            seg_length = seg_line.length
-            if cum_distance <= proj_distance <= cum_distance + seg_length:
-                segment = (seg_start, seg_end)
-                break
-            cum_distance += seg_length
-
-        if segment is None:
-            raise ValueError("Projection did not fall on any segment of the line.")
-
-        # Compute the direction vector of the segment in 2D.
-        seg_start, seg_end = segment
-        seg_start_2d = np.array(seg_start)[:2]
-        seg_end_2d = np.array(seg_end)[:2]
-        seg_vec_2d = seg_end_2d - seg_start_2d
-
-        norm_seg = np.linalg.norm(seg_vec_2d)
-        if norm_seg == 0:
-            raise ValueError("Encountered a segment with zero length.")
-        seg_unit = seg_vec_2d / norm_seg
-
-        # Compute the vector from the projected point to the original point in 2D.
-        pt_coords_2d = np.array(point.coords[0])[:2]
-        proj_coords_2d = np.array(proj_point.coords[0])[:2]
-        pt_vec = pt_coords_2d - proj_coords_2d
-
-        # Check for orthogonality using the dot product.
-        dot_product = np.dot(seg_unit, pt_vec)
-        return abs(dot_product) < tol
+        # Zero length segments have no direction, treat them as not perpendicular
+        with np.errstate(divide="ignore", invalid="ignore"):
+            seg_unit = seg_vec_2d / norm_seg[:, np.newaxis]
+        pt_vec = points_3d[:, :2] - projected_points[:, :2]
+        dot_product = np.einsum("ij,ij->i", seg_unit, pt_vec)
+        return (norm_seg > 0) & (np.abs(dot_product) < tol)
 
     def project_line(self, input_line: LineString) -> LineMeasureResult:
         """
-        Projects each vertex of a LineString onto the MeasureLine and returns a
-        LineMeasureResult based on the points with the minimum and maximum 2D measure.
+        Projects the first and last vertex of a LineString onto the MeasureLine and
+        returns them as a LineMeasureResult.
         """
 
         # TODO: we should handle all so list or npArray of coordinates
@@ -378,15 +458,10 @@ class MeasureLine:
         if len(input_line.coords) < 2:
             raise ValueError("Input LineString must have at least 2 coordinates.")
 
-        projected_results = [self.project(Point(coord)) for coord in input_line.coords]
-
-        # Find min and max measure_2d
-        from_result = projected_results[0]
-        to_result = projected_results[-1]
-
-        if from_result is None or to_result is None:
-            raise ValueError(
-                "Projection failed: measure_3d is None for one or more points."
-            )
+        coords = input_line.coords
+        projected_results = self.project_many(np.array([coords[0], coords[-1]]))
 
-        return LineMeasureResult(from_result=from_result, to_result=to_result)
+        return LineMeasureResult(
+            from_result=projected_results.to_point_result(0),
+            to_result=projected_results.to_point_result(1),
+        )
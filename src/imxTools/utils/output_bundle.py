@@ -0,0 +1,81 @@
+import io
+import time
+import zipfile
+from pathlib import Path
+from typing import BinaryIO
+
+# formats that are compressed already, deflating them again only costs time
+STORED_SUFFIXES = {".xlsx", ".zip", ".gz", ".png", ".jpg", ".jpeg"}
+
+
+class OutputBundle:
+    """
+    Zip archive of tool outputs, written while the outputs are added.
+
+    Files are copied into the archive in chunks, deflated with the given level, or
+    stored as is when they are compressed already. Without a target the archive is
+    kept in memory and `getvalue()` hands back its bytes, ready for a download.
+
+    Args:
+        target: Zip file path or binary stream to write to, None for in memory.
+        compresslevel: Deflate level from 0 (fastest) to 9 (smallest).
+    """
+
+    def __init__(
+        self, target: Path | BinaryIO | None = None, compresslevel: int | None = 6
+    ):
+        self._buffer = io.BytesIO() if target is None else None
+        self._zip = zipfile.ZipFile(
+            self._buffer if target is None else target,
+            "w",
+            zipfile.ZIP_DEFLATED,
+            compresslevel=compresslevel,
+        )
+
+    def __enter__(self) -> "OutputBundle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def names(self) -> list[str]:
+        return self._zip.namelist()
+
+    def _compress_type(self, arcname: str) -> int:
+        if Path(arcname).suffix.lower() in STORED_SUFFIXES:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def open(self, arcname: str) -> BinaryIO:
+        """Returns a writable stream for an output written straight into the zip."""
+        if self._compress_type(arcname) == zipfile.ZIP_STORED:
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            return self._zip.open(info, "w", force_zip64=True)
+        return self._zip.open(arcname, "w", force_zip64=True)
+
+    def add_bytes(self, arcname: str, data: bytes | str) -> None:
+        self._zip.writestr(arcname, data, self._compress_type(arcname))
+
+    def add_file(self, path: Path, arcname: str | None = None) -> None:
+        arcname = arcname or Path(path).name
+        self._zip.write(path, arcname, self._compress_type(arcname))
+
+    def add_folder(self, folder: Path, prefix: str = "") -> None:
+        """Adds every file below the folder, named relative to it."""
+        folder = Path(folder)
+        for path in sorted(folder.rglob("*")):
+            if path.is_file():
+                arcname = (Path(prefix) / path.relative_to(folder)).as_posix()
+                self.add_file(path, arcname)
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def getvalue(self) -> bytes:
+        """Closes the archive and returns it, only for bundles kept in memory."""
+        if self._buffer is None:
+            raise ValueError("OutputBundle was written to a target, not kept in memory")
+        self.close()
+        return self._buffer.getvalue()
@@ -0,0 +1,215 @@
+"""
+Timing spans for the imxTools pipelines.
+
+The top level functions in insights, revision and comments wrap their stages in
+`span(...)`. A span only records when a `SpanRecorder` is active in the current
+context, otherwise it costs a context variable lookup. `profile_run` activates a
+recorder for one run, optionally with cProfile or pyinstrument, and writes the
+timings as json next to the outputs of the run.
+"""
+
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.imxTools.settings import config
+from src.imxTools.utils.helpers import create_timestamp
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+@dataclass
+class Span:
+    name: str
+    # seconds since the recorder started
+    start: float
+    seconds: float = 0.0
+    children: list["Span"] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": round(self.start, 6),
+            "seconds": round(self.seconds, 6),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class SpanRecorder:
+    """
+    Collects the spans of one run as a tree under a root span.
+
+    Spans opened in worker threads started with `asyncio.to_thread` or a copied
+    context end up under the span that was open when the thread started.
+    `on_span` is called with the name of every span when it opens, e.g. to report
+    the stage of a background job.
+    """
+
+    def __init__(self, name: str, on_span: Callable[[str], None] | None = None):
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.root = Span(name, 0.0)
+        self.on_span = on_span
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def add(self, parent: Span, child: Span) -> None:
+        with self._lock:
+            parent.children.append(child)
+
+    def stop(self) -> None:
+        self.root.seconds = self.elapsed()
+
+    def stages(self) -> dict[str, float]:
+        """Seconds per span path, e.g. {"diff/compare": 1.2}, summed over repeats."""
+        totals: dict[str, float] = {}
+
+        def walk(span: Span, prefix: str) -> None:
+            for child in span.children:
+                path = f"{prefix}/{child.name}" if prefix else child.name
+                totals[path] = totals.get(path, 0.0) + child.seconds
+                walk(child, path)
+
+        walk(self.root, self.root.name)
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.root.name,
+            "seconds": round(self.root.seconds, 6),
+            "stages": {path: round(s, 6) for path, s in self.stages().items()},
+            "spans": self.root.to_dict(),
+        }
+
+    def write_json(self, path: Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return path
+
+
+_CURRENT: contextvars.ContextVar[tuple[SpanRecorder, Span] | None] = (
+    contextvars.ContextVar("imxtools_span", default=None)
+)
+
+
+def current_recorder() -> SpanRecorder | None:
+    current = _CURRENT.get()
+    return current[0] if current else None
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Times the block as a child of the open span, works as a decorator too.
+
+    Meant for stages of a pipeline, not for per row work in a hot loop.
+    """
+    current = _CURRENT.get()
+    if current is None:
+        yield
+        return
+
+    recorder, parent = current
+    if recorder.on_span:
+        recorder.on_span(name)
+    child = Span(name, recorder.elapsed())
+    token = _CURRENT.set((recorder, child))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.seconds = time.perf_counter() - start
+        _CURRENT.reset(token)
+        recorder.add(parent, child)
+
+
+class _Profiler:
+    def __init__(self, kind: str):
+        if kind not in PROFILERS:
+            raise ValueError(f"Unknown profiler {kind}, use one of {PROFILERS}")
+        self.kind = kind
+        if kind == "cprofile":
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ImportError(
+                    "pyinstrument is not installed, pip install pyinstrument "
+                    "or use the cprofile profiler"
+                )
+            self._profiler = Profiler()
+            self._profiler.start()
+
+    def stop(self) -> None:
+        if self.kind == "cprofile":
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+
+    def write(self, stem: Path) -> Path:
+        if self.kind == "cprofile":
+            path = stem.with_suffix(".prof")
+            self._profiler.dump_stats(path)
+        else:
+            path = stem.with_suffix(".html")
+            path.write_text(self._profiler.output_html(), encoding="utf-8")
+        return path
+
+
+@contextlib.contextmanager
+def profile_run(
+    name: str,
+    out_dir: Path | None = None,
+    profiler: str | None = None,
+    on_span: Callable[[str], None] | None = None,
+) -> Iterator[SpanRecorder]:
+    """
+    Records the spans of the block and, with an out_dir, writes them to
+    `<timestamp>-<name>-profile.json` in it, also when the block fails.
+
+    Args:
+        name: Name of the root span and of the written files.
+        out_dir: Folder to write the timing json (and profile) to, None to only
+            keep them on the returned recorder.
+        profiler: "cprofile" (written as .prof) or "pyinstrument" (written as
+            .html) to also capture a full profile of the run.
+        on_span: Called with the name of every span opened in the block.
+    """
+    recorder = SpanRecorder(name, on_span)
+    capture = _Profiler(profiler) if profiler else None
+    token = _CURRENT.set((recorder, recorder.root))
+    try:
+        yield recorder
+    finally:
+        _CURRENT.reset(token)
+        recorder.stop()
+        if capture:
+            capture.stop()
+        if out_dir is not None:
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+            stem = Path(out_dir) / f"{create_timestamp()}-{name}-profile"
+            recorder.write_json(stem.with_suffix(".json"))
+            if capture:
+                capture.write(stem)
+
+
+def pipeline_span(
+    name: str, out_dir: Path | None, profile: bool = False
+) -> contextlib.AbstractContextManager:
+    """
+    Span around a top level function. With profile (or config.PROFILE) set and no
+    recorder active yet, the run is recorded and written to out_dir.
+    """
+    if (profile or config.PROFILE) and _CURRENT.get() is None:
+        return profile_run(name, out_dir, config.PROFILER)
+    return span(name)
@@ -0,0 +1,114 @@
+"""
+Progress reporting of the long running imxTools functions.
+
+Functions that accept a `progress` callback call it with a `Progress` for every
+stage while they work. A `ProgressReporter` wraps the callback for one stage and
+throttles it: the loop only adds to a counter, the clock is read every so many
+items and the callback runs at most once per `interval` seconds, plus once when
+the stage starts and when it finishes. Without a callback it only counts.
+
+    reporter = ProgressReporter(progress, "apply changes", len(changes))
+    for change in changes:
+        ...
+        reporter.advance()
+    reporter.finish()
+"""
+
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Progress:
+    stage: str
+    done: int
+    # None when the number of items is not known up front
+    total: int | None
+    seconds: float
+
+    @property
+    def fraction(self) -> float | None:
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    @property
+    def rate(self) -> float:
+        """Items per second since the stage started."""
+        return self.done / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        if self.total:
+            return f"{self.stage} {self.done}/{self.total} ({self.rate:.0f}/s)"
+        if self.done:
+            return f"{self.stage} {self.done} ({self.rate:.0f}/s)"
+        return self.stage
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class ProgressReporter:
+    """
+    Throttled progress of one stage.
+
+    Args:
+        callback: Called with the progress, None to only count.
+        stage: Name of the stage.
+        total: Number of items in the stage, None when unknown.
+        interval: Minimum seconds between two calls of the callback.
+    """
+
+    def __init__(
+        self,
+        callback: ProgressCallback | None,
+        stage: str,
+        total: int | None = None,
+        interval: float = 0.25,
+    ):
+        self.callback = callback
+        self.stage = stage
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self._start = self._last = time.perf_counter()
+        # items between two clock reads, adapted to the speed of the loop
+        self._stride = 1
+        self._next = 1 if callback is not None else math.inf
+        if callback is not None:
+            callback(Progress(stage, 0, total, 0.0))
+
+    def advance(self, count: int = 1) -> None:
+        self.done += count
+        if self.done >= self._next:
+            self._tick()
+
+    def _tick(self) -> None:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        if elapsed < self.interval:
+            self._stride *= 2
+        else:
+            if elapsed > 2 * self.interval:
+                self._stride = max(1, self._stride // 2)
+            self._emit(now)
+        self._next = self.done + self._stride
+
+    def _emit(self, now: float) -> None:
+        self._last = now
+        self.callback(Progress(self.stage, self.done, self.total, now - self._start))
+
+    def finish(self) -> None:
+        """Reports the final count of the stage."""
+        if self.callback is not None:
+            self._emit(time.perf_counter())
+            self._next = math.inf
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.finish()
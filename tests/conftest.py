@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_imx import SyntheticImx, write_imx
+
+
+def load_situation(path: Path):
+    from imxInsights import ImxSingleFile
+
+    return ImxSingleFile(path).situation
+
+
+@pytest.fixture(scope="session")
+def synthetic_imx(tmp_path_factory) -> SyntheticImx:
+    """A small IMX 1.2.4 file with signals on four rail connections."""
+    path = tmp_path_factory.mktemp("imx") / "imx.xml"
+    return write_imx(path, rail_connections=4, objects=200, vertices=40, seed=1)
+
+
+@pytest.fixture(scope="session")
+def synthetic_situation(synthetic_imx):
+    return load_situation(synthetic_imx.path)
+
+
+def move_track(path: Path, out: Path, rail_connection_puic: str, dx: float) -> Path:
+    """Writes a copy of the IMX file with the last vertex of one track moved."""
+    text = path.read_text(encoding="utf-8")
+    start = text.index(f'<RailConnection puic="{rail_connection_puic}"')
+    track_ref = text[start:].split('trackRef="', 1)[1].split('"', 1)[0]
+    track = text.index(f'<Track puic="{track_ref}"')
+    begin = text.index("<gml:coordinates>", track) + len("<gml:coordinates>")
+    end = text.index("</gml:coordinates>", begin)
+    vertices = text[begin:end].split()
+    x, rest = vertices[-1].split(",", 1)
+    vertices[-1] = f"{float(x) + dx:.3f},{rest}"
+    out.write_text(text[:begin] + " ".join(vertices) + text[end:], encoding="utf-8")
+    return out
+
+
+def assert_tables_equal(table, expected) -> None:
+    """Asserts two MeasureAnalyseTables hold the same columns and values."""
+    columns, expected_columns = table.columns(), expected.columns()
+    assert list(columns) == list(expected_columns)
+    for name, values in expected_columns.items():
+        np.testing.assert_array_equal(columns[name], values, err_msg=name)
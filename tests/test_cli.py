@@ -0,0 +1,20 @@
+import pytest
+
+from src.imxTools.cli import COMMANDS, main
+
+
+def test_help_lists_all_commands(capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(["--help"])
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    for name in [*COMMANDS, "batch"]:
+        assert name in out
+
+
+@pytest.mark.parametrize("command", [*COMMANDS, "batch"])
+def test_command_help(command, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([command, "--help"])
+    assert exc.value.code == 0
+    assert "usage" in capsys.readouterr().out
@@ -0,0 +1,195 @@
+import pytest
+from imxInsights.utils.report_helpers import REVIEW_STYLES
+from openpyxl import Workbook, load_workbook
+from openpyxl.comments import Comment
+from openpyxl.styles import PatternFill
+
+from src.imxTools.comments.comment_entry import CommentEntry
+from src.imxTools.comments.comments_extractor import (
+    extract_comments_to_new_sheet,
+    extract_sheet_comments,
+)
+from src.imxTools.comments.comments_replacer import DiffSheetIndex
+from src.imxTools.settings import config
+
+OK = REVIEW_STYLES["OK"]
+NOK = REVIEW_STYLES["NOK"]
+QUESTION = REVIEW_STYLES["VRAAG"]
+OTHER = "336699"  # a fill that is not a review color
+
+HEADERS = ["path", "@puic", "status", "geometry_status", "@name", "@kind", "@km"]
+
+
+def fill(color: str) -> PatternFill:
+    return PatternFill("solid", start_color=color)
+
+
+def write_diff_sheet(ws, prefix: str) -> None:
+    """A diff sheet with a title row above the header on row 2."""
+    ws.append([f"{prefix} diff"])
+    ws["A1"].comment = Comment("title remark", "test")
+    ws["C1"].comment = Comment("remark without value", "test")
+    ws.append(HEADERS)
+    for row in range(3, 9):
+        ws.append(
+            [f"Situation.Signal.{row}", f"{prefix}-{row}", "changed", "unchanged"]
+            + [f"name {row}", f"kind {row}", f"{row}.000"]
+        )
+
+    # inherited by the colored cells underneath, not by white or plain cells
+    ws["E2"].comment = Comment("check the names", "test")
+    ws["E2"].fill = fill(OK)
+    # a header comment on a white cell is not inherited
+    ws["F2"].comment = Comment("white header", "test")
+    ws["F2"].fill = fill("FFFFFF")
+
+    ws["E3"].fill = fill(NOK)
+    ws["E4"].fill = fill(OTHER)
+    ws["E5"].comment = Comment("own remark", "test")
+    ws["E5"].fill = fill(NOK)
+    ws["E6"].fill = fill("000000")
+    ws["E7"].fill = fill(QUESTION)
+    ws["E7"].value = None
+
+    ws["F3"].fill = fill(QUESTION)
+    ws["F4"].fill = fill(OTHER)
+    ws["G3"].fill = fill(OK)
+    ws["G4"].comment = Comment("km remark", "test")
+
+    # the merged away cells have no value and are skipped
+    ws["F8"].fill = fill(NOK)
+    ws["G8"].fill = fill(NOK)
+    ws.merge_cells("F8:G8")
+    ws.merge_cells("A1:B1")
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = Workbook()
+    write_diff_sheet(wb.active, "a")
+    wb.active.title = "diff"
+    hidden = wb.create_sheet("hidden")
+    write_diff_sheet(hidden, "b")
+    hidden.sheet_state = "hidden"
+    path = tmp_path / "diff.xlsx"
+    wb.save(path)
+    return load_workbook(path, data_only=True)
+
+
+def expected_entries(sheet: str, prefix: str) -> list[CommentEntry]:
+    """The entries the extractor produced before the single pass rewrite."""
+
+    def row(n):
+        return dict(
+            puic=f"{prefix}-{n}",
+            path=f"Situation.Signal.{n}",
+            status="changed",
+            geometry_status="unchanged",
+        )
+
+    title = dict(puic="", path=f"{prefix} diff", status="", geometry_status="")
+    return [
+        # direct comments above the header
+        CommentEntry(
+            sheet,
+            "path",
+            f"{prefix} diff",
+            "title remark",
+            "A1",
+            "000000",
+            1,
+            1,
+            **title,
+        ),
+        CommentEntry(
+            sheet, "status", "", "remark without value", "C1", "000000", 1, 3, **title
+        ),
+        # inherited from the header comment, on the header row
+        CommentEntry(
+            sheet, "@name", "name 3", "check the names", "E3", NOK, 2, 5, **row(3)
+        ),
+        CommentEntry(
+            sheet, "@name", "name 4", "check the names", "E4", OTHER, 2, 5, **row(4)
+        ),
+        # direct comments and review colored cells, row by row
+        CommentEntry(sheet, "@kind", "kind 3", "", "F3", QUESTION, 3, 6, **row(3)),
+        CommentEntry(sheet, "@km", "3.000", "", "G3", OK, 3, 7, **row(3)),
+        CommentEntry(
+            sheet, "@km", "4.000", "km remark", "G4", "000000", 4, 7, **row(4)
+        ),
+        CommentEntry(sheet, "@name", "name 5", "own remark", "E5", NOK, 5, 5, **row(5)),
+        CommentEntry(sheet, "@kind", "kind 8", "", "F8", NOK, 8, 6, **row(8)),
+    ]
+
+
+def test_extract_sheet_comments(workbook):
+    entries = extract_sheet_comments(workbook["diff"], "diff", header_row=2)
+
+    assert entries == expected_entries("diff", "a")
+
+
+def test_hidden_sheets_are_extracted(workbook):
+    assert workbook["hidden"].sheet_state == "hidden"
+    entries = extract_sheet_comments(workbook["hidden"], "hidden", header_row=2)
+
+    assert entries == expected_entries("hidden", "b")
+
+
+def test_extract_comments_to_new_sheet(workbook, tmp_path):
+    source = tmp_path / "diff.xlsx"
+    output = tmp_path / "comments.xlsx"
+    progress = []
+
+    extract_comments_to_new_sheet(
+        source,
+        str(output),
+        header_row=2,
+        progress=lambda *args: progress.append(args),
+    )
+
+    rows = list(load_workbook(output)[config.ISSUE_LIST_SHEET_NAME].values)
+    assert len(rows) == 1 + 2 * len(expected_entries("diff", "a"))
+    assert [row[1] for row in rows[3:5]] == ["a-3", "a-4"]
+    assert progress
+
+
+@pytest.fixture
+def diff_sheet():
+    ws = Workbook().active
+    ws.append(["diff of two situations"])
+    ws.append(["path", "@puic", "@name", "@puic", "@name", None, 7])
+    ws.append(["Signal", "s1", "first", "x1"])
+    ws.append(["Signal", 2, "second", "x2"])
+    ws.append(["Signal", "s1", "again", "x3"])
+    ws.append(["Signal", None, "no puic", "x4"])
+    return ws
+
+
+def test_diff_sheet_index_columns_first_match(diff_sheet):
+    index = DiffSheetIndex(diff_sheet, header_row=2)
+
+    assert index.find_column("path") == 1
+    assert index.find_column("@name") == 3
+    assert index.puic_column == 2
+    assert index.find_column(7) == 7
+    assert index.find_column("7") is None
+    assert index.find_column("@missing") is None
+
+
+def test_diff_sheet_index_rows_first_match(diff_sheet):
+    index = DiffSheetIndex(diff_sheet, header_row=2)
+
+    assert index.find_row("s1") == 3
+    # puics are compared as text
+    assert index.find_row("2") == 4
+    assert index.find_row(2) == 4
+    assert index.find_row("x1") is None
+    # the rows above and on the header are never a match
+    assert index.find_row("@puic") is None
+
+
+def test_diff_sheet_index_without_puic_column(diff_sheet):
+    index = DiffSheetIndex(diff_sheet, header_row=2, puic_header="@id")
+
+    assert index.puic_column is None
+    assert index.find_row("s1") is None
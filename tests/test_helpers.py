@@ -0,0 +1,46 @@
+import os
+
+from imxInsights.file.singleFileImx.imxSituationEnum import ImxSituationEnum
+
+from src.imxTools.utils import helpers
+from src.imxTools.utils.helpers import IMSPOOR_NS, get_situations
+
+
+def write_situations(path, *tags: str):
+    body = "".join(f"<{tag}><Signal/></{tag}>" for tag in tags)
+    path.write_text(f'<ImSpoor xmlns="{IMSPOOR_NS}">{body}</ImSpoor>')
+    return path
+
+
+def test_get_situations(tmp_path):
+    assert get_situations(write_situations(tmp_path / "a.xml", "Situation")) == [
+        ImxSituationEnum.Situation
+    ]
+    assert get_situations(
+        write_situations(tmp_path / "b.xml", "InitialSituation", "NewSituation")
+    ) == [ImxSituationEnum.InitialSituation, ImxSituationEnum.NewSituation]
+    assert get_situations(write_situations(tmp_path / "c.xml", "InitialSituation")) == [
+        ImxSituationEnum.InitialSituation
+    ]
+
+
+def test_get_situations_rescans_a_changed_file(tmp_path, monkeypatch):
+    scanned = []
+    scan = helpers._scan_situations
+    monkeypatch.setattr(
+        helpers, "_scan_situations", lambda path: scanned.append(path) or scan(path)
+    )
+    path = write_situations(tmp_path / "imx.xml", "Situation")
+
+    get_situations(path)
+    get_situations(path)
+    assert len(scanned) == 1
+
+    write_situations(path, "InitialSituation", "NewSituation")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert get_situations(path) == [
+        ImxSituationEnum.InitialSituation,
+        ImxSituationEnum.NewSituation,
+    ]
+    assert len(scanned) == 2
@@ -0,0 +1,176 @@
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.imxTools.settings import config
+from src.imxTools.utils.job_queue import (
+    MEMORY_PER_INPUT_BYTE,
+    BackgroundJob,
+    JobQueue,
+    JobState,
+    _run,
+    estimate_memory,
+)
+
+
+# the jobs run in spawned processes, their functions are importable module members
+def write_text(out: Path, text: str = "ok", seconds: float = 0.0) -> None:
+    time.sleep(seconds)
+    (Path(out) / "result.txt").write_text(text)
+
+
+def write_file(out: Path) -> None:
+    Path(out).write_text("ok")
+
+
+def fail(out: Path) -> None:
+    raise ValueError("boom")
+
+
+def wait_until(condition, timeout: float = 60.0) -> None:
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise TimeoutError
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE", False)
+    job_queue = JobQueue(tmp_path / "jobs", workers=2)
+    yield job_queue
+    job_queue.shutdown()
+
+
+def test_submit_done(jobs):
+    job = jobs.submit("write", write_text, "result.zip", text="hello")
+    wait_until(lambda: job.state.finished)
+
+    assert job.state is JobState.done, job.error
+    with zipfile.ZipFile(job.result) as zf:
+        assert zf.read("result.txt") == b"hello"
+    assert (job.folder / "job.json").exists()
+
+
+def test_submit_output_file(jobs):
+    job = jobs.submit("write", write_file, "result.txt", output_file="result.txt")
+    wait_until(lambda: job.state.finished)
+
+    assert job.state is JobState.done, job.error
+    assert job.result == job.output / "result.txt"
+    assert job.result.read_text() == "ok"
+
+
+def test_submit_failed(jobs):
+    job = jobs.submit("fail", fail, "result.zip")
+    wait_until(lambda: job.state.finished)
+
+    assert job.state is JobState.failed
+    assert job.error == "boom"
+
+
+def test_cancel_running(jobs):
+    job = jobs.submit("slow", write_text, "result.zip", seconds=60)
+    wait_until(lambda: job.state is JobState.running)
+
+    start = time.monotonic()
+    assert jobs.cancel(job.id)
+    # the caller does not wait for the worker to stop
+    assert time.monotonic() - start < 1
+    assert job.state is JobState.cancelled
+    wait_until(lambda: not jobs._processes)
+    assert not job.result.exists()
+    assert not jobs.cancel(job.id)
+
+
+def test_remove_cancelled_job(jobs):
+    job = jobs.submit("slow", write_text, "result.zip", seconds=60)
+    wait_until(lambda: job.state is JobState.running)
+
+    jobs.cancel(job.id)
+    jobs.remove(job.id)
+
+    assert jobs.get(job.id) is None
+    # the folder goes once the stopped process is joined
+    wait_until(lambda: not job.folder.exists())
+    assert jobs._thread.is_alive()
+    after = jobs.submit("write", write_text, "result.zip")
+    wait_until(lambda: after.state.finished)
+    assert after.state is JobState.done, after.error
+
+
+def test_remove_finished_job(jobs):
+    job = jobs.submit("write", write_text, "result.zip")
+    # done can be applied before the process is reaped
+    wait_until(lambda: job.state.finished)
+    jobs.remove(job.id)
+
+    wait_until(lambda: not job.folder.exists())
+    assert jobs._thread.is_alive()
+    assert not jobs._removed
+
+
+def test_bad_event_keeps_the_scheduler_running(jobs):
+    first = jobs.submit("write", write_text, "a.zip")
+    wait_until(lambda: first.state.finished)
+
+    jobs._events.put(("unknown", "stage"))
+    second = jobs.submit("write", write_text, "b.zip")
+    wait_until(lambda: second.state.finished)
+
+    assert second.state is JobState.done, second.error
+    assert jobs._thread.is_alive()
+
+
+def test_done_event_after_worker_exit(jobs, tmp_path):
+    # the worker sent done and exited between reading the events and reaping
+    folder = tmp_path / "race"
+    job = BackgroundJob("race", "race", folder, "result.zip", folder / "result.zip")
+    job.output.mkdir(parents=True)
+    job.state = JobState.running
+    jobs._jobs[job.id] = job
+    process = jobs._context.Process(
+        target=_run,
+        args=(job.id, job.name, write_text, {"out": job.output}, None, jobs._events),
+    )
+    process.start()
+    process.join()
+    jobs._processes[job.id] = (process, 0)
+
+    jobs._reap()
+
+    assert job.state is JobState.done, job.error
+    assert not jobs._processes
+
+
+def test_estimate_memory(tmp_path):
+    text = tmp_path / "imx.xml"
+    text.write_bytes(b"x" * 1000)
+    archive = tmp_path / "imx.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("imx.xml", b"x" * 5000)
+
+    assert estimate_memory(text) == 1000 * MEMORY_PER_INPUT_BYTE
+    # zips count with their uncompressed size
+    assert estimate_memory(text, archive, None) == 6000 * MEMORY_PER_INPUT_BYTE
+    assert estimate_memory(tmp_path / "missing.xml") == 0
+
+
+def test_memory_admission(jobs, monkeypatch):
+    monkeypatch.setattr(config, "JOB_MEMORY_LIMIT_BYTES", 1000)
+    first = jobs.submit("big", write_text, "a.zip", 600, seconds=1)
+    second = jobs.submit("big", write_text, "b.zip", 600)
+    small = jobs.submit("small", write_text, "c.zip", 100)
+
+    wait_until(lambda: first.state is JobState.running)
+    # the second does not fit next to the first, the small one keeps its turn
+    assert second.state is JobState.queued
+    assert small.state is JobState.queued
+    assert jobs.position(small) == 1
+
+    wait_until(lambda: all(job.state.finished for job in (first, second, small)))
+    assert [job.state for job in (first, second, small)] == [JobState.done] * 3
+    assert second.started >= first.finished
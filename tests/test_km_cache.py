@@ -0,0 +1,107 @@
+import pytest
+from shapely import Point
+
+from src.imxTools.utils.km_cache import CachedKmService, KmCache
+
+
+class StubKmService:
+    """Answers from the coordinates and records the points it was asked for."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_km(self, x: float, y: float):
+        # kmService is imported after imxInsights, like the app does
+        from kmService.km_responses import KmLintMeasure, KmLintResponse, KmResponse
+
+        self.calls.append((x, y))
+        lint = KmLintResponse(puic=f"lint-{int(y) % 3}", name="L", km_from=0.0)
+        measure = KmLintMeasure(
+            input_point=Point(x, y),
+            hm=round(x / 1000, 1),
+            distance=x % 100,
+            km_lint=lint,
+            geocode=None,
+            raai=None,
+        )
+        return KmResponse(input_point=Point(x, y), km_measures=[measure])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    km_cache = KmCache(tmp_path / "km.sqlite", "v1", precision=3)
+    yield km_cache
+    km_cache.close()
+
+
+def test_miss_queries_the_exact_point(cache):
+    service = StubKmService()
+    cached_service = CachedKmService(service, cache)
+
+    response = cached_service.get_km(150000.12345, 400000.6789)
+
+    assert service.calls == [(150000.12345, 400000.6789)]
+    assert response == service.get_km(150000.12345, 400000.6789)
+
+
+def test_hit_equals_fresh_response(cache):
+    service = StubKmService()
+    cached_service = CachedKmService(service, cache)
+    fresh = cached_service.get_km(150000.5, 400001.25)
+
+    cached = cached_service.get_km(150000.5, 400001.25)
+
+    assert len(service.calls) == 1
+    assert cache.stats.hits == 1
+    assert cached.km_measures[0].km_lint == fresh.km_measures[0].km_lint
+    assert cached.km_measures[0].distance == fresh.km_measures[0].distance
+    assert cached.input_point.equals(fresh.input_point)
+
+
+def test_missing_lint_is_a_miss(cache):
+    cache.put(150000.0, 400000.0, StubKmService().get_km(150000.0, 400000.0))
+    cache._connection.execute("DELETE FROM lints")
+    cache._lints.clear()
+
+    assert cache.get(150000.0, 400000.0) is None
+    assert cache.stats.misses == 1
+
+
+def test_other_data_version_is_dropped(tmp_path):
+    path = tmp_path / "km.sqlite"
+    old = KmCache(path, "v1")
+    old.put(1.0, 2.0, StubKmService().get_km(1.0, 2.0))
+    assert len(old) == 1
+    old.close()
+
+    new = KmCache(path, "v2")
+    assert len(new) == 0
+    assert new.get(1.0, 2.0) is None
+    new.close()
+
+
+def test_warm_up_resolves_each_key_once(cache):
+    service = StubKmService()
+    cached_service = CachedKmService(service, cache)
+    points = [(1.00001, 2.0), (1.00002, 2.0), (5.0, 6.0)]
+
+    assert cached_service.warm_up(points, max_workers=2) == 2
+    assert sorted(service.calls) == [(1.00001, 2.0), (5.0, 6.0)]
+    assert cached_service.warm_up(points) == 0
+    # the existence checks of the warm-up are no lookups
+    assert cache.stats.hits == cache.stats.misses == 0
+    assert cached_service.get_km(1.0, 2.0) is not None
+    assert cache.stats.hits == 1
+
+
+def test_contains(tmp_path):
+    cache = KmCache(tmp_path / "km.sqlite", "v1", ttl_days=1)
+    cache.put(1.0, 2.0, StubKmService().get_km(1.0, 2.0))
+
+    assert cache.contains(1.0, 2.0)
+    assert cache.contains(1.0001, 2.0)
+    assert not cache.contains(3.0, 4.0)
+    cache._connection.execute("UPDATE points SET created = 0")
+    assert not cache.contains(1.0, 2.0)
+    assert cache.stats.misses == cache.stats.hits == 0
+    cache.close()
@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.pipelines_benchmark import _StubKmService
+from src.imxTools.utils.kmExcelProcessor import KmExcelProcessor
+
+GML_COLUMN = "Location.GeographicLocation.Point.gml:coordinates"
+
+
+class FlyoverKmService(_StubKmService):
+    """Two km lints east of x 200000, no km at all west of x 50000."""
+
+    def get_km(self, x: float, y: float):
+        if x < 50_000:
+            return SimpleNamespace(km_measures=[])
+        response = super().get_km(x, y)
+        if x > 200_000:
+            response.km_measures.append(super().get_km(x + 1, y + 1).km_measures[0])
+        return response
+
+
+@pytest.fixture
+def km_workbook(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Signal"
+    ws.append(["@puic", "@name", GML_COLUMN])
+    ws.append(["s1", "A", "150000.123,400000.456"])
+    ws.append(["s2", "B", "150000.123,400000.456 -> 150010.000,400020.000"])
+    ws.append(["s3", "C", "++210000.000,450000.000"])
+    ws.append(["s4", "D", "--40000.000,450000.000"])
+    ws.append(["s5", "E", None])
+    ws.append(["s6", None, "not a point"])
+    ws.append(["s7", "G", "210000.000,450000.000 -> 150000.123,400000.456"])
+
+    other = wb.create_sheet("Track")
+    other.append(["@puic", "@length"])
+    other.append(["t1", 12.5])
+    other.append(["t2", 100])
+
+    path = tmp_path / "km.xlsx"
+    wb.save(path)
+    return path
+
+
+def read_output(path):
+    wb = load_workbook(path)
+    return {
+        ws.title: (
+            # an empty string and an empty cell read back the same in Excel
+            [[None if v == "" else v for v in row] for row in ws.values],
+            ws.auto_filter.ref,
+        )
+        for ws in wb.worksheets
+    }
+
+
+@pytest.mark.parametrize("use_simple", [True, False])
+def test_streaming_matches_in_memory(km_workbook, tmp_path, use_simple):
+    in_memory = tmp_path / "in_memory.xlsx"
+    streamed = tmp_path / "streamed.xlsx"
+
+    KmExcelProcessor(FlyoverKmService(), use_simple).process(km_workbook, in_memory)
+    KmExcelProcessor(FlyoverKmService(), use_simple, streaming=True).process(
+        km_workbook, streamed
+    )
+
+    expected = read_output(in_memory)
+    assert read_output(streamed) == expected
+
+    rows, autofilter = expected["Signal"]
+    km_headers = ["km_1_old", "km_1_new", "km_2_old", "km_2_new"]
+    if use_simple:
+        assert rows[0][3:] == km_headers
+        assert autofilter == "A1:G8"
+    else:
+        assert rows[0][3:6] == ["km_1_old_hm", "km_1_old_m", "km_1_old_name"]
+        assert autofilter == "A1:O8"
+    assert expected["Track"] == (
+        [["@puic", "@length"], ["t1", 12.5], ["t2", 100]],
+        "A1:B3",
+    )
+
+
+class CountingKmService(FlyoverKmService):
+    """Records the points it was asked for, fails for x 999."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_km(self, x: float, y: float):
+        self.calls.append((x, y))
+        if x == 999:
+            raise ValueError("no km lint")
+        return super().get_km(x, y)
+
+
+def test_rows_sharing_a_point_are_resolved_once(km_workbook, tmp_path):
+    service = CountingKmService()
+
+    KmExcelProcessor(service).process(km_workbook, tmp_path / "out.xlsx")
+
+    assert sorted(service.calls) == [
+        (40000.0, 450000.0),
+        (150000.123, 400000.456),
+        (150010.0, 400020.0),
+        (210000.0, 450000.0),
+    ]
+
+
+@pytest.mark.parametrize("use_simple", [True, False])
+def test_two_phase_matches_per_row_lookups(km_workbook, tmp_path, use_simple):
+    two_phase = tmp_path / "two_phase.xlsx"
+    per_row = tmp_path / "per_row.xlsx"
+    service = CountingKmService()
+
+    KmExcelProcessor(service, use_simple).process(km_workbook, two_phase)
+    resolved_calls = len(service.calls)
+    KmExcelProcessor(service, use_simple, two_phase=False).process(km_workbook, per_row)
+
+    assert read_output(two_phase) == read_output(per_row)
+    # one lookup per point of every row without the two phases
+    assert len(service.calls) - resolved_calls == 8
+
+
+def test_resolve_points_rounds_and_caches():
+    service = CountingKmService()
+    processor = KmExcelProcessor(service, cache_size=2, precision=1)
+    keys = [(1.0, 2.0), (3.0, 4.0)]
+
+    first = processor.resolve_points(keys)
+    again = processor.resolve_points(keys)
+
+    assert service.calls == keys
+    assert again == first
+    assert processor._point_key(SimpleNamespace(x=1.04, y=1.96)) == (1.0, 2.0)
+
+    # the least recently used point is evicted beyond cache_size
+    processor.resolve_points([(1.0, 2.0)])
+    processor.resolve_points([(5.0, 6.0)])
+    assert list(processor._km_cache) == [(1.0, 2.0), (5.0, 6.0)]
+    processor.resolve_points([(3.0, 4.0)])
+    assert service.calls[-1] == (3.0, 4.0)
+
+
+def test_failed_lookup_is_kept_as_its_exception(tmp_path):
+    service = CountingKmService()
+    processor = KmExcelProcessor(service)
+
+    resolved = processor.resolve_points([(999.0, 1.0)])
+    assert isinstance(resolved[(999.0, 1.0)], ValueError)
+
+    wb = Workbook()
+    wb.active.append(["@puic", GML_COLUMN])
+    wb.active.append(["s1", "999,1"])
+    wb.save(tmp_path / "in.xlsx")
+    processor.process(tmp_path / "in.xlsx", tmp_path / "out.xlsx")
+
+    # the failure is cached too and written as the row's error
+    assert len(service.calls) == 1
+    row = list(load_workbook(tmp_path / "out.xlsx").active.values)[1]
+    assert row[2:] == ("ERROR: no km lint", "ERROR: no km lint")
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from src.imxTools.utils.km_resolver import KmResolver
+
+
+class FakeKmService:
+    """Answers with the point itself and records which method was asked."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_km(self, x: float, y: float):
+        self.calls.append(("get_km", ((x, y),)))
+        return (x, y)
+
+    def get_km_batch(self, point_list: list[list[float]]):
+        self.calls.append(("get_km_batch", tuple(tuple(p) for p in point_list)))
+        return [tuple(point) for point in point_list]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_lookup_waits_for_the_debounce():
+    service = FakeKmService()
+    resolver = KmResolver(lambda: service, debounce=0.2)
+
+    async def scenario():
+        task = asyncio.create_task(resolver.resolve_point(1, 2))
+        await asyncio.sleep(0.1)
+        assert service.calls == []
+        return await task
+
+    assert run(scenario()) == (1.0, 2.0)
+    assert service.calls == [("get_km", ((1.0, 2.0),))]
+
+
+def test_newer_request_cancels_the_stale_one():
+    service = FakeKmService()
+    resolver = KmResolver(lambda: service, debounce=0.05)
+
+    async def scenario():
+        stale = asyncio.create_task(resolver.resolve_point(1, 2))
+        await asyncio.sleep(0)
+        latest = await resolver.resolve_point(3, 4)
+        return await stale, latest
+
+    assert run(scenario()) == (None, (3.0, 4.0))
+    assert service.calls == [("get_km", ((3.0, 4.0),))]
+
+
+def test_identical_request_joins_the_lookup_in_flight():
+    service = FakeKmService()
+    resolver = KmResolver(lambda: service, debounce=0.05)
+
+    async def scenario():
+        first = asyncio.create_task(resolver.resolve([(1, 2), (3, 4)]))
+        await asyncio.sleep(0)
+        second = await resolver.resolve([(1.0, 2.0), (3.0, 4.0)])
+        return await first, second
+
+    first, second = run(scenario())
+    assert first == second == [(1.0, 2.0), (3.0, 4.0)]
+    assert len(service.calls) == 1
+
+
+def test_single_point_and_batch_routing():
+    service = FakeKmService()
+    resolver = KmResolver(lambda: service, debounce=0)
+
+    run(resolver.resolve([(1, 2)]))
+    run(resolver.resolve([(1, 2), (3, 4)]))
+
+    assert service.calls == [
+        ("get_km", ((1.0, 2.0),)),
+        ("get_km_batch", ((1.0, 2.0), (3.0, 4.0))),
+    ]
+
+
+def test_service_not_running():
+    resolver = KmResolver(lambda: None, debounce=0)
+
+    with pytest.raises(RuntimeError, match="not running"):
+        run(resolver.resolve_point(1, 2))
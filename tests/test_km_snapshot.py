@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from src.imxTools.utils.km_snapshot import load_km_snapshot, save_km_snapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "km_snapshot.pickle"
+    km_service = SimpleNamespace(_value_objects_dict={"km_vlakken": [1, 2]})
+
+    assert save_km_snapshot(km_service, path) == path
+    loaded = load_km_snapshot(path, max_age_days=1)
+
+    assert loaded._value_objects_dict == {"km_vlakken": [1, 2]}
+
+
+def test_snapshot_max_age(tmp_path):
+    path = save_km_snapshot(
+        SimpleNamespace(_value_objects_dict={}), tmp_path / "km_snapshot.pickle"
+    )
+
+    # an explicit 0 is not the configured default, every snapshot is too old
+    assert load_km_snapshot(path, max_age_days=0) is None
+    assert load_km_snapshot(path, max_age_days=1) is not None
+
+
+def test_missing_or_unreadable_snapshot(tmp_path):
+    path = tmp_path / "km_snapshot.pickle"
+    assert load_km_snapshot(path) is None
+
+    path.write_bytes(b"not a pickle")
+    assert load_km_snapshot(path) is None
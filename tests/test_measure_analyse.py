@@ -0,0 +1,65 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.imxTools.insights.measure_analyse import (
+    MeasureAnalyseStats,
+    calculate_measurements,
+    generate_analyse_df,
+)
+from tests.conftest import assert_tables_equal
+
+
+def test_workers_match_serial(synthetic_situation):
+    serial = calculate_measurements(synthetic_situation, workers=1)
+    stats = MeasureAnalyseStats()
+    parallel = calculate_measurements(synthetic_situation, workers=2, stats=stats)
+
+    assert len(serial) == 200
+    assert stats.rail_connections == 4
+    assert_tables_equal(parallel, serial)
+
+
+def test_projection_seconds_per_geometry(synthetic_situation):
+    stats = MeasureAnalyseStats()
+    calculate_measurements(synthetic_situation, workers=2, stats=stats)
+
+    assert set(stats.projection_seconds_per_geometry) <= set(stats.objects_per_geometry)
+    # the worker time of the projections, not the scan of the objects
+    assert 0 < stats.projection_seconds_per_geometry["Point"]
+    assert "projection" in stats.summary()
+
+
+def test_projection_seconds_are_shared_by_point_count():
+    stats = MeasureAnalyseStats()
+    stats.add_projection(Counter(Point=3, LineString=1), 2.0)
+    stats.add_projection(Counter(Point=1), 0.5)
+
+    assert stats.projection_seconds_per_geometry["Point"] == pytest.approx(2.0)
+    assert stats.projection_seconds_per_geometry["LineString"] == pytest.approx(0.5)
+
+
+def test_rows_per_signal(synthetic_imx, synthetic_situation):
+    columns = calculate_measurements(synthetic_situation).columns()
+
+    assert sorted(columns["object_puic"]) == sorted(synthetic_imx.signals)
+    assert set(columns["ref_field_value"]) == set(synthetic_imx.rail_connections)
+    assert set(columns["measure_type"]) == {"atMeasure"}
+    # every signal has an IMX measure to compare with
+    assert not np.isnan(columns["imx_measure"]).any()
+    assert not np.isnan(columns["abs_imx_vs_2d"]).any()
+
+
+def test_generate_analyse_df(synthetic_situation):
+    stages = []
+    df = generate_analyse_df(
+        synthetic_situation, progress=lambda progress: stages.append(progress.stage)
+    )
+
+    expected = calculate_measurements(synthetic_situation).to_dataframe()
+    pd.testing.assert_frame_equal(df, expected)
+    assert ["scan objects", "project rail connections", "build rows"] == list(
+        dict.fromkeys(stages)
+    )
@@ -0,0 +1,109 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from src.imxTools.insights.measure_analyse import (
+    MeasureAnalyseStats,
+    calculate_measurements,
+)
+from src.imxTools.insights.measure_cache import (
+    CACHE_FORMAT,
+    MeasureProjectionCache,
+    geometry_hash,
+)
+from tests.conftest import assert_tables_equal, load_situation, move_track
+
+
+def test_geometry_hash():
+    coords = [(0.0, 0.0, 1.0), (10.0, 0.0, 1.5)]
+
+    assert geometry_hash(coords) == geometry_hash(np.array(coords))
+    assert len(geometry_hash(coords)) == 16
+    assert geometry_hash(coords) != geometry_hash([(0.0, 0.0, 1.0), (10.0, 0.001, 1.5)])
+
+
+def test_cache_hit_equals_fresh_projection(synthetic_situation):
+    cache = MeasureProjectionCache()
+    fresh = calculate_measurements(synthetic_situation)
+    first = calculate_measurements(synthetic_situation, cache=cache)
+    assert cache.hits == 0
+    assert len(cache) == len(fresh)
+
+    stats = MeasureAnalyseStats()
+    cached = calculate_measurements(synthetic_situation, stats=stats, cache=cache)
+
+    assert cache.hits == len(fresh)
+    assert stats.projections == 0
+    assert stats.projections_cached == len(fresh)
+    assert_tables_equal(first, fresh)
+    assert_tables_equal(cached, fresh)
+
+
+def test_changed_rail_connection_only_invalidates_its_points(
+    synthetic_imx, synthetic_situation, tmp_path
+):
+    cache = MeasureProjectionCache()
+    calculate_measurements(synthetic_situation, cache=cache)
+    misses = cache.misses
+    changed = synthetic_imx.rail_connections[1]
+    moved = load_situation(
+        move_track(synthetic_imx.path, tmp_path / "moved.xml", changed, 2.0)
+    )
+
+    stats = MeasureAnalyseStats()
+    table = calculate_measurements(moved, stats=stats, cache=cache)
+
+    fresh = calculate_measurements(moved)
+    on_changed = int((fresh.columns()["ref_field_value"] == changed).sum())
+    assert on_changed > 0
+    assert stats.projections == on_changed
+    assert cache.misses - misses == on_changed
+    assert stats.projections_cached == len(fresh) - on_changed
+    assert_tables_equal(table, fresh)
+
+
+def test_save_load_round_trip(synthetic_situation, tmp_path):
+    path = tmp_path / "measures.pickle"
+    cache = MeasureProjectionCache()
+    expected = calculate_measurements(synthetic_situation, cache=cache)
+    cache.save(path)
+
+    loaded = MeasureProjectionCache.load(path)
+    assert len(loaded) == len(cache)
+    table = calculate_measurements(synthetic_situation, cache=loaded)
+
+    assert loaded.hits == len(expected)
+    assert loaded.misses == 0
+    assert_tables_equal(table, expected)
+
+
+def test_save_keeps_used_entries(tmp_path):
+    path = tmp_path / "measures.pickle"
+    cache = MeasureProjectionCache()
+    cache.put(("a", "ref", "atMeasure"), b"o", b"r", 1.0, 1.5)
+    cache.put(("b", "ref", "atMeasure"), b"o", b"r", 2.0, np.nan)
+    cache.save(path)
+
+    loaded = MeasureProjectionCache.load(path)
+    assert loaded.get(("a", "ref", "atMeasure"), b"o", b"r") == (1.0, 1.5)
+    # outdated hashes are a miss
+    assert loaded.get(("b", "ref", "atMeasure"), b"other", b"r") is None
+    loaded.save(path)
+
+    assert len(MeasureProjectionCache.load(path)) == 1
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"not a pickle",
+        pickle.dumps({"format": CACHE_FORMAT + 1, "entries": {("a", "b", "c"): ()}}),
+    ],
+)
+def test_load_ignores_unusable_files(tmp_path, content):
+    path = tmp_path / "measures.pickle"
+    path.write_bytes(content)
+
+    assert len(MeasureProjectionCache.load(path)) == 0
+    assert len(MeasureProjectionCache.load(tmp_path / "missing.pickle")) == 0
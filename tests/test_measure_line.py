@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from shapely import LineString, Point
+
+from src.imxTools.utils.measure_line import (
+    SPATIAL_INDEX_MIN_SEGMENTS,
+    MeasureLine,
+    ProjectionPointPosition,
+    ProjectionsStatus,
+)
+
+
+def random_walk(vertices: int, is_3d: bool, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    angles = np.cumsum(rng.normal(0, 0.3, vertices - 1))
+    steps = np.column_stack((np.cos(angles), np.sin(angles))) * rng.uniform(
+        5, 25, (vertices - 1, 1)
+    )
+    line = np.vstack(([0.0, 0.0], np.cumsum(steps, axis=0)))
+    if is_3d:
+        line = np.column_stack((line, rng.normal(0, 1, vertices)))
+    return line
+
+
+def points_near(line: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(line) - 1, count)
+    t = rng.uniform(0, 1, (count, 1))
+    base = line[idx, :2] + t * (line[idx + 1, :2] - line[idx, :2])
+    points = base + rng.normal(0, 3, (count, 2))
+    # before the start and beyond the end of the line
+    start_dir = line[0, :2] - line[1, :2]
+    end_dir = line[-1, :2] - line[-2, :2]
+    extra = [line[0, :2] + 2 * start_dir, line[-1, :2] + 2 * end_dir]
+    return np.vstack((points, extra))
+
+
+def reference_projection(line: np.ndarray, point: np.ndarray):
+    """Scalar projection as MeasureLine.project did before project_many."""
+    shapely_line = LineString(line)
+    measure_2d = shapely_line.project(Point(point[:2]))
+    projected = np.array(shapely_line.interpolate(measure_2d).coords[0])
+    if len(projected) == 2:
+        projected = np.append(projected, 0.0)
+
+    cum_2d = np.concatenate(
+        ([0], np.cumsum(np.linalg.norm(np.diff(line[:, :2], axis=0), axis=1)))
+    )
+    seg = int(
+        np.clip(np.searchsorted(cum_2d, measure_2d, side="right") - 1, 0, len(line) - 2)
+    )
+    measure_3d = None
+    if line.shape[1] == 3:
+        cum_3d = np.concatenate(
+            ([0], np.cumsum(np.linalg.norm(np.diff(line, axis=0), axis=1)))
+        )
+        measure_3d = cum_3d[seg] + np.linalg.norm(projected - line[seg])
+    return measure_2d, projected, measure_3d
+
+
+@pytest.mark.parametrize("is_3d", [False, True])
+@pytest.mark.parametrize(
+    "vertices", [10, SPATIAL_INDEX_MIN_SEGMENTS + 1, 4 * SPATIAL_INDEX_MIN_SEGMENTS]
+)
+def test_project_many_matches_scalar_projection(vertices, is_3d):
+    line = random_walk(vertices, is_3d)
+    points = points_near(line, 300)
+    measure_line = MeasureLine(line)
+    assert (measure_line._segment_index is not None) == (
+        vertices - 1 >= SPATIAL_INDEX_MIN_SEGMENTS
+    )
+
+    batch = measure_line.project_many(points)
+
+    assert len(batch) == len(points)
+    for i, point in enumerate(points):
+        measure_2d, projected, measure_3d = reference_projection(line, point)
+        assert batch.measure_2d[i] == pytest.approx(measure_2d, abs=1e-6)
+        np.testing.assert_allclose(batch.projected_points[i], projected, atol=1e-6)
+        if is_3d:
+            assert batch.measure_3d[i] == pytest.approx(measure_3d, abs=1e-6)
+        else:
+            assert np.isnan(batch.measure_3d[i])
+
+
+@pytest.mark.parametrize("is_3d", [False, True])
+def test_spatial_index_matches_linear_scan(is_3d):
+    line = random_walk(4 * SPATIAL_INDEX_MIN_SEGMENTS, is_3d, seed=3)
+    points = points_near(line, 500, seed=4)
+
+    indexed = MeasureLine(line).project_many(points)
+    scanned = MeasureLine(line, use_spatial_index=False).project_many(points)
+
+    np.testing.assert_allclose(indexed.measure_2d, scanned.measure_2d, atol=1e-6)
+    np.testing.assert_allclose(
+        indexed.projected_points, scanned.projected_points, atol=1e-6
+    )
+    np.testing.assert_allclose(indexed.measure_3d, scanned.measure_3d, atol=1e-6)
+    assert list(indexed.side) == list(scanned.side)
+    assert list(indexed.overshoot_undershoot) == list(scanned.overshoot_undershoot)
+
+
+def test_project_equals_project_many():
+    line = random_walk(100, True, seed=5)
+    points = points_near(line, 20, seed=6)
+    measure_line = MeasureLine(line)
+    batch = measure_line.project_many(points)
+
+    for i, point in enumerate(points):
+        result = measure_line.project(point)
+        assert result.measure_2d == batch.measure_2d[i]
+        assert result.measure_3d == batch.get_measure_3d(i)
+        assert result.side is batch.side[i]
+        assert result.overshoot_undershoot is batch.overshoot_undershoot[i]
+
+
+def test_side_and_status():
+    measure_line = MeasureLine([[0, 0, 0], [10, 0, 0], [20, 0, 1]])
+
+    left = measure_line.project([5, 2])
+    right = measure_line.project(Point(15, -1))
+    before = measure_line.project([-3, 1])
+    beyond = measure_line.project([25, 0])
+
+    assert left.side is ProjectionPointPosition.LEFT
+    assert left.overshoot_undershoot is ProjectionsStatus.PERPENDICULAR
+    assert left.measure_2d == pytest.approx(5)
+    assert left.measure_3d == pytest.approx(5)
+    assert right.side is ProjectionPointPosition.RIGHT
+    assert right.measure_3d == pytest.approx(10 + np.hypot(5, 0.5))
+    assert before.overshoot_undershoot is ProjectionsStatus.UNDERSHOOT
+    assert before.measure_2d == 0
+    assert beyond.overshoot_undershoot is ProjectionsStatus.OVERSHOOT
+    assert beyond.side is ProjectionPointPosition.UNDEFINED
+
+
+def test_project_many_empty_and_invalid():
+    measure_line = MeasureLine([[0, 0], [10, 0]])
+
+    assert len(measure_line.project_many(np.empty((0, 2)))) == 0
+    with pytest.raises(ValueError):
+        measure_line.project_many([[1, 2, 3, 4]])
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+
+from src.imxTools.insights.measure_analyse import convert_analyse_to_issue_list
+from src.imxTools.insights.measure_table import MeasureAnalyseTable
+from src.imxTools.insights.mesaure_analyse_enums import MeasureAnalyseColumns
+
+REF_FIELD = "RailConnectionInfo.@railConnectionRef"
+
+
+def _table(capacity: int = 1) -> MeasureAnalyseTable:
+    table = MeasureAnalyseTable(capacity=capacity)
+    table.append(
+        "Signal", "s1", "S1", REF_FIELD, "rc1", "RC1", "atMeasure", 10.0, 10.5, 10.12345
+    )
+    table.append(
+        "Signal", "s2", "S2", REF_FIELD, "rc1", "RC1", "atMeasure", None, 20.5, 20.0
+    )
+    table.append(
+        "Track", "t1", "T1", REF_FIELD, "rc2", "RC2", "fromMeasure", 5.0, 5.25, np.nan
+    )
+    return table
+
+
+def test_columns():
+    # capacity 1 grows twice
+    table = _table()
+    columns = table.columns()
+
+    assert len(table) == 3
+    assert list(columns) == [column.name for column in MeasureAnalyseColumns]
+    assert list(columns["object_puic"]) == ["s1", "s2", "t1"]
+    assert list(columns["measure_type"]) == ["atMeasure", "atMeasure", "fromMeasure"]
+    np.testing.assert_array_equal(columns["imx_measure"], [10.0, np.nan, 5.0])
+    np.testing.assert_array_equal(
+        columns["calculated_measure_3d"], [10.123, 20.0, np.nan]
+    )
+    np.testing.assert_allclose(columns["abs_imx_vs_3d"], [0.12345, np.nan, np.nan])
+    np.testing.assert_array_equal(columns["calculated_measure_2d"], [10.5, 20.5, 5.25])
+    np.testing.assert_array_equal(columns["abs_imx_vs_2d"], [0.5, np.nan, 0.25])
+
+
+def test_to_records():
+    records = _table().to_records()
+
+    assert records[0] == {
+        "object_path": "Signal",
+        "object_puic": "s1",
+        "object_name": "S1",
+        "ref_field": REF_FIELD,
+        "ref_field_value": "rc1",
+        "ref_field_name": "RC1",
+        "measure_type": "atMeasure",
+        "imx_measure": 10.0,
+        "calculated_measure_3d": 10.123,
+        "abs_imx_vs_3d": records[0]["abs_imx_vs_3d"],
+        "calculated_measure_2d": 10.5,
+        "abs_imx_vs_2d": 0.5,
+    }
+    assert math.isclose(records[0]["abs_imx_vs_3d"], 0.12345)
+    # missing measures are None, like the rows before the table
+    assert records[1]["imx_measure"] is None
+    assert records[1]["abs_imx_vs_2d"] is None
+    assert records[2]["calculated_measure_3d"] is None
+
+
+def test_to_dataframe():
+    table = _table(capacity=16)
+    df = table.to_dataframe()
+
+    assert list(df.columns) == [column.name for column in MeasureAnalyseColumns]
+    assert df["imx_measure"].dtype == np.float64
+    assert df["imx_measure"].isna().tolist() == [False, True, False]
+    assert df["object_name"].tolist() == ["S1", "S2", "T1"]
+
+
+def test_empty_table_has_all_columns():
+    df = MeasureAnalyseTable().to_dataframe()
+
+    assert len(df) == 0
+    assert list(df.columns) == [column.name for column in MeasureAnalyseColumns]
+    assert convert_analyse_to_issue_list(df).empty
+
+
+def test_issue_list_from_table():
+    issues = convert_analyse_to_issue_list(_table().to_dataframe(), threshold=0.1)
+
+    # rows with a missing IMX or 3D measure are never an issue
+    assert issues["object_puic"].tolist() == ["s1"]
+    assert issues["attribute_or_element"].tolist() == ["RailConnectionInfo.@atMeasure"]
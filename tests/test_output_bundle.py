@@ -0,0 +1,93 @@
+import io
+import zipfile
+
+import pytest
+
+from src.imxTools.utils.helpers import zip_folder
+from src.imxTools.utils.output_bundle import OutputBundle
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "out"
+    (folder / "sub" / "deeper").mkdir(parents=True)
+    (folder / "report.xlsx").write_bytes(b"PK xlsx " * 100)
+    (folder / "log.txt").write_text("line\n" * 500)
+    (folder / "sub" / "data.csv").write_text("a,b\n1,2\n" * 200)
+    (folder / "sub" / "deeper" / "archive.zip").write_bytes(b"zip " * 100)
+    return folder
+
+
+def entries(data) -> dict[str, tuple[int, bytes]]:
+    with zipfile.ZipFile(data) as zf:
+        return {
+            info.filename: (info.compress_type, zf.read(info))
+            for info in zf.infolist()
+            if not info.is_dir()
+        }
+
+
+def test_compressed_formats_are_stored(folder):
+    bundle = OutputBundle()
+    bundle.add_folder(folder)
+
+    compress_types = {
+        name: compress_type
+        for name, (compress_type, _) in entries(io.BytesIO(bundle.getvalue())).items()
+    }
+    assert compress_types == {
+        "log.txt": zipfile.ZIP_DEFLATED,
+        "report.xlsx": zipfile.ZIP_STORED,
+        "sub/data.csv": zipfile.ZIP_DEFLATED,
+        "sub/deeper/archive.zip": zipfile.ZIP_STORED,
+    }
+
+
+def test_add_folder_with_prefix(folder):
+    bundle = OutputBundle()
+    bundle.add_folder(folder / "sub", prefix="results")
+    bundle.add_file(folder / "log.txt")
+    bundle.add_bytes("notes/readme.md", "hello")
+
+    assert bundle.names == [
+        "results/data.csv",
+        "results/deeper/archive.zip",
+        "log.txt",
+        "notes/readme.md",
+    ]
+
+
+def test_open_streams_into_the_zip(tmp_path):
+    target = tmp_path / "bundle.zip"
+    with OutputBundle(target) as bundle:
+        with bundle.open("big.txt") as stream:
+            for _ in range(1000):
+                stream.write(b"0123456789\n")
+        with bundle.open("table.xlsx") as stream:
+            stream.write(b"xlsx")
+
+    result = entries(target)
+    assert result["big.txt"] == (zipfile.ZIP_DEFLATED, b"0123456789\n" * 1000)
+    assert result["table.xlsx"] == (zipfile.ZIP_STORED, b"xlsx")
+
+
+def test_getvalue_needs_an_in_memory_bundle(tmp_path):
+    bundle = OutputBundle(tmp_path / "bundle.zip")
+    with pytest.raises(ValueError):
+        bundle.getvalue()
+    bundle.close()
+
+
+def test_zip_folder_keeps_its_output(folder, tmp_path):
+    output = tmp_path / "out.zip"
+    zip_folder(folder, output)
+
+    # as zip_folder wrote it before it used OutputBundle
+    reference = tmp_path / "reference.zip"
+    with zipfile.ZipFile(reference, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in folder.rglob("*"):
+            zf.write(path, path.relative_to(folder))
+
+    assert {name: data for name, (_, data) in entries(output).items()} == {
+        name: data for name, (_, data) in entries(reference).items()
+    }
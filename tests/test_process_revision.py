@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+from lxml import etree
+
+from src.imxTools.revision import process_revision
+from src.imxTools.revision.process_revision import (
+    _strip_inherited_namespaces,
+    process_imx_revisions,
+)
+from src.imxTools.revision.revision_enums import RevisionColumns
+
+
+def write_revisions(path, rows: list[dict]):
+    df = pd.DataFrame(rows)
+    for header in RevisionColumns.headers():
+        if header not in df:
+            df[header] = ""
+    df = df[RevisionColumns.headers()].rename(
+        columns=RevisionColumns.header_to_description()
+    )
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name="revisions", index=False)
+    return path
+
+
+def change(puic, attribute, old, new, operation="UpdateAttribute", process="True"):
+    return {
+        RevisionColumns.object_path.name: "Signal",
+        RevisionColumns.object_puic.name: puic,
+        RevisionColumns.attribute_or_element.name: attribute,
+        RevisionColumns.operation.name: operation,
+        RevisionColumns.value_old.name: old,
+        RevisionColumns.value_new.name: new,
+        RevisionColumns.will_be_processed.name: process,
+    }
+
+
+@pytest.fixture(scope="module")
+def revisions(synthetic_imx, tmp_path_factory):
+    signals, measures = synthetic_imx.signals, synthetic_imx.measures
+    at_measure = "RailConnectionInfo.@atMeasure"
+    rows = [
+        change(signals[i], at_measure, measures[i], f"{float(measures[i]) + 0.5:.3f}")
+        for i in range(5)
+    ]
+    rows += [
+        # a second change on the first signal, validated together with the first
+        change(signals[0], "Metadata.@source", "benchmark", "test"),
+        change(signals[5], "", "", "", operation="DeleteObject"),
+        change(signals[6], at_measure, measures[6], "not a measure"),
+        change(signals[7], at_measure, measures[7], "1.000", process="False"),
+        change("missing-puic", at_measure, "1.000", "2.000"),
+    ]
+    path = tmp_path_factory.mktemp("revisions") / "revisions.xlsx"
+    return write_revisions(path, rows)
+
+
+def run(synthetic_imx, revisions, out, streaming):
+    df = process_imx_revisions(
+        synthetic_imx.path, revisions, out, streaming=streaming, verbose=False
+    )
+    return df, (out / f"{synthetic_imx.path.stem}-processed.xml").read_bytes()
+
+
+def test_streaming_matches_dom(synthetic_imx, revisions, tmp_path):
+    dom_log, dom_xml = run(synthetic_imx, revisions, tmp_path / "dom", False)
+    stream_log, stream_xml = run(synthetic_imx, revisions, tmp_path / "stream", True)
+
+    assert stream_xml == dom_xml
+    pd.testing.assert_frame_equal(stream_log, dom_log)
+
+    status = dom_log["status"].fillna("").tolist()
+    assert status[:6] == ["processed"] * 6
+    assert status[6] == "processed"
+    assert status[7].endswith("XSD invalid")
+    assert status[8] == ""
+    assert status[9] == "object not present: missing-puic"
+
+    # the namespaces of the root are not repeated on the streamed objects
+    assert stream_xml.count(b"xmlns") == 2
+    root = etree.fromstring(stream_xml)
+    assert not root.xpath("//*[@puic=$puic]", puic=synthetic_imx.signals[5])
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_each_changed_object_is_validated_once(
+    synthetic_imx, revisions, tmp_path, monkeypatch, streaming
+):
+    validated = []
+    xsd_errors = process_revision.xsd_errors
+
+    def counting_xsd_errors(schema, element):
+        validated.append(element.get("puic"))
+        return xsd_errors(schema, element)
+
+    monkeypatch.setattr(process_revision, "xsd_errors", counting_xsd_errors)
+    run(synthetic_imx, revisions, tmp_path, streaming)
+
+    signals = synthetic_imx.signals
+    # the deleted signal is validated too, the skipped and missing ones are not
+    assert sorted(validated) == sorted(signals[:7])
+
+
+def test_strip_inherited_namespaces():
+    root = etree.fromstring(
+        b'<a xmlns="urn:a" xmlns:g="urn:g">'
+        b'<b xmlns:f="urn:f"><g:c/></b><d xmlns:g="urn:other"/></a>'
+    )
+
+    assert (
+        _strip_inherited_namespaces(etree.tostring(root[0]), root)
+        == b'<b xmlns:f="urn:f"><g:c/></b>'
+    )
+    # a prefix bound to another namespace is kept
+    assert (
+        _strip_inherited_namespaces(etree.tostring(root[1]), root)
+        == b'<d xmlns:g="urn:other"/>'
+    )
+    assert _strip_inherited_namespaces(b"<x/>", None) == b"<x/>"
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from openpyxl import Workbook
+
+from src.imxTools.comments.comments_extractor import extract_comments_to_new_sheet
+from src.imxTools.settings import config
+from src.imxTools.utils.profiling import (
+    current_recorder,
+    pipeline_span,
+    profile_run,
+    span,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_profile_env(monkeypatch):
+    monkeypatch.setattr(config, "PROFILE", False)
+    monkeypatch.setattr(config, "PROFILER", None)
+
+
+def test_nested_spans_and_stage_sums():
+    opened = []
+    with profile_run("run", on_span=opened.append) as recorder:
+        with span("load"):
+            with span("parse"):
+                pass
+        for _ in range(3):
+            with span("step"):
+                with span("parse"):
+                    pass
+
+    root = recorder.root
+    assert [child.name for child in root.children] == ["load", "step", "step", "step"]
+    assert [child.name for child in root.children[0].children] == ["parse"]
+    assert opened == ["load", "parse"] + ["step", "parse"] * 3
+
+    stages = recorder.stages()
+    assert list(stages) == ["run/load", "run/load/parse", "run/step", "run/step/parse"]
+    # repeats of a path are summed
+    steps = [child.seconds for child in root.children[1:]]
+    assert stages["run/step"] == pytest.approx(sum(steps))
+    assert root.seconds >= stages["run/load"] + stages["run/step"]
+
+
+def test_span_without_recorder():
+    with span("nothing"):
+        assert current_recorder() is None
+
+
+def test_json_is_written_on_failure(tmp_path):
+    with pytest.raises(ValueError):
+        with profile_run("failing", tmp_path):
+            with span("before"):
+                pass
+            with span("broken"):
+                raise ValueError("boom")
+
+    (written,) = tmp_path.glob("*-failing-profile.json")
+    data = json.loads(written.read_text(encoding="utf-8"))
+    assert data["name"] == "failing"
+    assert list(data["stages"]) == ["failing/before", "failing/broken"]
+    assert current_recorder() is None
+
+
+def test_pipeline_span_joins_an_active_recorder(tmp_path):
+    with profile_run("outer") as recorder:
+        with pipeline_span("inner", tmp_path, profile=True):
+            with span("stage"):
+                pass
+
+    # a span of the outer run, no second recording is written
+    assert list(recorder.stages()) == ["outer/inner", "outer/inner/stage"]
+    assert not list(tmp_path.iterdir())
+
+
+def test_pipeline_with_profile_writes_its_stages(tmp_path):
+    wb = Workbook()
+    wb.active.append(["@puic", "@name"])
+    wb.active.append(["s1", "A"])
+    source = tmp_path / "diff.xlsx"
+    wb.save(source)
+    out = tmp_path / "out"
+    out.mkdir()
+
+    extract_comments_to_new_sheet(source, str(out / "comments.xlsx"), profile=True)
+
+    (written,) = out.glob("*-extract_comments-profile.json")
+    data = json.loads(written.read_text(encoding="utf-8"))
+    assert list(data["stages"]) == [
+        "extract_comments/load workbook",
+        "extract_comments/extract",
+        "extract_comments/save",
+    ]
+    assert data["spans"]["name"] == "extract_comments"
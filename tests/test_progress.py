@@ -0,0 +1,89 @@
+import pytest
+
+from src.imxTools.utils import progress as progress_module
+from src.imxTools.utils.progress import Progress, ProgressReporter
+
+
+class FakeClock:
+    """perf_counter that only moves when the test moves it, counting the reads."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.reads = 0
+
+    def __call__(self) -> float:
+        self.reads += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(progress_module.time, "perf_counter", fake)
+    return fake
+
+
+def test_called_at_start_and_finish(clock):
+    calls = []
+    reporter = ProgressReporter(calls.append, "stage", total=3, interval=10)
+    for _ in range(3):
+        reporter.advance()
+    clock.now += 2
+    reporter.finish()
+
+    assert calls == [
+        Progress("stage", 0, 3, 0.0),
+        Progress("stage", 3, 3, 2.0),
+    ]
+    assert calls[-1].fraction == 1.0
+
+
+def test_at_most_one_call_per_interval(clock):
+    calls = []
+    reporter = ProgressReporter(calls.append, "stage", interval=0.25)
+    # 100000 items in 2 seconds
+    for _ in range(100_000):
+        clock.now += 0.00002
+        reporter.advance()
+    reporter.finish()
+
+    between = [b.seconds - a.seconds for a, b in zip(calls[1:-2], calls[2:-1])]
+    assert 4 <= len(calls) <= 2 / 0.25 + 2
+    assert all(seconds >= 0.25 for seconds in between)
+    # the stride keeps the clock reads far below the item count
+    assert clock.reads < 1000
+
+
+def test_slow_loop_reports_every_interval(clock):
+    calls = []
+    reporter = ProgressReporter(calls.append, "stage", total=10, interval=0.25)
+    for _ in range(10):
+        clock.now += 1
+        reporter.advance()
+
+    assert [call.done for call in calls] == list(range(11))
+
+
+def test_without_callback_only_counts(clock):
+    reporter = ProgressReporter(None, "stage")
+    reads = clock.reads
+    for _ in range(10_000):
+        reporter.advance()
+    reporter.finish()
+
+    assert reporter.done == 10_000
+    assert clock.reads == reads
+
+
+def test_exit_skips_finish_on_error(clock):
+    calls = []
+    with pytest.raises(ValueError):
+        with ProgressReporter(calls.append, "stage", interval=10) as reporter:
+            reporter.advance()
+            raise ValueError("boom")
+
+    assert [call.done for call in calls] == [0]
+
+    with ProgressReporter(calls.append, "stage", interval=10) as reporter:
+        reporter.advance()
+    assert [call.done for call in calls] == [0, 0, 1]